@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+GitHub API 共通クライアント
+エス・エー・エス株式会社
+
+用途: monitoring-collector.py / guideline-compliance-checker.py で共有する
+      GitHub API 接続管理
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from profiling import Profiler
+
+logger = logging.getLogger(__name__)
+
+# 接続プールのデフォルトサイズ（ホストごとの保持接続数）
+DEFAULT_POOL_SIZE = 10
+
+# レスポンスキャッシュのデフォルト設定
+DEFAULT_CACHE_PATH = './data/github-response-cache.db'
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# rate limit / 再試行のデフォルト設定
+DEFAULT_RATE_LIMIT_RESERVE = 100
+DEFAULT_MAX_RETRIES = 3
+
+def create_session(token: str, pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """接続プール付き HTTP セッション生成
+
+    同一セッションを使い回すことで TLS ハンドシェイクをリポジトリごと・
+    リクエストごとに繰り返さず、keep-alive 接続を再利用する。
+    requests (urllib3) は HTTP/2 に対応していないため HTTP/1.1 の
+    持続的接続でプールする。
+    """
+    session = requests.Session()
+    session.headers.update({
+        'Authorization': f'token {token}',
+        'Accept': 'application/vnd.github.v3+json',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
+
+    # pool_block=True: 並列ワーカー数がプールサイズを超えても接続を増やさず空きを待つ
+    adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+class ResponseCache:
+    """ETag / Last-Modified による条件付きリクエスト用のディスクキャッシュ
+
+    304 Not Modified は GitHub の rate limit を消費しないため、
+    変化のないペイロードは通信量・API 残量ともに節約できる。
+    合計サイズが上限を超えた場合は最終参照が古いものから削除する (LRU)。
+    合計サイズは開いた時点の値から書き込みごとに加減算して保持し、304 による
+    最終参照時刻の更新は次の保存（または flush / close）でまとめて書き込む。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH,
+                 max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.revalidated = 0
+        self.stored = 0
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                link TEXT,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        # link 列追加前に作成されたキャッシュへの列追加
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(responses)")]
+        if 'link' not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN link TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)"
+        )
+        self._conn.commit()
+        self.total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        # 未書き込みの最終参照時刻（url -> accessed_at）
+        self._pending_access: Dict[str, float] = {}
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """キャッシュ済みエントリに対応する条件付きリクエストヘッダー"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return {}
+        headers = {}
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def load(self, url: str) -> Tuple[Any, Optional[str]]:
+        """304 応答時にキャッシュ済みの (ボディ, Link ヘッダー) を返す"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, link FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(url)
+            self._pending_access[url] = time.time()
+            self.revalidated += 1
+        return json.loads(row[0]), row[1]
+
+    def store(self, url: str, response: requests.Response, data: Any):
+        """検証子（ETag / Last-Modified）付きのレスポンスを保存"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        body = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, etag, last_modified, link, body, size, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, response.headers.get('Link'), body, len(body), time.time())
+            )
+            self._pending_access.pop(url, None)
+            self.total_bytes += len(body) - (previous[0] if previous else 0)
+            self._write_pending_access()
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+            self.stored += 1
+
+    def _write_pending_access(self):
+        """保留中の最終参照時刻を書き込む（ロック取得済みで呼ぶ。コミットは呼び出し側）"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?",
+                [(accessed_at, url) for url, accessed_at in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def _evict(self):
+        """サイズ上限超過分を最終参照の古い順に削除（ロック取得済みで呼ぶ）"""
+        excess = self.total_bytes - self.max_bytes
+        freed = 0
+        victims = []
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at"
+        ):
+            victims.append((url,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+        self.total_bytes -= freed
+
+    def flush(self):
+        """保留中の最終参照時刻を書き込む"""
+        with self._lock:
+            self._write_pending_access()
+            self._conn.commit()
+
+    def summary(self) -> str:
+        """キャッシュ利用状況サマリー"""
+        return f"revalidated(304)={self.revalidated}, stored={self.stored}"
+
+    def close(self):
+        """保留中の更新を書き込んで接続をクローズ"""
+        with self._lock:
+            self._write_pending_access()
+            self._conn.commit()
+            self._conn.close()
+
+class RateLimiter:
+    """GitHub API rate limit に追従するトークンバケット型リミッター
+
+    X-RateLimit-Remaining / X-RateLimit-Reset を基に、残量が上限の
+    pacing_ratio を下回った時点からリセットまでの残り時間に均等に
+    リクエストを配分する。残量が reserve に達した場合はリセット時刻まで
+    待機する（固定の 1 時間ではない）。403 / 429 の rate limit 応答では
+    Retry-After またはリセット時刻、二次 rate limit では指数バックオフ＋
+    ジッターで全ワーカーを一時停止する。複数スレッドから共有可能。
+    """
+
+    def __init__(self, reserve: int = DEFAULT_RATE_LIMIT_RESERVE, pacing_ratio: float = 0.5):
+        self.reserve = reserve
+        self.pacing_ratio = pacing_ratio
+        self.limit = 5000
+        self.remaining = 5000
+        self.reset_at = 0.0
+        self.wait_seconds = 0.0
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """リクエスト送信前に呼び出し、必要な時間だけ待機する（待機秒数を返す）"""
+        with self._lock:
+            now = time.time()
+            wait = max(0.0, self._blocked_until - now)
+
+            if self.reset_at > now:
+                # 並列ワーカーの送信中リクエストも残量から差し引く
+                budget = self.remaining - self._in_flight - self.reserve
+                if budget <= 0:
+                    wait = max(wait, self.reset_at - now + 1)
+                    logger.warning(f"API rate limit 残量が僅少です。リセットまで {wait:.0f} 秒待機します")
+                elif self.remaining < self.limit * self.pacing_ratio:
+                    # リセットまでの残り時間に残量を均等配分する
+                    interval = (self.reset_at - now) / budget
+                    slot = max(self._next_slot, now + wait)
+                    self._next_slot = slot + interval
+                    wait = slot - now
+
+            self._in_flight += 1
+            self.wait_seconds += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def release(self, response: Optional[requests.Response] = None):
+        """リクエスト完了後に呼び出し、レスポンスヘッダーから状態を更新する"""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if response is None:
+                return
+
+            headers = response.headers
+            if 'X-RateLimit-Limit' in headers:
+                self.limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Remaining' in headers:
+                self.remaining = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset' in headers:
+                reset_at = float(headers['X-RateLimit-Reset'])
+                if reset_at != self.reset_at:
+                    # 新しいウィンドウでは配分スケジュールをやり直す
+                    self.reset_at = reset_at
+                    self._next_slot = 0.0
+
+    def backoff(self, response: requests.Response, attempt: int) -> bool:
+        """rate limit 応答なら全ワーカーの待機時間を設定して True を返す"""
+        if not self._is_rate_limited(response):
+            return False
+
+        headers = response.headers
+        now = time.time()
+        if 'Retry-After' in headers:
+            delay = float(headers['Retry-After'])
+        elif headers.get('X-RateLimit-Remaining') == '0' and 'X-RateLimit-Reset' in headers:
+            delay = float(headers['X-RateLimit-Reset']) - now + 1
+        else:
+            # 二次 rate limit: 最低 1 分から指数的に延長
+            delay = 60 * (2 ** attempt)
+        delay = max(delay, 1.0) * (1 + random.uniform(0, 0.25))
+
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, now + delay)
+        logger.warning(f"API rate limit に到達しました (HTTP {response.status_code})。{delay:.0f} 秒後に再試行します")
+        return True
+
+    @staticmethod
+    def _is_rate_limited(response: requests.Response) -> bool:
+        """rate limit による 403 / 429 かどうか（権限エラーの 403 は除外）"""
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        return (
+            'Retry-After' in response.headers
+            or response.headers.get('X-RateLimit-Remaining') == '0'
+            or 'rate limit' in response.text.lower()
+        )
+
+    def summary(self) -> str:
+        """rate limit 状態サマリー"""
+        return f"remaining={self.remaining}/{self.limit}, waited={self.wait_seconds:.1f}s"
+
+def _send(session: requests.Session, method: str, url: str,
+          rate_limiter: Optional[RateLimiter], max_retries: int,
+          **kwargs) -> Tuple[requests.Response, float]:
+    """rate limit 待機・再試行付きでリクエストを送信し (レスポンス, 待機秒数) を返す"""
+    if not rate_limiter:
+        return session.request(method, url, **kwargs), 0.0
+
+    waited = 0.0
+    for attempt in range(max_retries + 1):
+        waited += rate_limiter.acquire()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            rate_limiter.release()
+            raise
+        rate_limiter.release(response)
+        if attempt == max_retries or not rate_limiter.backoff(response, attempt):
+            break
+    return response, waited
+
+def _response_size(response: requests.Response) -> int:
+    """転送バイト数（圧縮時は Content-Length、なければ展開後のボディ長）"""
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else len(response.content)
+
+def get_json(session: requests.Session, url: str, params: Optional[Dict] = None,
+             cache: Optional[ResponseCache] = None,
+             rate_limiter: Optional[RateLimiter] = None,
+             max_retries: int = DEFAULT_MAX_RETRIES,
+             profiler: Optional[Profiler] = None) -> Tuple[Any, requests.Response]:
+    """GET リクエストを送信し (JSON ボディ, レスポンス) を返す
+
+    cache が指定されていれば条件付きリクエストを送り、304 の場合は
+    キャッシュ済みボディを返す。rate_limiter が指定されていれば送信前に
+    待機し、rate limit 応答は max_retries 回まで再試行する。
+    profiler が指定されていれば所要時間・転送量等をエンドポイント別に記録する。
+    HTTP エラーは requests.exceptions.HTTPError として送出する。
+    """
+    full_url = requests.Request('GET', url, params=params).prepare().url
+    headers = cache.conditional_headers(full_url) if cache else {}
+    start = time.perf_counter()
+    response = None
+    waited = 0.0
+    cache_hit = False
+
+    try:
+        response, waited = _send(session, 'GET', full_url, rate_limiter, max_retries, headers=headers)
+        if response.status_code == 304 and cache:
+            try:
+                data, link = cache.load(full_url)
+                # ページネーション情報は 304 応答に含まれない場合があるため保存値で補う
+                if link and 'Link' not in response.headers:
+                    response.headers['Link'] = link
+                cache_hit = True
+                return data, response
+            except KeyError:
+                # 304 受信と同時にエントリが削除された場合は取り直す
+                response, retry_waited = _send(session, 'GET', full_url, rate_limiter, max_retries)
+                waited += retry_waited
+
+        response.raise_for_status()
+
+        # 204 No Content（vulnerability-alerts 有効時など）はボディなし
+        data = response.json() if response.content else {}
+        if cache:
+            cache.store(full_url, response, data)
+        return data, response
+    finally:
+        if profiler:
+            profiler.record_request(
+                'GET', full_url, time.perf_counter() - start,
+                response.status_code if response is not None else None,
+                _response_size(response) if response is not None else 0,
+                cache_hit, waited
+            )
+
+def iter_items(session: requests.Session, url: str, params: Optional[Dict] = None,
+               cache: Optional[ResponseCache] = None,
+               rate_limiter: Optional[RateLimiter] = None,
+               profiler: Optional[Profiler] = None) -> Iterator[Any]:
+    """Link: rel="next" をたどって一覧 API の要素を遅延取得
+
+    ジェネレーターのため、呼び出し側が途中で打ち切れば以降のページは取得しない。
+    """
+    while url:
+        data, response = get_json(session, url, params, cache, rate_limiter, profiler=profiler)
+        if not isinstance(data, list):
+            return
+        yield from data
+
+        # next の URL にはクエリパラメータが含まれる
+        url = response.links.get('next', {}).get('url')
+        params = None
+
+def iter_items_parallel(session: requests.Session, url: str, params: Optional[Dict] = None,
+                        cache: Optional[ResponseCache] = None,
+                        rate_limiter: Optional[RateLimiter] = None,
+                        max_workers: int = 4,
+                        profiler: Optional[Profiler] = None) -> Iterator[Any]:
+    """一覧 API の全ページを並列取得し、届いたページから順に要素を返す
+
+    1 ページ目の Link: rel="last" から総ページ数を求め、2 ページ目以降を
+    max_workers 並列で取得する。2 ページ目以降の取得は 1 ページ目の要素を
+    返す前に開始するため、呼び出し側の処理と取得が重なる。ページ間の順序は保証しない。
+    """
+    data, response = get_json(session, url, params, cache, rate_limiter, profiler=profiler)
+    if not isinstance(data, list):
+        return
+
+    last_url = response.links.get('last', {}).get('url')
+    if not last_url:
+        yield from data
+        return
+
+    parsed = urlparse(last_url)
+    query = parse_qs(parsed.query)
+    last_page = int(query.get('page', ['1'])[0])
+
+    def fetch_page(page: int) -> Any:
+        page_query = urlencode(dict(query, page=[str(page)]), doseq=True)
+        page_data, _ = get_json(session, urlunparse(parsed._replace(query=page_query)),
+                                cache=cache, rate_limiter=rate_limiter, profiler=profiler)
+        return page_data
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(fetch_page, page) for page in range(2, last_page + 1)]
+        yield from data
+        for future in as_completed(futures):
+            page_data = future.result()
+            if isinstance(page_data, list):
+                yield from page_data
+    finally:
+        # 呼び出し側が途中で打ち切った場合は未着手のページを取得しない
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def count_items(session: requests.Session, url: str, params: Optional[Dict] = None,
+                cache: Optional[ResponseCache] = None,
+                rate_limiter: Optional[RateLimiter] = None,
+                profiler: Optional[Profiler] = None) -> int:
+    """一覧 API の総件数を 1 リクエストで取得
+
+    per_page=1 で要求し、Link: rel="last" のページ番号を総件数とみなす。
+    Link がない場合は 1 ページに収まっているため要素数を返す。
+    """
+    data, response = get_json(session, url, dict(params or {}, per_page=1), cache, rate_limiter,
+                              profiler=profiler)
+
+    last_url = response.links.get('last', {}).get('url')
+    if last_url:
+        page = parse_qs(urlparse(last_url).query).get('page')
+        if page:
+            return int(page[0])
+    return len(data) if isinstance(data, list) else 0
+
+class GraphQLError(requests.exceptions.RequestException):
+    """GraphQL クエリ全体が失敗した場合の例外"""
+
+def post_graphql(session: requests.Session, url: str, query: str,
+                 variables: Optional[Dict] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 profiler: Optional[Profiler] = None) -> Tuple[Dict, List[Dict]]:
+    """GraphQL クエリを送信し (data, errors) を返す
+
+    エイリアス単位の部分的なエラー（存在しないリポジトリ等）は errors に
+    含めて返し、data が得られない場合は GraphQLError を送出する。
+    GraphQL は REST と別の rate limit (ポイント制) のため、rate_limiter には
+    REST 用とは別のインスタンスを渡すこと。
+    """
+    start = time.perf_counter()
+    response = None
+    waited = 0.0
+    try:
+        response, waited = _send(session, 'POST', url, rate_limiter, max_retries,
+                                 json={'query': query, 'variables': variables or {}})
+    finally:
+        if profiler:
+            profiler.record_request(
+                'POST', url, time.perf_counter() - start,
+                response.status_code if response is not None else None,
+                _response_size(response) if response is not None else 0,
+                rate_limit_wait=waited
+            )
+    response.raise_for_status()
+
+    payload = response.json()
+    errors = payload.get('errors') or []
+    if payload.get('data') is None:
+        messages = '; '.join(e.get('message', '') for e in errors)
+        raise GraphQLError(f"GraphQL query failed: {messages}", response=response)
+    return payload['data'], errors
@@ -11,13 +11,27 @@ import logging
 import os
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple
 import requests
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
-import yaml
 import re
+import sqlite3
+from contextlib import ExitStack
+from html import escape
+
+from github_client import (
+    DEFAULT_POOL_SIZE, RateLimiter, ResponseCache, create_session, get_json, iter_items_parallel,
+    post_graphql
+)
+from profiling import PROFILE_FORMATS, Profiler, profiled
+from report_writers import JsonLinesWriter, JsonReportWriter
+from run_journal import RunJournal
+from scheduler import ControlServer, Scheduler, order_by_recent_push
+from webhook_server import DEFAULT_WEBHOOK_PATH, WebhookServer
 
 # ログ設定
 logging.basicConfig(
@@ -43,24 +57,80 @@ class RepositoryCompliance:
     checks: List[ComplianceResult]
     recommendations: List[str]
     timestamp: datetime
+    # 登録済みチェック名（または repository_access）ごとの結果。checks はこれを順に連結したもの
+    results_by_check: Dict[str, List[ComplianceResult]] = field(default_factory=dict)
+
+@dataclass
+class RepositoryCheck:
+    """登録済みリポジトリチェック
+    
+    requires はルール設定から必要な GitHub リソースのキー一覧を返す。
+    キーは 'repo' / 'protection' / 'vulnerability_alerts' / 'automated_security_fixes' /
+    'contents:<パス>' / 'commits' のいずれか。evaluate は取得済みリソースを受け取り、
+    API を呼ばずに結果を返す。
+    """
+    name: str
+    requires: Callable[[Dict], List[str]]
+    evaluate: Callable[['GitHubComplianceChecker', 'FetchedResources'], List[ComplianceResult]]
+
+# 登録順がチェックの実行順・レポートの出力順になる
+REPOSITORY_CHECKS: Dict[str, RepositoryCheck] = {}
+
+# 他のリソースより先に取得し、取得できなければ以降の取得を行わないリソース
+PRIMARY_RESOURCE = 'repo'
+
+# リポジトリにアクセスできない場合の結果をまとめるチェック名
+ACCESS_CHECK = 'repository_access'
+
+def repository_check(name: str, requires: Callable[[Dict], List[str]]):
+    """リポジトリチェックを登録するデコレータ"""
+    def register(func):
+        REPOSITORY_CHECKS[name] = RepositoryCheck(name, requires, func)
+        return func
+    return register
+
+def flatten_results(results_by_check: Dict[str, List[ComplianceResult]]) -> List[ComplianceResult]:
+    """チェック単位の結果を 1 つのリストに連結"""
+    return [result for results in results_by_check.values() for result in results]
+
+class FetchedResources(dict):
+    """取得済みリソース（取得時の例外は参照した時点で送出する）"""
+    
+    def __getitem__(self, key: str) -> Any:
+        value = super().__getitem__(key)
+        if isinstance(value, Exception):
+            raise value
+        return value
 
 class GitHubComplianceChecker:
     """GitHub ガイドライン準拠チェッカー"""
     
-    def __init__(self, token: str, org: str, config_path: str = './config/compliance-rules.yml'):
+    def __init__(self, token: str, org: str, config_path: str = './config/compliance-rules.yml',
+                 pool_size: int = DEFAULT_POOL_SIZE, cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None, fetch_workers: int = 8,
+                 profiler: Optional[Profiler] = None):
         self.token = token
         self.org = org
-        self.headers = {
-            'Authorization': f'token {token}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
+        self.session = create_session(token, pool_size)
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # エンドポイント別・チェック別の所要時間計測
+        self.profiler = profiler or Profiler()
         self.base_url = 'https://api.github.com'
         
         # 準拠ルール読み込み
         self.rules = self._load_compliance_rules(config_path)
         
+        # 有効なチェックと、それらが必要とするリソース（重複なし・初出順）
+        self.checks = self._enabled_checks()
+        self.resource_plan = self._resource_plan(self.checks)
+        self.fetch_workers = fetch_workers
+        self._fetch_executor: Optional[ThreadPoolExecutor] = None
+        
     def _load_compliance_rules(self, config_path: str) -> Dict:
         """準拠ルール設定読み込み"""
+        import yaml
+        
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
                 return yaml.safe_load(f)
@@ -118,6 +188,15 @@ class GitHubComplianceChecker:
                 'commit_convention': {
                     'pattern': '^(feat|fix|docs|style|refactor|test|chore)(\\(.+\\))?: .+',
                     'enforce': True
+                },
+                # false にしたチェックは実行せず、そのチェックだけが使うリソースも取得しない
+                'checks': {
+                    'repository_settings': True,
+                    'branch_protection': True,
+                    'repository_security': True,
+                    'required_files': True,
+                    'naming_convention': True,
+                    'commit_convention': True
                 }
             },
             'pull_request': {
@@ -128,44 +207,81 @@ class GitHubComplianceChecker:
             }
         }
     
+    def _enabled_checks(self) -> List[RepositoryCheck]:
+        """ルール設定（repository.checks）で無効化されていない登録済みチェック"""
+        switches = self.rules.get('repository', {}).get('checks') or {}
+        for name in switches:
+            if name not in REPOSITORY_CHECKS:
+                logger.warning(f"未登録のチェックが設定されています: {name}")
+        
+        checks = [check for name, check in REPOSITORY_CHECKS.items() if switches.get(name, True)]
+        disabled = [name for name in REPOSITORY_CHECKS if not switches.get(name, True)]
+        if disabled:
+            logger.info(f"無効化されたチェック: {', '.join(disabled)}")
+        return checks
+    
+    def _resource_plan(self, checks: List[RepositoryCheck]) -> List[str]:
+        """チェックが必要とするリソースキー（重複なし・初出順）"""
+        return list(dict.fromkeys(
+            resource for check in checks for resource in check.requires(self.rules)
+        ))
+    
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
         """GitHub API リクエスト"""
         url = f"{self.base_url}/{endpoint}"
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
+            data, _ = get_json(self.session, url, params, self.cache, self.rate_limiter,
+                               profiler=self.profiler)
+            return data
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {e}")
             raise
     
+    def iter_repositories(self) -> Iterator[Dict]:
+        """組織の全リポジトリを並列取得し、届いたページから順に返す"""
+        return iter_items_parallel(
+            self.session, f"{self.base_url}/orgs/{self.org}/repos",
+            {'per_page': 100}, self.cache, self.rate_limiter, profiler=self.profiler
+        )
+    
+    def iter_repository_names(self) -> Iterator[str]:
+        """組織の全リポジトリ名を並列取得し、届いたページから順に返す"""
+        for repo in self.iter_repositories():
+            yield repo['name']
+    
     def check_organization_compliance(self) -> List[ComplianceResult]:
         """組織レベル準拠チェック"""
-        results = []
+        return flatten_results(self.evaluate_organization_checks())
+    
+    @profiled
+    def evaluate_organization_checks(self) -> Dict[str, List[ComplianceResult]]:
+        """組織レベル準拠チェック（チェック単位の結果）"""
+        results = {}
         logger.info("組織レベルの準拠チェック開始...")
         
         try:
             # 組織設定チェック
             org_data = self._make_request(f"orgs/{self.org}")
-            results.extend(self._check_org_settings(org_data))
+            results['org_settings'] = self._check_org_settings(org_data)
             
             # チーム存在チェック
-            results.extend(self._check_required_teams())
+            results['required_teams'] = self._check_required_teams()
             
             # セキュリティ機能チェック
-            results.extend(self._check_org_security_features())
+            results['org_security_features'] = self._check_org_security_features()
             
         except Exception as e:
-            results.append(ComplianceResult(
+            results['organization_access'] = [ComplianceResult(
                 check_name="organization_access",
                 status="FAIL",
                 message=f"組織情報にアクセスできません: {e}",
                 severity="HIGH"
-            ))
+            )]
         
         return results
     
+    @profiled
     def _check_org_settings(self, org_data: Dict) -> List[ComplianceResult]:
         """組織設定チェック"""
         results = []
@@ -192,6 +308,7 @@ class GitHubComplianceChecker:
         
         return results
     
+    @profiled
     def _check_required_teams(self) -> List[ComplianceResult]:
         """必須チームチェック"""
         results = []
@@ -241,31 +358,119 @@ class GitHubComplianceChecker:
         
         return results
     
+    @profiled
     def check_repository_compliance(self, repo_name: str) -> RepositoryCompliance:
         """リポジトリ準拠チェック"""
         logger.info(f"リポジトリ '{repo_name}' の準拠チェック開始...")
+        return self._build_repository_compliance(repo_name, self.evaluate_repository_checks(repo_name))
+    
+    def evaluate_repository_checks(self, repo_name: str,
+                                   checks: Optional[List[RepositoryCheck]] = None
+                                   ) -> Dict[str, List[ComplianceResult]]:
+        """指定したチェック（省略時は有効な全チェック）だけを、必要なリソースのみ取得して評価"""
+        checks = self.checks if checks is None else checks
+        resource_plan = self.resource_plan if checks is self.checks else self._resource_plan(checks)
+        
+        resources = FetchedResources()
+        primary, secondary = self._split_resource_plan(resource_plan)
+        for key in primary:
+            resources[key] = self._fetch_or_error(repo_name, key)
+        
+        if not self._primary_failed(resources):
+            # チェックが必要とするリソースを 1 回ずつ並列取得
+            values = self._fetch_many([(repo_name, key) for key in secondary])
+            resources.update(zip(secondary, values))
+        
+        return self._evaluate_checks(resources, checks)
+    
+    def _fetch_many(self, targets: List[Tuple[str, str]]) -> List[Any]:
+        """(リポジトリ名, リソースキー) の組を並列取得し、同じ順序で返す"""
+        if len(targets) <= 1:
+            return [self._fetch_or_error(repo_name, key) for repo_name, key in targets]
+        if self._fetch_executor is None:
+            self._fetch_executor = ThreadPoolExecutor(max_workers=self.fetch_workers,
+                                                      thread_name_prefix='fetch')
+        futures = [
+            self._fetch_executor.submit(self._fetch_or_error, repo_name, key)
+            for repo_name, key in targets
+        ]
+        return [future.result() for future in futures]
+    
+    def _split_resource_plan(self, resource_plan: Optional[List[str]] = None
+                             ) -> Tuple[List[str], List[str]]:
+        """取得計画を先行取得分（基本情報）と並列取得分に分ける"""
+        resource_plan = self.resource_plan if resource_plan is None else resource_plan
+        primary = [key for key in resource_plan if key == PRIMARY_RESOURCE]
+        secondary = [key for key in resource_plan if key != PRIMARY_RESOURCE]
+        return primary, secondary
+    
+    @staticmethod
+    def _primary_failed(resources: FetchedResources) -> bool:
+        return isinstance(dict.get(resources, PRIMARY_RESOURCE), Exception)
+    
+    def _fetch_or_error(self, repo_name: str, key: str) -> Any:
+        """リソースを取得し、失敗時は例外を値として返す（評価時に送出される）"""
+        try:
+            with self.profiler.span(f"resource:{key.partition(':')[0]}", 'resource',
+                                    repository=repo_name, key=key):
+                return self._fetch_resource(repo_name, key)
+        except Exception as e:
+            return e
+    
+    def _fetch_resource(self, repo_name: str, key: str) -> Any:
+        """リソースキーに対応する GitHub API を呼び出す"""
+        prefix = f"repos/{self.org}/{repo_name}"
+        kind, _, argument = key.partition(':')
         
-        checks = []
+        if kind == 'repo':
+            return self._make_request(prefix)
+        if kind == 'protection':
+            # mainブランチの保護設定（未設定は None）
+            try:
+                return self._make_request(f"{prefix}/branches/main/protection")
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code == 404:
+                    return None
+                raise
+        if kind in ('vulnerability_alerts', 'automated_security_fixes'):
+            return self._is_enabled(f"{prefix}/{kind.replace('_', '-')}")
+        if kind == 'contents':
+            return self._is_enabled(f"{prefix}/contents/{argument}")
+        if kind == 'commits':
+            # 最近のコミット取得（10件）
+            return self._make_request(f"{prefix}/commits", params={'per_page': 10})
+        raise ValueError(f"未知のリソースです: {key}")
+    
+    def _evaluate_checks(self, resources: FetchedResources,
+                         checks: Optional[List[RepositoryCheck]] = None
+                         ) -> Dict[str, List[ComplianceResult]]:
+        """チェック（省略時は有効な全チェック）を登録順に評価し、チェック名ごとの結果を返す"""
+        results = {}
         
         try:
-            # 基本情報取得
-            repo_data = self._make_request(f"repos/{self.org}/{repo_name}")
+            # 基本情報が取得できなければ、どのチェックも行わない
+            if PRIMARY_RESOURCE in resources:
+                resources[PRIMARY_RESOURCE]
             
-            # 各種チェック実行
-            checks.extend(self._check_repository_settings(repo_data))
-            checks.extend(self._check_branch_protection(repo_name))
-            checks.extend(self._check_repository_security(repo_name))
-            checks.extend(self._check_required_files(repo_name))
-            checks.extend(self._check_naming_convention(repo_data))
-            checks.extend(self._check_commit_convention(repo_name))
+            for check in self.checks if checks is None else checks:
+                with self.profiler.span(check.name):
+                    results[check.name] = check.evaluate(self, resources)
             
         except Exception as e:
-            checks.append(ComplianceResult(
-                check_name="repository_access",
+            results[ACCESS_CHECK] = [ComplianceResult(
+                check_name=ACCESS_CHECK,
                 status="FAIL",
                 message=f"リポジトリにアクセスできません: {e}",
                 severity="HIGH"
-            ))
+            )]
+        
+        return results
+    
+    def _build_repository_compliance(self, repo_name: str,
+                                     results_by_check: Dict[str, List[ComplianceResult]]
+                                     ) -> RepositoryCompliance:
+        """チェック結果からスコア・推奨事項を算出"""
+        checks = flatten_results(results_by_check)
         
         # 総合スコア計算
         score = self._calculate_compliance_score(checks)
@@ -278,7 +483,8 @@ class GitHubComplianceChecker:
             overall_score=score,
             checks=checks,
             recommendations=recommendations,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            results_by_check=results_by_check
         )
     
     def _check_repository_settings(self, repo_data: Dict) -> List[ComplianceResult]:
@@ -319,101 +525,96 @@ class GitHubComplianceChecker:
         
         return results
     
-    def _check_branch_protection(self, repo_name: str) -> List[ComplianceResult]:
-        """ブランチ保護チェック"""
+    def _evaluate_branch_protection(self, protection_data: Optional[Dict]) -> List[ComplianceResult]:
+        """ブランチ保護設定の評価（None は保護設定なし）"""
         results = []
         
-        try:
-            # mainブランチの保護設定取得
-            protection_data = self._make_request(
-                f"repos/{self.org}/{repo_name}/branches/main/protection"
-            )
-            
-            bp_rules = self.rules['repository']['branch_protection']
-            
-            # 必須ステータスチェック
-            if protection_data.get('required_status_checks'):
-                results.append(ComplianceResult(
-                    check_name="branch_protection_status_checks",
-                    status="PASS",
-                    message="必須ステータスチェックが設定されています",
-                    severity="HIGH"
-                ))
-            else:
-                results.append(ComplianceResult(
-                    check_name="branch_protection_status_checks",
-                    status="FAIL",
-                    message="必須ステータスチェックが設定されていません",
-                    severity="HIGH"
-                ))
-            
-            # PR必須レビュー
-            pr_reviews = protection_data.get('required_pull_request_reviews', {})
-            required_count = bp_rules['required_pull_request_reviews']['required_approving_review_count']
-            
-            if pr_reviews.get('required_approving_review_count', 0) >= required_count:
-                results.append(ComplianceResult(
-                    check_name="branch_protection_reviews",
-                    status="PASS",
-                    message=f"必要なレビュー数({required_count})が設定されています",
-                    severity="HIGH"
-                ))
-            else:
-                results.append(ComplianceResult(
-                    check_name="branch_protection_reviews",
-                    status="FAIL",
-                    message=f"レビュー数が不足しています (必要: {required_count})",
-                    severity="HIGH"
-                ))
-            
-            # 管理者適用
-            if protection_data.get('enforce_admins', {}).get('enabled', False):
-                results.append(ComplianceResult(
-                    check_name="branch_protection_enforce_admins",
-                    status="PASS",
-                    message="管理者にもブランチ保護が適用されています",
-                    severity="MEDIUM"
-                ))
-            else:
-                results.append(ComplianceResult(
-                    check_name="branch_protection_enforce_admins",
-                    status="WARN",
-                    message="管理者にブランチ保護が適用されていません",
-                    severity="MEDIUM"
-                ))
-                
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                results.append(ComplianceResult(
-                    check_name="branch_protection",
-                    status="FAIL",
-                    message="mainブランチに保護設定がありません",
-                    severity="HIGH"
-                ))
-            else:
-                results.append(ComplianceResult(
-                    check_name="branch_protection",
-                    status="FAIL",
-                    message=f"ブランチ保護設定の確認中にエラー: {e}",
-                    severity="MEDIUM"
-                ))
+        if protection_data is None:
+            results.append(ComplianceResult(
+                check_name="branch_protection",
+                status="FAIL",
+                message="mainブランチに保護設定がありません",
+                severity="HIGH"
+            ))
+            return results
+        
+        bp_rules = self.rules['repository']['branch_protection']
+        
+        # 必須ステータスチェック
+        if protection_data.get('required_status_checks'):
+            results.append(ComplianceResult(
+                check_name="branch_protection_status_checks",
+                status="PASS",
+                message="必須ステータスチェックが設定されています",
+                severity="HIGH"
+            ))
+        else:
+            results.append(ComplianceResult(
+                check_name="branch_protection_status_checks",
+                status="FAIL",
+                message="必須ステータスチェックが設定されていません",
+                severity="HIGH"
+            ))
+        
+        # PR必須レビュー
+        pr_reviews = protection_data.get('required_pull_request_reviews', {})
+        required_count = bp_rules['required_pull_request_reviews']['required_approving_review_count']
+        
+        if pr_reviews.get('required_approving_review_count', 0) >= required_count:
+            results.append(ComplianceResult(
+                check_name="branch_protection_reviews",
+                status="PASS",
+                message=f"必要なレビュー数({required_count})が設定されています",
+                severity="HIGH"
+            ))
+        else:
+            results.append(ComplianceResult(
+                check_name="branch_protection_reviews",
+                status="FAIL",
+                message=f"レビュー数が不足しています (必要: {required_count})",
+                severity="HIGH"
+            ))
+        
+        # 管理者適用
+        if protection_data.get('enforce_admins', {}).get('enabled', False):
+            results.append(ComplianceResult(
+                check_name="branch_protection_enforce_admins",
+                status="PASS",
+                message="管理者にもブランチ保護が適用されています",
+                severity="MEDIUM"
+            ))
+        else:
+            results.append(ComplianceResult(
+                check_name="branch_protection_enforce_admins",
+                status="WARN",
+                message="管理者にブランチ保護が適用されていません",
+                severity="MEDIUM"
+            ))
         
         return results
     
-    def _check_repository_security(self, repo_name: str) -> List[ComplianceResult]:
-        """リポジトリセキュリティチェック"""
+    def _is_enabled(self, endpoint: str) -> bool:
+        """有効時 2xx・無効時 4xx を返すエンドポイントの判定"""
+        try:
+            self._make_request(endpoint)
+            return True
+        except requests.exceptions.HTTPError:
+            return False
+    
+    def _evaluate_repository_security(self, vulnerability_alerts: bool,
+                                      automated_fixes: bool) -> List[ComplianceResult]:
+        """セキュリティ機能の有効状態の評価"""
         results = []
         
         # セキュリティアラート
-        try:
-            self._make_request(f"repos/{self.org}/{repo_name}/vulnerability-alerts")
+        if vulnerability_alerts:
             results.append(ComplianceResult(
                 check_name="security_vulnerability_alerts",
                 status="PASS",
                 message="脆弱性アラートが有効です",
                 severity="HIGH"
             ))
-        except requests.exceptions.HTTPError:
+        else:
             results.append(ComplianceResult(
                 check_name="security_vulnerability_alerts",
                 status="FAIL",
@@ -422,15 +623,14 @@ class GitHubComplianceChecker:
             ))
         
         # 自動セキュリティ修正
-        try:
-            self._make_request(f"repos/{self.org}/{repo_name}/automated-security-fixes")
+        if automated_fixes:
             results.append(ComplianceResult(
                 check_name="security_automated_fixes",
                 status="PASS",
                 message="自動セキュリティ修正が有効です",
                 severity="MEDIUM"
             ))
-        except requests.exceptions.HTTPError:
+        else:
             results.append(ComplianceResult(
                 check_name="security_automated_fixes",
                 status="WARN",
@@ -440,21 +640,19 @@ class GitHubComplianceChecker:
         
         return results
     
-    def _check_required_files(self, repo_name: str) -> List[ComplianceResult]:
-        """必須ファイルチェック"""
+    def _evaluate_required_files(self, file_exists: Dict[str, bool]) -> List[ComplianceResult]:
+        """必須ファイルの存在状況の評価"""
         results = []
-        required_files = self.rules['repository']['required_files']
         
-        for file_path in required_files:
-            try:
-                self._make_request(f"repos/{self.org}/{repo_name}/contents/{file_path}")
+        for file_path, exists in file_exists.items():
+            if exists:
                 results.append(ComplianceResult(
                     check_name=f"required_file_{file_path.replace('/', '_')}",
                     status="PASS",
                     message=f"必須ファイル '{file_path}' が存在します",
                     severity="MEDIUM"
                 ))
-            except requests.exceptions.HTTPError:
+            else:
                 results.append(ComplianceResult(
                     check_name=f"required_file_{file_path.replace('/', '_')}",
                     status="FAIL",
@@ -508,70 +706,47 @@ class GitHubComplianceChecker:
         
         return results
     
-    def _check_commit_convention(self, repo_name: str) -> List[ComplianceResult]:
-        """コミット規約チェック"""
+    def _evaluate_commit_convention(self, headlines: List[str]) -> List[ComplianceResult]:
+        """コミットメッセージ 1 行目の規約準拠率の評価"""
         results = []
         
-        try:
-            # 最近のコミット取得（10件）
-            commits_data = self._make_request(
-                f"repos/{self.org}/{repo_name}/commits",
-                params={'per_page': 10}
-            )
-            
-            if not commits_data:
-                results.append(ComplianceResult(
-                    check_name="commit_convention",
-                    status="SKIP",
-                    message="コミット履歴が取得できませんでした",
-                    severity="LOW"
-                ))
-                return results
-            
-            pattern = self.rules['repository']['commit_convention']['pattern']
-            compliant_commits = 0
-            
-            for commit in commits_data:
-                message = commit.get('commit', {}).get('message', '')
-                first_line = message.split('\n')[0]
-                
-                if re.match(pattern, first_line):
-                    compliant_commits += 1
-            
-            compliance_rate = compliant_commits / len(commits_data)
-            
-            if compliance_rate >= 0.8:  # 80%以上で合格
-                results.append(ComplianceResult(
-                    check_name="commit_convention",
-                    status="PASS",
-                    message=f"コミットメッセージの規約準拠率: {compliance_rate:.1%}",
-                    severity="MEDIUM",
-                    details={'compliant_rate': compliance_rate}
-                ))
-            elif compliance_rate >= 0.5:  # 50%以上で警告
-                results.append(ComplianceResult(
-                    check_name="commit_convention",
-                    status="WARN",
-                    message=f"コミットメッセージの規約準拠率が低いです: {compliance_rate:.1%}",
-                    severity="MEDIUM",
-                    details={'compliant_rate': compliance_rate}
-                ))
-            else:
-                results.append(ComplianceResult(
-                    check_name="commit_convention",
-                    status="FAIL",
-                    message=f"コミットメッセージの規約準拠率が非常に低いです: {compliance_rate:.1%}",
-                    severity="HIGH",
-                    details={'compliant_rate': compliance_rate}
-                ))
-                
-        except Exception as e:
+        if not headlines:
             results.append(ComplianceResult(
                 check_name="commit_convention",
-                status="FAIL",
-                message=f"コミット規約チェック中にエラー: {e}",
+                status="SKIP",
+                message="コミット履歴が取得できませんでした",
                 severity="LOW"
             ))
+            return results
+        
+        pattern = self.rules['repository']['commit_convention']['pattern']
+        compliant_commits = len([line for line in headlines if re.match(pattern, line)])
+        compliance_rate = compliant_commits / len(headlines)
+        
+        if compliance_rate >= 0.8:  # 80%以上で合格
+            results.append(ComplianceResult(
+                check_name="commit_convention",
+                status="PASS",
+                message=f"コミットメッセージの規約準拠率: {compliance_rate:.1%}",
+                severity="MEDIUM",
+                details={'compliant_rate': compliance_rate}
+            ))
+        elif compliance_rate >= 0.5:  # 50%以上で警告
+            results.append(ComplianceResult(
+                check_name="commit_convention",
+                status="WARN",
+                message=f"コミットメッセージの規約準拠率が低いです: {compliance_rate:.1%}",
+                severity="MEDIUM",
+                details={'compliant_rate': compliance_rate}
+            ))
+        else:
+            results.append(ComplianceResult(
+                check_name="commit_convention",
+                status="FAIL",
+                message=f"コミットメッセージの規約準拠率が非常に低いです: {compliance_rate:.1%}",
+                severity="HIGH",
+                details={'compliant_rate': compliance_rate}
+            ))
         
         return results
     
@@ -639,120 +814,1192 @@ class GitHubComplianceChecker:
         
         return recommendations
 
-def generate_html_report(results: Dict, output_path: str):
-    """HTML形式のレポート生成"""
-    html_template = """
-    <!DOCTYPE html>
-    <html lang="ja">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>GitHub ガイドライン準拠レポート</title>
-        <style>
-            body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 20px; }
-            .header { background: #f8f9fa; padding: 20px; border-radius: 8px; margin-bottom: 20px; }
-            .summary { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 20px; }
-            .metric { background: white; padding: 15px; border-radius: 8px; border-left: 4px solid #007bff; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
-            .metric-value { font-size: 2em; font-weight: bold; color: #007bff; }
-            .metric-label { color: #6c757d; font-size: 0.9em; }
-            .repository { margin: 20px 0; padding: 20px; border: 1px solid #dee2e6; border-radius: 8px; }
-            .score { font-size: 1.5em; font-weight: bold; }
-            .score.high { color: #28a745; }
-            .score.medium { color: #ffc107; }
-            .score.low { color: #dc3545; }
-            .check { margin: 10px 0; padding: 10px; border-radius: 4px; }
-            .check.pass { background: #d4edda; border-left: 4px solid #28a745; }
-            .check.warn { background: #fff3cd; border-left: 4px solid #ffc107; }
-            .check.fail { background: #f8d7da; border-left: 4px solid #dc3545; }
-            .check.skip { background: #e2e3e5; border-left: 4px solid #6c757d; }
-            .recommendations { background: #e7f3ff; padding: 15px; border-radius: 8px; margin-top: 15px; }
-            .recommendations ul { margin: 0; padding-left: 20px; }
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>GitHub ガイドライン準拠レポート</h1>
-            <p><strong>組織:</strong> {org}</p>
-            <p><strong>生成日時:</strong> {timestamp}</p>
-        </div>
+# 標準のリポジトリチェック（登録順が逐次実行時の従来の順序）
+
+@repository_check('repository_settings', requires=lambda rules: ['repo'])
+def check_repository_settings(checker: GitHubComplianceChecker,
+                              resources: FetchedResources) -> List[ComplianceResult]:
+    """リポジトリ設定チェック"""
+    return checker._check_repository_settings(resources['repo'])
+
+@repository_check('branch_protection', requires=lambda rules: ['protection'])
+def check_branch_protection(checker: GitHubComplianceChecker,
+                            resources: FetchedResources) -> List[ComplianceResult]:
+    """ブランチ保護チェック"""
+    try:
+        protection_data = resources['protection']
+    except requests.exceptions.HTTPError as e:
+        return [ComplianceResult(
+            check_name="branch_protection",
+            status="FAIL",
+            message=f"ブランチ保護設定の確認中にエラー: {e}",
+            severity="MEDIUM"
+        )]
+    
+    return checker._evaluate_branch_protection(protection_data)
+
+@repository_check('repository_security',
+                  requires=lambda rules: ['vulnerability_alerts', 'automated_security_fixes'])
+def check_repository_security(checker: GitHubComplianceChecker,
+                              resources: FetchedResources) -> List[ComplianceResult]:
+    """リポジトリセキュリティチェック"""
+    return checker._evaluate_repository_security(resources['vulnerability_alerts'],
+                                                 resources['automated_security_fixes'])
+
+@repository_check('required_files', requires=lambda rules: [
+    f"contents:{file_path}" for file_path in rules['repository']['required_files']
+])
+def check_required_files(checker: GitHubComplianceChecker,
+                         resources: FetchedResources) -> List[ComplianceResult]:
+    """必須ファイルチェック"""
+    return checker._evaluate_required_files({
+        file_path: resources[f"contents:{file_path}"]
+        for file_path in checker.rules['repository']['required_files']
+    })
+
+@repository_check('naming_convention', requires=lambda rules: ['repo'])
+def check_naming_convention(checker: GitHubComplianceChecker,
+                            resources: FetchedResources) -> List[ComplianceResult]:
+    """命名規約チェック"""
+    return checker._check_naming_convention(resources['repo'])
+
+@repository_check('commit_convention', requires=lambda rules: ['commits'])
+def check_commit_convention(checker: GitHubComplianceChecker,
+                            resources: FetchedResources) -> List[ComplianceResult]:
+    """コミット規約チェック"""
+    try:
+        commits_data = resources['commits']
+    except Exception as e:
+        return [ComplianceResult(
+            check_name="commit_convention",
+            status="FAIL",
+            message=f"コミット規約チェック中にエラー: {e}",
+            severity="LOW"
+        )]
+    
+    return checker._evaluate_commit_convention([
+        commit.get('commit', {}).get('message', '').split('\n')[0]
+        for commit in commits_data or []
+    ])
+
+class GraphQLComplianceChecker(GitHubComplianceChecker):
+    """GitHub GraphQL API バッチ準拠チェッカー
+
+    リポジトリ設定・main ブランチ保護・必須ファイルの有無・直近コミットを
+    複数リポジトリ分まとめて 1 クエリで取得し、既存の評価ロジックに渡す。
+    自動セキュリティ修正の有効状態は GraphQL で取得できないため REST で確認する。
+    """
+    
+    def __init__(self, token: str, org: str, config_path: str = './config/compliance-rules.yml',
+                 batch_size: int = 25, **kwargs):
+        super().__init__(token, org, config_path, **kwargs)
+        self.batch_size = batch_size
+        self.graphql_url = f"{self.base_url}/graphql"
+        # GraphQL はポイント制で REST とは別枠の rate limit
+        self.graphql_rate_limiter = RateLimiter()
+    
+    def check_repositories_compliance(self, repo_names: Iterable[str],
+                                      on_error: Optional[Callable[[str, Exception], None]] = None
+                                      ) -> Iterator[RepositoryCompliance]:
+        """リポジトリ群の準拠チェックをバッチ単位で実行（一覧取得中でもバッチが揃い次第実行）
         
-        <div class="summary">
-            <div class="metric">
-                <div class="metric-value">{total_repos}</div>
-                <div class="metric-label">総リポジトリ数</div>
-            </div>
-            <div class="metric">
-                <div class="metric-value">{avg_score:.1f}%</div>
-                <div class="metric-label">平均準拠スコア</div>
-            </div>
-            <div class="metric">
-                <div class="metric-value">{high_score_repos}</div>
-                <div class="metric-label">高スコアリポジトリ (80%+)</div>
-            </div>
-            <div class="metric">
-                <div class="metric-value">{low_score_repos}</div>
-                <div class="metric-label">要改善リポジトリ (60%未満)</div>
-            </div>
-        </div>
+        バッチの取得・評価が失敗した場合はそのバッチの全リポジトリについて
+        on_error を呼び、以降のバッチを続ける。
+        """
+        names = iter(repo_names)
+        while True:
+            batch = list(islice(names, self.batch_size))
+            if not batch:
+                break
+            logger.info(f"GraphQL バッチ準拠チェック: {len(batch)} リポジトリ")
+            try:
+                results = self._check_batch(batch)
+            except Exception as e:
+                logger.error(f"GraphQL バッチチェックエラー ({len(batch)} リポジトリ): {e}")
+                if on_error:
+                    for repo_name in batch:
+                        on_error(repo_name, e)
+                continue
+            yield from results
+    
+    # GraphQL で取得するリソースのフィールド（contents:<パス> は f0, f1, ... として別途生成）
+    GRAPHQL_FIELDS = {
+        'repo': """
+            isPrivate
+            hasIssuesEnabled
+            hasWikiEnabled
+            hasProjectsEnabled""",
+        'protection': """
+            mainRef: ref(qualifiedName: "refs/heads/main") {
+                branchProtectionRule {
+                    requiresStatusChecks
+                    requiredApprovingReviewCount
+                    isAdminEnforced
+                }
+            }""",
+        'vulnerability_alerts': """
+            hasVulnerabilityAlertsEnabled""",
+        'commits': """
+            defaultBranchRef {
+                target { ... on Commit { history(first: 10) { nodes { messageHeadline } } } }
+            }"""
+    }
+    
+    @profiled
+    def _check_batch(self, repo_names: List[str]) -> List[RepositoryCompliance]:
+        """1 バッチ分のクエリ実行と評価"""
+        file_paths = self._content_paths()
+        
+        data, errors = post_graphql(
+            self.session, self.graphql_url, self._build_query(repo_names, self.resource_plan),
+            variables={'owner': self.org}, rate_limiter=self.graphql_rate_limiter,
+            profiler=self.profiler
+        )
+        for error in errors:
+            logger.warning(f"GraphQL エラー: {error.get('message')} (path: {error.get('path')})")
+        
+        # GraphQL で取得できないリソースはバッチ全体で並列に REST 取得
+        rest_keys = [key for key in self.resource_plan
+                     if key not in self.GRAPHQL_FIELDS and not key.startswith('contents:')]
+        found = [repo_name for i, repo_name in enumerate(repo_names) if data.get(f"r{i}")]
+        values = iter(self._fetch_many([
+            (repo_name, key) for repo_name in found for key in rest_keys
+        ]))
+        
+        results = []
+        for i, repo_name in enumerate(repo_names):
+            node = data.get(f"r{i}")
+            if not node:
+                results_by_check = {ACCESS_CHECK: [ComplianceResult(
+                    check_name=ACCESS_CHECK,
+                    status="FAIL",
+                    message="リポジトリにアクセスできません: GraphQL で取得できませんでした",
+                    severity="HIGH"
+                )]}
+            else:
+                resources = self._node_resources(repo_name, node, file_paths)
+                resources.update((key, next(values)) for key in rest_keys)
+                results_by_check = self._evaluate_checks(resources)
+            results.append(self._build_repository_compliance(repo_name, results_by_check))
+        return results
+    
+    def _content_paths(self) -> List[str]:
+        """取得計画に含まれるファイルパス（クエリのエイリアス f0, f1, ... の順）"""
+        return [key.partition(':')[2] for key in self.resource_plan if key.startswith('contents:')]
+    
+    @classmethod
+    def _build_query(cls, repo_names: List[str], resource_plan: List[str]) -> str:
+        """リポジトリごとにエイリアス r0, r1, ...、必須ファイルごとに f0, f1, ... を付けたクエリ生成"""
+        file_paths = [key.partition(':')[2] for key in resource_plan if key.startswith('contents:')]
+        fields = "name" + "".join(
+            cls.GRAPHQL_FIELDS[key] for key in resource_plan if key in cls.GRAPHQL_FIELDS
+        ) + "".join(
+            f"\n            f{j}: object(expression: {json.dumps('HEAD:' + path)}) {{ id }}"
+            for j, path in enumerate(file_paths)
+        )
+        aliases = "\n".join(
+            f"r{i}: repository(owner: $owner, name: {json.dumps(name)}) {{ {fields} }}"
+            for i, name in enumerate(repo_names)
+        )
+        return f"query($owner: String!) {{\n{aliases}\n}}"
+    
+    def _node_resources(self, repo_name: str, node: Dict,
+                        file_paths: List[str]) -> FetchedResources:
+        """GraphQL の結果を REST のレスポンス形式に揃えたリソースに変換"""
+        resources = FetchedResources()
+        
+        if 'repo' in self.resource_plan:
+            resources['repo'] = {
+                'name': node.get('name', repo_name),
+                'private': node.get('isPrivate', False),
+                'has_issues': node.get('hasIssuesEnabled', False),
+                'has_wiki': node.get('hasWikiEnabled', False),
+                'has_projects': node.get('hasProjectsEnabled', False)
+            }
+        
+        if 'protection' in self.resource_plan:
+            rule = (node.get('mainRef') or {}).get('branchProtectionRule')
+            protection_data = None
+            if rule:
+                # 評価は REST の保護設定レスポンス形式（該当キーの有無・値）で行う
+                protection_data = {
+                    'required_status_checks': {'enabled': True} if rule.get('requiresStatusChecks') else None,
+                    'required_pull_request_reviews': {
+                        'required_approving_review_count': rule.get('requiredApprovingReviewCount') or 0
+                    },
+                    'enforce_admins': {'enabled': rule.get('isAdminEnforced', False)}
+                }
+            resources['protection'] = protection_data
+        
+        if 'vulnerability_alerts' in self.resource_plan:
+            resources['vulnerability_alerts'] = bool(node.get('hasVulnerabilityAlertsEnabled'))
+        
+        for j, path in enumerate(file_paths):
+            resources[f"contents:{path}"] = node.get(f"f{j}") is not None
+        
+        if 'commits' in self.resource_plan:
+            history = ((node.get('defaultBranchRef') or {}).get('target') or {}).get('history') or {}
+            resources['commits'] = [
+                {'commit': {'message': commit.get('messageHeadline', '')}}
+                for commit in history.get('nodes', [])
+            ]
+        
+        return resources
+
+class AsyncComplianceEngine:
+    """asyncio による準拠チェック並行実行エンジン
+    
+    有効なチェックが必要とするリソース（取得計画）を同時に取得し、複数の
+    リポジトリを並行して処理する。HTTP 呼び出しは既存の requests ベースの処理
+    （キャッシュ・rate limit・再試行を含む）をスレッドプール上で実行するため、
+    同時リクエスト数はプールサイズ（concurrency）で全体として制限される。
+    結果は check_repository_compliance と同一の RepositoryCompliance となる。
+    """
+    
+    def __init__(self, checker: GitHubComplianceChecker, concurrency: int = 16,
+                 repositories_in_flight: int = 8):
+        self.checker = checker
+        self.concurrency = concurrency
+        self.repositories_in_flight = repositories_in_flight
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    async def _call(self, func: Callable, *args):
+        """ブロッキング呼び出しをスレッドプールで実行"""
+        import asyncio
+        
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+    
+    async def check_repository(self, repo_name: str) -> RepositoryCompliance:
+        """リポジトリ準拠チェック（取得計画のリソースを並行取得）"""
+        import asyncio
+        
+        checker = self.checker
+        logger.info(f"リポジトリ '{repo_name}' の準拠チェック開始...")
+        
+        resources = FetchedResources()
+        primary, secondary = checker._split_resource_plan()
+        for key in primary:
+            resources[key] = await self._call(checker._fetch_or_error, repo_name, key)
+        
+        if not checker._primary_failed(resources):
+            values = await asyncio.gather(*(
+                self._call(checker._fetch_or_error, repo_name, key) for key in secondary
+            ))
+            resources.update(zip(secondary, values))
+        
+        # 評価は API を呼ばないためイベントループ上で行う（結果の順序は逐次実行時と同じ）
+        return checker._build_repository_compliance(repo_name, checker._evaluate_checks(resources))
+    
+    async def run(self, repo_names: Iterable[str],
+                  on_result: Callable[[RepositoryCompliance], None],
+                  on_error: Optional[Callable[[str, Exception], None]] = None) -> int:
+        """リポジトリを repositories_in_flight 件ずつ並行チェックし、完了順に on_result を呼ぶ"""
+        import asyncio
+        
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                            thread_name_prefix='compliance')
+        names = iter(repo_names)
+        in_flight: Dict[asyncio.Task, str] = {}
+        exhausted = False
+        completed = 0
+        
+        try:
+            while True:
+                # 一覧の取得はページ単位で先読みされているため、ここでの待ちは短い
+                while not exhausted and len(in_flight) < self.repositories_in_flight:
+                    repo_name = next(names, None)
+                    if repo_name is None:
+                        exhausted = True
+                        break
+                    in_flight[asyncio.ensure_future(self.check_repository(repo_name))] = repo_name
+                if not in_flight:
+                    break
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    repo_name = in_flight.pop(task)
+                    try:
+                        on_result(task.result())
+                        completed += 1
+                    except Exception as e:
+                        logger.error(f"チェックエラー ({repo_name}): {e}")
+                        if on_error:
+                            on_error(repo_name, e)
+        finally:
+            for task in in_flight:
+                task.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        
+        return completed
+
+# 準拠状態データベースのデフォルトパス
+DEFAULT_STATE_DB_PATH = './data/compliance-state.db'
+
+# 組織レベルのチェック結果を保持するスコープ名（リポジトリ名には使えない文字を含む）
+ORGANIZATION_SCOPE = '@organization'
+
+# 評価履歴の保持日数
+DEFAULT_HISTORY_RETENTION_DAYS = 180
+
+# 状態変化の向き（悪化・改善）の判定に使う順位（SKIP は比較しない）
+STATUS_RANK = {'FAIL': 0, 'WARN': 1, 'PASS': 2}
+
+def _classify_transition(previous_status: Optional[str], status: Optional[str]) -> str:
+    """状態変化を regression / improvement / changed に分類
+    
+    チェック名は結果によって変わる（例: 保護設定がなければ branch_protection、
+    あれば設定項目ごとの名前）ため、前回なかったチェックの FAIL / WARN は悪化、
+    PASS は改善とし、前回の FAIL / WARN がなくなった場合は改善とする。
+    """
+    if previous_status is None:
+        return {'FAIL': 'regression', 'WARN': 'regression', 'PASS': 'improvement'}.get(status, 'changed')
+    if status is None:
+        return 'improvement' if previous_status in ('FAIL', 'WARN') else 'changed'
+    if previous_status in STATUS_RANK and status in STATUS_RANK:
+        return 'regression' if STATUS_RANK[status] < STATUS_RANK[previous_status] else 'improvement'
+    return 'changed'
+
+class ComplianceStateStore:
+    """準拠チェック結果の現在状態と評価履歴（SQLite）
+    
+    スコープ（リポジトリ名または ORGANIZATION_SCOPE）ごとに、チェック名単位の
+    最新の評価結果とスコアを保持する。全件チェックで全スコープを、Webhook による
+    再評価では該当スコープを置き換える。
+    
+    run_id を指定して保存した評価は実行（compliance_runs）単位の履歴にも記録し、
+    チェック単位の状態変化（PASS→FAIL 等）を過去のレポートを読まずにクエリで求める。
+    """
+    
+    def __init__(self, db_path: str = DEFAULT_STATE_DB_PATH):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._init_tables()
+    
+    def _init_tables(self):
+        # position はスコープ内の出力順（チェック名の登録順・チェック内の順）
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS compliance_state (
+                scope TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                check_group TEXT NOT NULL,
+                check_name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                severity TEXT NOT NULL,
+                message TEXT NOT NULL,
+                details TEXT,
+                PRIMARY KEY (scope, position)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS compliance_scopes (
+                scope TEXT PRIMARY KEY,
+                overall_score REAL,
+                recommendations TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        
+        # 評価履歴: kind は scan（全件チェック）/ event（Webhook による再評価）、
+        # source は実行ジャーナルの実行 ID または Webhook の配信 ID
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS compliance_runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                source TEXT,
+                started_at TEXT NOT NULL
+            )
+        """)
+        # 実行で評価したチェックの結果（再評価では対象チェックの分のみ）
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS compliance_results (
+                run_id INTEGER NOT NULL REFERENCES compliance_runs (run_id) ON DELETE CASCADE,
+                scope TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                check_group TEXT NOT NULL,
+                check_name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                severity TEXT NOT NULL,
+                message TEXT NOT NULL,
+                details TEXT,
+                PRIMARY KEY (run_id, scope, position)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS compliance_score_history (
+                run_id INTEGER NOT NULL REFERENCES compliance_runs (run_id) ON DELETE CASCADE,
+                scope TEXT NOT NULL,
+                overall_score REAL NOT NULL,
+                PRIMARY KEY (run_id, scope)
+            ) WITHOUT ROWID
+        """)
+        # 直前の評価・スコアの参照（リポジトリ・チェック単位）とチェック単位の横断集計用
+        for ddl in (
+            "CREATE INDEX IF NOT EXISTS idx_results_scope_group "
+            "ON compliance_results (scope, check_group, run_id)",
+            "CREATE INDEX IF NOT EXISTS idx_results_scope_check "
+            "ON compliance_results (scope, check_name, run_id)",
+            "CREATE INDEX IF NOT EXISTS idx_results_check "
+            "ON compliance_results (check_name, run_id)",
+            "CREATE INDEX IF NOT EXISTS idx_score_history_scope "
+            "ON compliance_score_history (scope, run_id)",
+            "CREATE INDEX IF NOT EXISTS idx_runs_started_at ON compliance_runs (started_at)",
+        ):
+            self._conn.execute(ddl)
+        self._conn.commit()
+    
+    def close(self):
+        self._conn.close()
+    
+    def load(self, scope: str) -> Dict[str, List[ComplianceResult]]:
+        """スコープの結果（チェック名ごと、保存時の順序）"""
+        results: Dict[str, List[ComplianceResult]] = {}
+        cursor = self._conn.execute(
+            "SELECT check_group, check_name, status, severity, message, details "
+            "FROM compliance_state WHERE scope = ? ORDER BY position", (scope,)
+        )
+        for group, check_name, status, severity, message, details in cursor:
+            results.setdefault(group, []).append(ComplianceResult(
+                check_name, status, message, severity,
+                json.loads(details) if details is not None else None
+            ))
+        return results
+    
+    def score(self, scope: str) -> Optional[float]:
+        row = self._conn.execute(
+            "SELECT overall_score FROM compliance_scopes WHERE scope = ?", (scope,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def begin_run(self, kind: str, source: Optional[str] = None) -> int:
+        """評価履歴の実行を開始し、run_id を返す"""
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO compliance_runs (kind, source, started_at) VALUES (?, ?, ?)",
+                (kind, source, datetime.now().isoformat())
+            )
+        return cursor.lastrowid
+    
+    @staticmethod
+    def _result_rows(scope: str, results_by_check: Dict[str, List[ComplianceResult]]) -> List[Tuple]:
+        return [
+            (scope, position, group, result.check_name, result.status, result.severity,
+             result.message,
+             json.dumps(result.details, ensure_ascii=False) if result.details is not None else None)
+            for position, (group, result) in enumerate(
+                (group, result) for group, results in results_by_check.items() for result in results
+            )
+        ]
+    
+    def save(self, scope: str, results_by_check: Dict[str, List[ComplianceResult]],
+             overall_score: Optional[float] = None, recommendations: Optional[List[str]] = None,
+             run_id: Optional[int] = None, evaluated: Optional[Iterable[str]] = None):
+        """スコープの結果を置き換える
+        
+        run_id を指定した場合は evaluated のチェック（省略時は全チェック）の結果を
+        その実行の履歴として記録する。
+        """
+        rows = self._result_rows(scope, results_by_check)
+        with self._conn:
+            self._conn.execute("DELETE FROM compliance_state WHERE scope = ?", (scope,))
+            self._conn.executemany(
+                "INSERT INTO compliance_state (scope, position, check_group, check_name, status, "
+                "severity, message, details) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            if run_id is not None:
+                evaluated = set(results_by_check if evaluated is None else evaluated)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO compliance_results (run_id, scope, position, check_group, "
+                    "check_name, status, severity, message, details) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, *row) for row in rows if row[2] in evaluated]
+                )
+                if overall_score is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO compliance_score_history (run_id, scope, overall_score) "
+                        "VALUES (?, ?, ?)", (run_id, scope, overall_score)
+                    )
+            self._conn.execute(
+                "INSERT INTO compliance_scopes (scope, overall_score, recommendations, updated_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (scope) DO UPDATE SET "
+                "overall_score = excluded.overall_score, "
+                "recommendations = excluded.recommendations, updated_at = excluded.updated_at",
+                (scope, overall_score,
+                 json.dumps(recommendations, ensure_ascii=False) if recommendations is not None else None,
+                 datetime.now().isoformat())
+            )
+    
+    def save_repository(self, compliance: RepositoryCompliance, run_id: Optional[int] = None,
+                        evaluated: Optional[Iterable[str]] = None):
+        self.save(compliance.repository, compliance.results_by_check,
+                  compliance.overall_score, compliance.recommendations, run_id, evaluated)
+    
+    def delete(self, scope: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM compliance_state WHERE scope = ?", (scope,))
+            self._conn.execute("DELETE FROM compliance_scopes WHERE scope = ?", (scope,))
+    
+    def rename(self, old_scope: str, new_scope: str):
+        """リポジトリ名の変更に合わせてスコープ名を変更"""
+        with self._conn:
+            for table in ('compliance_state', 'compliance_scopes'):
+                self._conn.execute(f"DELETE FROM {table} WHERE scope = ?", (new_scope,))
+                self._conn.execute(f"UPDATE {table} SET scope = ? WHERE scope = ?",
+                                   (new_scope, old_scope))
+            # 履歴も引き継ぎ、変更前後の結果を同じリポジトリとして比較できるようにする
+            for table in ('compliance_results', 'compliance_score_history'):
+                self._conn.execute(f"UPDATE OR REPLACE {table} SET scope = ? WHERE scope = ?",
+                                   (new_scope, old_scope))
+    
+    def prune_repositories(self, keep: Iterable[str]) -> int:
+        """keep に含まれないリポジトリの状態を削除（削除・移管されたリポジトリ）"""
+        keep = set(keep) | {ORGANIZATION_SCOPE}
+        stale = [scope for (scope,) in self._conn.execute("SELECT scope FROM compliance_scopes")
+                 if scope not in keep]
+        for scope in stale:
+            self.delete(scope)
+        return len(stale)
+    
+    def iter_repository_results(self) -> Iterator[Dict[str, Any]]:
+        """保存済みのリポジトリごとの結果（レポートの repositories の要素と同じ形式、名前順）"""
+        cursor = self._conn.execute(
+            "SELECT s.scope, s.overall_score, s.recommendations, s.updated_at, "
+            "r.check_name, r.status, r.severity, r.message, r.details "
+            "FROM compliance_scopes s LEFT JOIN compliance_state r ON r.scope = s.scope "
+            "WHERE s.scope != ? ORDER BY s.scope, r.position", (ORGANIZATION_SCOPE,)
+        )
+        current = None
+        for scope, score, recommendations, updated_at, check_name, status, severity, message, details in cursor:
+            if current is None or current['repository'] != scope:
+                if current is not None:
+                    yield current
+                current = {
+                    'repository': scope,
+                    'overall_score': score,
+                    'checks': [],
+                    'recommendations': json.loads(recommendations) if recommendations else [],
+                    'timestamp': updated_at
+                }
+            if check_name is not None:
+                current['checks'].append(asdict(ComplianceResult(
+                    check_name, status, message, severity,
+                    json.loads(details) if details is not None else None
+                )))
+        if current is not None:
+            yield current
+    
+    def summary(self) -> Dict[str, Any]:
+        """リポジトリ数と平均スコア"""
+        count, average = self._conn.execute(
+            "SELECT COUNT(*), AVG(overall_score) FROM compliance_scopes WHERE scope != ?",
+            (ORGANIZATION_SCOPE,)
+        ).fetchone()
+        return {'repositories': count, 'average_score': round(average or 0.0, 1)}
+    
+    def prune_history(self, retention_days: int = DEFAULT_HISTORY_RETENTION_DAYS) -> int:
+        """保持期間を過ぎた実行の履歴を削除（0 で無効）"""
+        if not retention_days:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+        with self._conn:
+            return self._conn.execute(
+                "DELETE FROM compliance_runs WHERE started_at < ?", (cutoff,)
+            ).rowcount
+    
+    def first_run_since(self, since: datetime) -> Optional[int]:
+        """since 以降に開始した最初の実行"""
+        return self._conn.execute(
+            "SELECT MIN(run_id) FROM compliance_runs WHERE started_at >= ?", (since.isoformat(),)
+        ).fetchone()[0]
+    
+    def transitions(self, since_run_id: int, until_run_id: Optional[int] = None,
+                    include_new: bool = False) -> List[Dict[str, Any]]:
+        """since_run_id〜until_run_id の実行で状態が変わったチェック
+        
+        実行で評価した (スコープ, チェック名) ごとに、同じチェックを最後に評価した
+        過去の実行をインデックスで 1 件だけ参照し、チェック名単位で結果を突き合わせる
+        （前回だけにある結果は status が None）。include_new=False の場合、初めて
+        評価されたチェックは含めない。
+        """
+        cursor = self._conn.execute("""
+            WITH pairs AS (
+                SELECT e.run_id, e.scope, e.check_group,
+                       (SELECT MAX(p.run_id) FROM compliance_results p
+                         WHERE p.scope = e.scope AND p.check_group = e.check_group
+                           AND p.run_id < e.run_id) AS previous_run_id
+                  FROM (SELECT DISTINCT run_id, scope, check_group FROM compliance_results
+                         WHERE run_id BETWEEN ? AND ?) e
+            )
+            SELECT pairs.run_id, pairs.scope, pairs.check_group, pairs.previous_run_id,
+                   cur.position, cur.check_name, cur.severity, cur.message,
+                   prev.status, cur.status
+              FROM pairs
+              JOIN compliance_results cur
+                ON cur.run_id = pairs.run_id AND cur.scope = pairs.scope
+               AND cur.check_group = pairs.check_group
+              LEFT JOIN compliance_results prev
+                ON prev.run_id = pairs.previous_run_id AND prev.scope = pairs.scope
+               AND prev.check_group = pairs.check_group AND prev.check_name = cur.check_name
+            UNION ALL
+            SELECT pairs.run_id, pairs.scope, pairs.check_group, pairs.previous_run_id,
+                   NULL, prev.check_name, prev.severity, prev.message,
+                   prev.status, NULL
+              FROM pairs
+              JOIN compliance_results prev
+                ON prev.run_id = pairs.previous_run_id AND prev.scope = pairs.scope
+               AND prev.check_group = pairs.check_group
+             WHERE NOT EXISTS (
+                   SELECT 1 FROM compliance_results cur
+                    WHERE cur.run_id = pairs.run_id AND cur.scope = pairs.scope
+                      AND cur.check_group = pairs.check_group AND cur.check_name = prev.check_name)
+        """, (since_run_id, until_run_id if until_run_id is not None else sys.maxsize))
+        
+        runs = {
+            run_id: (kind, started_at) for run_id, kind, started_at in self._conn.execute(
+                "SELECT run_id, kind, started_at FROM compliance_runs WHERE run_id >= ?",
+                (since_run_id,)
+            )
+        }
+        # (実行, スコープ, 出力順) の順に並べる（前回だけにある結果はスコープの先頭）
+        ordered = []
+        for (run_id, scope, group, previous_run_id, position, check_name, severity, message,
+             previous_status, status) in cursor:
+            if previous_status == status:
+                continue
+            if previous_run_id is None:
+                if not include_new:
+                    continue
+                change = 'new'
+            else:
+                change = _classify_transition(previous_status, status)
+            kind, started_at = runs[run_id]
+            ordered.append(((run_id, scope, -1 if position is None else position), {
+                'run_id': run_id,
+                'kind': kind,
+                'evaluated_at': started_at,
+                'repository': scope,
+                'check_group': group,
+                'check_name': check_name,
+                'severity': severity,
+                'previous_status': previous_status,
+                'status': status,
+                'change': change,
+                'message': message
+            }))
+        ordered.sort(key=lambda item: item[0])
+        return [transition for _, transition in ordered]
+    
+    def score_changes(self, since_run_id: int) -> List[Dict[str, Any]]:
+        """since_run_id より前の最新スコアと現在のスコアの差"""
+        cursor = self._conn.execute("""
+            SELECT s.scope, s.overall_score,
+                   (SELECT h.overall_score FROM compliance_score_history h
+                     WHERE h.scope = s.scope AND h.run_id < ?
+                     ORDER BY h.run_id DESC LIMIT 1) AS previous_score
+              FROM compliance_scopes s
+             WHERE s.scope != ? AND EXISTS (
+                   SELECT 1 FROM compliance_score_history h
+                    WHERE h.scope = s.scope AND h.run_id >= ?)
+        """, (since_run_id, ORGANIZATION_SCOPE, since_run_id))
+        return sorted((
+            {'repository': scope, 'previous_score': previous_score, 'overall_score': score,
+             'delta': score - previous_score if previous_score is not None else None}
+            for scope, score, previous_score in cursor
+            if previous_score is None or abs(score - previous_score) > 1e-9
+        ), key=lambda change: (change['delta'] is None, change['delta'] or 0.0))
+
+class ComplianceEventEvaluator:
+    """設定変更の Webhook イベントで影響を受けるチェックだけを再評価する
+    
+    イベントの対象リポジトリについて EVENT_CHECKS のチェックのみを、そのチェックが
+    必要とするリソースだけを取得して評価し、保存済みの他のチェック結果と合わせて
+    スコアを再計算する。状態が未保存のリポジトリは有効な全チェックを評価する。
+    再評価は GitHub 上の現在の状態を取得し直すため、同じ配信を重複して処理しても
+    結果は変わらない。
+    """
+    
+    EVENTS = ('branch_protection_rule', 'repository', 'push', 'team')
+    # イベント種別ごとに再評価するリポジトリチェック（push はデフォルトブランチのみ）
+    EVENT_CHECKS = {
+        'branch_protection_rule': ['branch_protection'],
+        'repository': ['repository_settings', 'naming_convention'],
+        'push': ['required_files', 'commit_convention'],
+    }
+    # 全チェックを評価する repository イベントのアクション（組織に加わったリポジトリ）
+    FULL_CHECK_ACTIONS = ('created', 'transferred')
+    # 必須チームのチェックに影響する team イベントのアクション
+    TEAM_ACTIONS = ('created', 'deleted', 'edited')
+    
+    def __init__(self, checker: GitHubComplianceChecker, store: ComplianceStateStore):
+        self.checker = checker
+        self.store = store
+    
+    def handlers(self) -> Dict[str, Callable[[str, str, Dict], Dict]]:
+        """イベント種別ごとの処理（WebhookServer に渡す）"""
+        return {event: self.handle for event in self.EVENTS}
+    
+    def handle(self, event: str, delivery_id: str, payload: Dict) -> Dict[str, Any]:
+        """1 件の配信を処理し、レスポンスの metadata を返す"""
+        repository = payload.get('repository') or {}
+        owner = ((payload.get('organization') or {}).get('login')
+                 or (repository.get('owner') or {}).get('login', ''))
+        action = payload.get('action', event)
+        metadata = {
+            'repository': repository.get('full_name'),
+            'sender': (payload.get('sender') or {}).get('login'),
+            'action': action
+        }
+        if owner.lower() != self.checker.org.lower():
+            return {**metadata, 'evaluated': False, 'reason': 'other_organization'}
+        
+        if event == 'team':
+            return {**metadata, **self._on_team(action, delivery_id)}
+        repo_name = repository.get('name')
+        if not repo_name:
+            return {**metadata, 'evaluated': False, 'reason': 'no_repository'}
+        
+        if event == 'repository':
+            if action == 'deleted':
+                self.store.delete(repo_name)
+                logger.info(f"準拠状態を削除: {repo_name}")
+                return {**metadata, 'evaluated': False, 'reason': 'deleted'}
+            if action == 'renamed':
+                changes = (payload.get('changes') or {}).get('repository') or {}
+                old_name = (changes.get('name') or {}).get('from')
+                if old_name:
+                    self.store.rename(old_name, repo_name)
+            if action in self.FULL_CHECK_ACTIONS:
+                return {**metadata, **self.reevaluate(repo_name, None, delivery_id)}
         
-        {repo_sections}
-    </body>
-    </html>
+        names = self._push_checks(payload) if event == 'push' else self.EVENT_CHECKS[event]
+        if not names:
+            return {**metadata, 'evaluated': False, 'reason': 'no_affected_checks'}
+        return {**metadata, **self.reevaluate(repo_name, names, delivery_id)}
+    
+    def _push_checks(self, payload: Dict) -> List[str]:
+        """push の影響を受けるチェック（デフォルトブランチ以外は対象外）"""
+        repository = payload.get('repository') or {}
+        if payload.get('deleted') or payload.get('ref') != f"refs/heads/{repository.get('default_branch')}":
+            return []
+        
+        names = ['commit_convention']
+        # 必須ファイルの追加・削除を含む場合のみ再確認（force push・コミット一覧なしは常に確認）
+        commits = payload.get('commits') or []
+        touched = {
+            path for commit in commits
+            for path in (commit.get('added') or []) + (commit.get('removed') or [])
+        }
+        required_files = set(self.checker.rules['repository']['required_files'])
+        if payload.get('forced') or not commits or touched & required_files:
+            names.insert(0, 'required_files')
+        return names
+    
+    def reevaluate(self, repo_name: str, names: Optional[List[str]],
+                   delivery_id: Optional[str] = None) -> Dict[str, Any]:
+        """names のチェック（None は全チェック）を再評価して状態・履歴を更新"""
+        checker = self.checker
+        stored = self.store.load(repo_name)
+        if names is None or not stored or ACCESS_CHECK in stored:
+            checks = checker.checks
+        else:
+            # 保存済みの結果がないチェック（後から有効化されたもの）も合わせて評価する
+            checks = [check for check in checker.checks
+                      if check.name in names or check.name not in stored]
+        if not checks:
+            return {'evaluated': False, 'reason': 'no_affected_checks'}
+        
+        results = checker.evaluate_repository_checks(repo_name, checks)
+        evaluated_groups = list(results)
+        if ACCESS_CHECK not in results:
+            # 再評価しなかったチェックは保存済みの結果を使う（無効化されたチェックは除く）
+            results = {
+                check.name: results[check.name] if check.name in results else stored[check.name]
+                for check in checker.checks if check.name in results or check.name in stored
+            }
+        previous_score = self.store.score(repo_name)
+        compliance = checker._build_repository_compliance(repo_name, results)
+        run_id = self.store.begin_run('event', delivery_id)
+        self.store.save_repository(compliance, run_id, evaluated_groups)
+        transitions = self.store.transitions(run_id, run_id)
+        
+        evaluated = [check.name for check in checks]
+        previous = f"{previous_score:.1f}%" if previous_score is not None else '-'
+        logger.info(f"再評価: {repo_name} {', '.join(evaluated)} "
+                    f"(スコア: {previous} -> {compliance.overall_score:.1f}%)")
+        for transition in transitions:
+            logger.info(f"状態変化: {repo_name} {transition['check_name']} "
+                        f"{transition['previous_status'] or '-'} -> {transition['status'] or '-'}")
+        return {
+            'evaluated': True,
+            'checks': evaluated,
+            'overall_score': compliance.overall_score,
+            'previous_score': previous_score,
+            'transitions': [
+                {key: transition[key] for key in ('check_name', 'previous_status', 'status')}
+                for transition in transitions
+            ]
+        }
+    
+    def _on_team(self, action: str, delivery_id: Optional[str] = None) -> Dict[str, Any]:
+        """必須チームのチェックを再評価"""
+        if action not in self.TEAM_ACTIONS:
+            return {'evaluated': False, 'reason': 'no_affected_checks'}
+        stored = self.store.load(ORGANIZATION_SCOPE)
+        if 'required_teams' in stored:
+            stored['required_teams'] = self.checker._check_required_teams()
+            evaluated = ['required_teams']
+        else:
+            stored = self.checker.evaluate_organization_checks()
+            evaluated = list(stored)
+        self.store.save(ORGANIZATION_SCOPE, stored,
+                        run_id=self.store.begin_run('event', delivery_id), evaluated=evaluated)
+        logger.info(f"再評価: 組織 {self.checker.org} required_teams")
+        return {'evaluated': True, 'checks': ['required_teams']}
+
+# HTML レポートの固定部分（CSS の波括弧を含むため str.format は使わない）
+HTML_REPORT_HEAD = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>GitHub ガイドライン準拠レポート</title>
+    <style>
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 20px; display: flex; flex-direction: column; }
+        .header { background: #f8f9fa; padding: 20px; border-radius: 8px; margin-bottom: 20px; order: -2; }
+        .summary { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 20px; order: -1; }
+        .metric { background: white; padding: 15px; border-radius: 8px; border-left: 4px solid #007bff; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        .metric-value { font-size: 2em; font-weight: bold; color: #007bff; }
+        .metric-label { color: #6c757d; font-size: 0.9em; }
+        .repository { margin: 20px 0; padding: 20px; border: 1px solid #dee2e6; border-radius: 8px; }
+        .score { font-size: 1.5em; font-weight: bold; }
+        .score.high { color: #28a745; }
+        .score.medium { color: #ffc107; }
+        .score.low { color: #dc3545; }
+        .check { margin: 10px 0; padding: 10px; border-radius: 4px; }
+        .check.pass { background: #d4edda; border-left: 4px solid #28a745; }
+        .check.warn { background: #fff3cd; border-left: 4px solid #ffc107; }
+        .check.fail { background: #f8d7da; border-left: 4px solid #dc3545; }
+        .check.skip { background: #e2e3e5; border-left: 4px solid #6c757d; }
+        .recommendations { background: #e7f3ff; padding: 15px; border-radius: 8px; margin-top: 15px; }
+        .recommendations ul { margin: 0; padding-left: 20px; }
+    </style>
+</head>
+<body>
+"""
+
+HTML_REPORT_TAIL = """</body>
+</html>
+"""
+
+class HtmlReportWriter:
+    """HTML レポートの逐次書き込み
+    
+    リポジトリごとのセクションをチェック完了時点で書き出す。サマリーは全件の
+    集計後に末尾へ出力し、CSS（order）でページ上部に表示する。
     """
     
-    # リポジトリセクション生成
-    repo_sections = ""
-    for repo_result in results['repositories']:
+    def __init__(self, output_path, org: str, timestamp: str):
+        self.output_path = output_path
+        self.org = org
+        self.timestamp = timestamp
+        self.total_repos = 0
+        self.score_total = 0.0
+        self.high_score_repos = 0
+        self.low_score_repos = 0
+        self._file = None
+    
+    def __enter__(self) -> 'HtmlReportWriter':
+        self._file = open(self.output_path, 'w', encoding='utf-8')
+        self._file.write(HTML_REPORT_HEAD)
+        self._file.write(f"""    <div class="header">
+        <h1>GitHub ガイドライン準拠レポート</h1>
+        <p><strong>組織:</strong> {escape(self.org)}</p>
+        <p><strong>生成日時:</strong> {escape(self.timestamp)}</p>
+    </div>
+""")
+        self._file.flush()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        avg_score = self.score_total / self.total_repos if self.total_repos else 0
+        self._file.write(f"""    <div class="summary">
+        <div class="metric">
+            <div class="metric-value">{self.total_repos}</div>
+            <div class="metric-label">総リポジトリ数</div>
+        </div>
+        <div class="metric">
+            <div class="metric-value">{avg_score:.1f}%</div>
+            <div class="metric-label">平均準拠スコア</div>
+        </div>
+        <div class="metric">
+            <div class="metric-value">{self.high_score_repos}</div>
+            <div class="metric-label">高スコアリポジトリ (80%+)</div>
+        </div>
+        <div class="metric">
+            <div class="metric-value">{self.low_score_repos}</div>
+            <div class="metric-label">要改善リポジトリ (60%未満)</div>
+        </div>
+    </div>
+""")
+        self._file.write(HTML_REPORT_TAIL)
+        self._file.close()
+    
+    def write_repository(self, repo_result: Dict):
+        """リポジトリセクションを 1 件書き込む"""
         score = repo_result['overall_score']
         score_class = 'high' if score >= 80 else 'medium' if score >= 60 else 'low'
         
-        checks_html = ""
+        self.total_repos += 1
+        self.score_total += score
+        if score >= 80:
+            self.high_score_repos += 1
+        elif score < 60:
+            self.low_score_repos += 1
+        
+        parts = [f"""    <div class="repository">
+        <h3>{escape(repo_result['repository'])}</h3>
+        <div class="score {score_class}">準拠スコア: {score:.1f}%</div>
+"""]
         for check in repo_result['checks']:
-            checks_html += f"""
-                <div class="check {check['status'].lower()}">
-                    <strong>{check['check_name']}</strong> ({check['severity']})
-                    <br>{check['message']}
-                </div>
-            """
-        
-        recommendations_html = ""
+            parts.append(f"""        <div class="check {escape(check['status'].lower())}">
+            <strong>{escape(check['check_name'])}</strong> ({escape(check['severity'])})
+            <br>{escape(check['message'])}
+        </div>
+""")
         if repo_result['recommendations']:
-            recommendations_html = f"""
-                <div class="recommendations">
-                    <h4>推奨事項</h4>
-                    <ul>
-                        {''.join(f'<li>{rec}</li>' for rec in repo_result['recommendations'])}
-                    </ul>
-                </div>
-            """
-        
-        repo_sections += f"""
-            <div class="repository">
-                <h3>{repo_result['repository']}</h3>
-                <div class="score {score_class}">準拠スコア: {score:.1f}%</div>
-                {checks_html}
-                {recommendations_html}
-            </div>
-        """
+            parts.append("""        <div class="recommendations">
+            <h4>推奨事項</h4>
+            <ul>
+""")
+            parts.extend(f"                <li>{escape(rec)}</li>\n" for rec in repo_result['recommendations'])
+            parts.append("""            </ul>
+        </div>
+""")
+        parts.append("    </div>\n")
+        self._file.writelines(parts)
+        self._file.flush()
+
+def generate_html_report(results: Dict, output_path: str):
+    """HTML形式のレポート生成"""
+    with HtmlReportWriter(output_path, results['organization'], results['timestamp']) as writer:
+        for repo_result in results['repositories']:
+            writer.write_repository(repo_result)
+
+@dataclass
+class ScoreSummary:
+    """サマリー用の集計（結果本体は保持しない）"""
+    total_repos: int = 0
+    score_total: float = 0.0
+    high_score_repos: int = 0
+    low_score_repos: int = 0
     
-    # 統計計算
-    scores = [r['overall_score'] for r in results['repositories']]
-    avg_score = sum(scores) / len(scores) if scores else 0
-    high_score_repos = len([s for s in scores if s >= 80])
-    low_score_repos = len([s for s in scores if s < 60])
-    
-    html_content = html_template.format(
-        org=results['organization'],
-        timestamp=results['timestamp'],
-        total_repos=len(results['repositories']),
-        avg_score=avg_score,
-        high_score_repos=high_score_repos,
-        low_score_repos=low_score_repos,
-        repo_sections=repo_sections
-    )
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    def add(self, score: float):
+        self.total_repos += 1
+        self.score_total += score
+        if score >= 80:
+            self.high_score_repos += 1
+        elif score < 60:
+            self.low_score_repos += 1
+    
+    def print(self, org: str):
+        avg_score = self.score_total / self.total_repos if self.total_repos else 0
+        
+        print("\n=== 準拠チェック結果サマリー ===")
+        print(f"組織: {org}")
+        print(f"チェック対象リポジトリ: {self.total_repos}")
+        print(f"平均準拠スコア: {avg_score:.1f}%")
+        print(f"高スコア(80%+): {self.high_score_repos}リポジトリ")
+        print(f"要改善(60%未満): {self.low_score_repos}リポジトリ")
+
+def open_report_writers(stack: ExitStack, args, output_dir: Path,
+                        header: Dict) -> List[Callable[[Dict], None]]:
+    """--format のレポートを開いてヘッダーを書き出し、リポジトリ結果の書き出し関数を返す"""
+    file_timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    writers = []
+    if args.format in ['json', 'both']:
+        json_file = output_dir / f'compliance-report-{file_timestamp}.json'
+        json_writer = stack.enter_context(JsonReportWriter(json_file))
+        json_writer.write_fields(header)
+        json_writer.begin_array('repositories')
+        writers.append(json_writer.write_item)
+        logger.info(f"JSONレポート出力先: {json_file}")
+    if args.format == 'jsonl':
+        jsonl_file = output_dir / f'compliance-report-{file_timestamp}.jsonl'
+        jsonl_writer = stack.enter_context(JsonLinesWriter(jsonl_file))
+        jsonl_writer.write(header)
+        writers.append(jsonl_writer.write)
+        logger.info(f"JSON Lines レポート出力先: {jsonl_file}")
+    if args.format in ['html', 'both']:
+        html_file = output_dir / f'compliance-report-{file_timestamp}.html'
+        html_writer = stack.enter_context(
+            HtmlReportWriter(html_file, args.org, header['timestamp'])
+        )
+        writers.append(html_writer.write_repository)
+        logger.info(f"HTMLレポート出力先: {html_file}")
+    return writers
+
+def check_repositories(args, checker: GitHubComplianceChecker, repo_names: Iterable[str],
+                       on_result: Callable[[RepositoryCompliance], None],
+                       on_error: Optional[Callable[[str, Exception], None]] = None):
+    """--graphql / --async の指定に応じた方式でリポジトリをチェックする"""
+    if args.graphql:
+        for result in checker.check_repositories_compliance(repo_names, on_error):
+            on_result(result)
+    elif args.use_async:
+        import asyncio
+        
+        engine = AsyncComplianceEngine(checker, args.concurrency, args.repos_in_flight)
+        asyncio.run(engine.run(repo_names, on_result, on_error=on_error))
+    else:
+        for repo_name in repo_names:
+            try:
+                on_result(checker.check_repository_compliance(repo_name))
+            except Exception as e:
+                logger.error(f"チェックエラー ({repo_name}): {e}")
+                if on_error:
+                    on_error(repo_name, e)
+                continue
+
+def parse_since(value: str) -> datetime:
+    """--delta-since の値（24h / 7d 形式の相対指定、または ISO 8601 日時）"""
+    match = re.fullmatch(r'(\d+)([hd])', value)
+    if match:
+        amount = int(match.group(1))
+        return datetime.now() - (timedelta(hours=amount) if match.group(2) == 'h' else timedelta(days=amount))
+    return datetime.fromisoformat(value)
+
+def print_transitions(transitions: List[Dict[str, Any]], limit: int = 20):
+    """状態変化の件数と、悪化したチェックの一覧を表示"""
+    counts: Dict[str, int] = {}
+    for transition in transitions:
+        counts[transition['change']] = counts.get(transition['change'], 0) + 1
+    print(f"悪化: {counts.get('regression', 0)}件 / 改善: {counts.get('improvement', 0)}件 / "
+          f"その他: {counts.get('changed', 0) + counts.get('new', 0)}件")
+    regressions = [t for t in transitions if t['change'] == 'regression']
+    for transition in regressions[:limit]:
+        print(f"  {transition['repository']} {transition['check_name']}: "
+              f"{transition['previous_status'] or '-'} -> {transition['status'] or '-'} "
+              f"({transition['severity']})")
+    if len(regressions) > limit:
+        print(f"  ... ほか {len(regressions) - limit} 件")
+
+def run_delta_report(args, store: ComplianceStateStore, output_dir: Path):
+    """--delta-since モード（保存済みの評価履歴から差分レポートを出力）"""
+    since = parse_since(args.delta_since)
+    since_run_id = store.first_run_since(since)
+    transitions = store.transitions(since_run_id) if since_run_id is not None else []
+    score_changes = store.score_changes(since_run_id) if since_run_id is not None else []
+    
+    delta_file = output_dir / f"compliance-delta-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with JsonReportWriter(delta_file) as writer:
+        writer.write_fields({
+            'organization': args.org,
+            'since': since.isoformat(),
+            'generated_at': datetime.now().isoformat(),
+            'score_changes': score_changes
+        })
+        writer.begin_array('transitions')
+        writer.write_items(transitions)
+    
+    print(f"\n=== 準拠状態の変化（{since.isoformat(timespec='minutes')} 以降） ===")
+    print_transitions(transitions)
+    new_repos = sum(1 for change in score_changes if change['previous_score'] is None)
+    print(f"スコアが変化したリポジトリ: {len(score_changes) - new_repos} (新規: {new_repos})")
+    logger.info(f"差分レポート出力先: {delta_file}")
+
+def run_webhook(args, checker: GitHubComplianceChecker, store: ComplianceStateStore):
+    """--webhook モード（設定変更イベントによる再評価）"""
+    evaluator = ComplianceEventEvaluator(checker, store)
+    server = WebhookServer((args.host, args.port), args.webhook_secret, evaluator.handlers(),
+                           path=args.webhook_path, record_path=args.record)
+    logger.info(f"Webhook 受信開始: http://{args.host}:{args.port}{args.webhook_path} "
+                f"(イベント: {', '.join(ComplianceEventEvaluator.EVENTS)})")
+    logger.info(f"準拠状態: {store.summary()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Webhook 受信を停止します")
+    finally:
+        server.server_close()
+        logger.info(f"Webhook 処理件数: {server.stats()}")
+        logger.info(f"準拠状態: {store.summary()}")
+
+def write_state_report(args, store: ComplianceStateStore, output_dir: Path):
+    """保存済みの準拠状態からレポートを出力する（--daemon のレポート生成）"""
+    header = {
+        'organization': args.org,
+        'timestamp': datetime.now().isoformat(),
+        'organization_checks': [
+            asdict(check) for check in flatten_results(store.load(ORGANIZATION_SCOPE))
+        ]
+    }
+    summary = ScoreSummary()
+    with ExitStack() as stack:
+        writers = open_report_writers(stack, args, output_dir, header)
+        for repo_result in store.iter_repository_results():
+            for write in writers:
+                write(repo_result)
+            summary.add(repo_result['overall_score'])
+    summary.print(args.org)
+
+def run_daemon(args, checker: GitHubComplianceChecker, store: ComplianceStateStore,
+               output_dir: Path):
+    """--daemon モード（準拠チェックとレポート生成を別々の間隔で繰り返す）
+    
+    HTTP 接続プール・レスポンスキャッシュ・rate limit の状態・ルール設定・準拠状態の
+    データベース接続は実行間で使い回す。チェック結果は準拠状態と評価履歴に保存し、
+    レポートは保存済みの準拠状態から生成する。リポジトリは直近に push されたものから
+    順にチェックする。
+    """
+    def scan():
+        store.prune_history(args.history_retention_days)
+        history_run_id = store.begin_run('scan', 'daemon')
+        store.save(ORGANIZATION_SCOPE, checker.evaluate_organization_checks(), run_id=history_run_id)
+        
+        if args.repos:
+            repo_names = list(args.repos)
+        else:
+            repo_names = [repo['name'] for repo in order_by_recent_push(checker.iter_repositories())]
+        checked = 0
+        
+        def record(result: RepositoryCompliance):
+            nonlocal checked
+            store.save_repository(result, history_run_id)
+            checked += 1
+        
+        check_repositories(args, checker, repo_names, record)
+        if not args.repos:
+            pruned = store.prune_repositories(repo_names)
+            if pruned:
+                logger.info(f"準拠状態から {pruned} リポジトリを削除しました")
+        logger.info(f"準拠チェック完了: {checked}/{len(repo_names)} リポジトリ "
+                    f"(準拠状態: {store.summary()})")
+        
+        print("\n=== 前回からの変化 ===")
+        print_transitions(store.transitions(history_run_id, history_run_id))
+    
+    scheduler = Scheduler()
+    scheduler.add('scan', args.scan_interval * 60, scan)
+    scheduler.add('report', args.report_interval * 60,
+                  lambda: write_state_report(args, store, output_dir))
+    scheduler.install_signal_handlers()
+    control = None
+    if args.control_port:
+        control = ControlServer((args.control_host, args.control_port), scheduler)
+        control.start()
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        logger.info("処理が中断されました")
+    finally:
+        if control is not None:
+            control.shutdown()
+            control.server_close()
+        if checker.cache:
+            logger.info(f"レスポンスキャッシュ: {checker.cache.summary()}")
+        logger.info(f"API rate limit: {checker.rate_limiter.summary()}")
 
 def main():
     """メイン処理"""
@@ -763,11 +2010,92 @@ def main():
     parser.add_argument('--config', default='./config/compliance-rules.yml', 
                        help='準拠ルール設定ファイル')
     parser.add_argument('--output', default='./reports', help='出力ディレクトリ')
-    parser.add_argument('--format', choices=['json', 'html', 'both'], 
-                       default='both', help='出力形式')
+    parser.add_argument('--format', choices=['json', 'jsonl', 'html', 'both'], 
+                       default='both',
+                       help='出力形式（jsonl: 1 行目に組織情報、以降 1 行 1 リポジトリ）')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                       help='HTTP 接続プールサイズ')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='レスポンスキャッシュ（条件付きリクエスト）を使用しない')
+    parser.add_argument('--graphql', action='store_true',
+                       help='GraphQL API で複数リポジトリをまとめてチェックする')
+    parser.add_argument('--batch-size', type=int, default=25,
+                       help='GraphQL モードで 1 クエリにまとめるリポジトリ数')
+    parser.add_argument('--fetch-workers', type=int, default=8,
+                       help='1 リポジトリのリソースを並列取得するスレッド数')
+    parser.add_argument('--resume', metavar='RUN_ID',
+                       help='中断した実行を再開する（完了済みリポジトリの結果を引き継ぐ）')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                       help='asyncio エンジンでチェック・リポジトリを並行実行する')
+    parser.add_argument('--concurrency', type=int, default=16,
+                       help='--async 時の同時 API リクエスト数の上限')
+    parser.add_argument('--repos-in-flight', type=int, default=8,
+                       help='--async 時に同時にチェックするリポジトリ数')
+    parser.add_argument('--profile', metavar='PATH',
+                       help='エンドポイント別・チェック別の計測結果を書き出すファイル')
+    parser.add_argument('--profile-format', choices=PROFILE_FORMATS, default='json',
+                       help='--profile の形式（chrome: chrome://tracing / Perfetto 用トレース）')
+    parser.add_argument('--state-db', default=DEFAULT_STATE_DB_PATH,
+                       help='最新の準拠状態を保持するデータベース（全件チェック・--webhook で更新）')
+    parser.add_argument('--webhook', action='store_true',
+                       help='設定変更の Webhook を受信し、影響するチェックだけを再評価する')
+    parser.add_argument('--host', default='127.0.0.1', help='--webhook の待ち受けアドレス')
+    parser.add_argument('--port', type=int, default=8080, help='--webhook の待ち受けポート')
+    parser.add_argument('--webhook-path', default=DEFAULT_WEBHOOK_PATH, help='--webhook の受信パス')
+    parser.add_argument('--webhook-secret',
+                       help='Webhook シークレット (環境変数 GITHUB_WEBHOOK_SECRET を使用可能)')
+    parser.add_argument('--record', metavar='FILE',
+                       help='--webhook で検証済みの配信を JSON Lines で追記する')
+    parser.add_argument('--delta-since', metavar='SINCE',
+                       help='チェックを行わず、指定時点以降の状態変化（PASS→FAIL 等）の差分レポートを'
+                            '出力する（24h / 7d 形式、または ISO 8601 日時）')
+    parser.add_argument('--history-retention-days', type=int, default=DEFAULT_HISTORY_RETENTION_DAYS,
+                       help='評価履歴の保持日数（0 で無期限）')
+    parser.add_argument('--daemon', action='store_true',
+                       help='常駐して準拠チェックとレポート生成を定期実行する')
+    parser.add_argument('--scan-interval', type=float, default=360,
+                       help='--daemon 時の準拠チェック間隔（分）')
+    parser.add_argument('--report-interval', type=float, default=1440,
+                       help='--daemon 時のレポート生成間隔（分）')
+    parser.add_argument('--control-host', default='127.0.0.1',
+                       help='--daemon 時の制御エンドポイントの待ち受けアドレス')
+    parser.add_argument('--control-port', type=int, default=0,
+                       help='--daemon 時の制御エンドポイントのポート（GET /status, POST /refresh。0 で無効）')
     
     args = parser.parse_args()
     
+    if not 1 <= args.batch_size <= 100:
+        parser.error('--batch-size は 1〜100 の範囲で指定してください')
+    if args.use_async and args.graphql:
+        parser.error('--async と --graphql は同時に指定できません')
+    if args.concurrency < 1 or args.repos_in_flight < 1 or args.fetch_workers < 1:
+        parser.error('--concurrency / --repos-in-flight / --fetch-workers は 1 以上を指定してください')
+    if args.daemon and (args.webhook or args.resume or args.delta_since):
+        parser.error('--daemon は --webhook / --resume / --delta-since と同時に指定できません')
+    if args.scan_interval <= 0 or args.report_interval <= 0:
+        parser.error('--scan-interval / --report-interval は正の値を指定してください')
+    if args.delta_since:
+        try:
+            parse_since(args.delta_since)
+        except ValueError:
+            parser.error('--delta-since は 24h / 7d 形式、または ISO 8601 日時で指定してください')
+        output_dir = Path(args.output)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        store = ComplianceStateStore(args.state_db)
+        try:
+            run_delta_report(args, store, output_dir)
+        finally:
+            store.close()
+        return
+    if args.webhook:
+        if args.graphql or args.use_async or args.resume:
+            parser.error('--webhook は --graphql / --async / --resume と同時に指定できません')
+        args.webhook_secret = args.webhook_secret or os.getenv('GITHUB_WEBHOOK_SECRET')
+        if not args.webhook_secret:
+            logger.error("Webhook シークレットが必要です。--webhook-secret または "
+                         "GITHUB_WEBHOOK_SECRET 環境変数を設定してください。")
+            sys.exit(1)
+    
     # GitHub token 取得
     token = args.token or os.getenv('GITHUB_TOKEN')
     if not token:
@@ -779,80 +2107,145 @@ def main():
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # コンプライアンスチェッカー初期化
-    checker = GitHubComplianceChecker(token, args.org, args.config)
+    cache = None if args.no_cache else ResponseCache()
+    profiler = Profiler(trace=bool(args.profile) and args.profile_format == 'chrome')
+    if args.graphql:
+        checker = GraphQLComplianceChecker(token, args.org, args.config, batch_size=args.batch_size,
+                                           pool_size=args.pool_size, cache=cache,
+                                           fetch_workers=args.fetch_workers, profiler=profiler)
+    else:
+        pool_size = max(args.pool_size, args.concurrency) if args.use_async else args.pool_size
+        checker = GitHubComplianceChecker(token, args.org, args.config, pool_size, cache,
+                                          fetch_workers=args.fetch_workers, profiler=profiler)
+    store = ComplianceStateStore(args.state_db)
+    
+    if args.webhook or args.daemon:
+        try:
+            if args.daemon:
+                run_daemon(args, checker, store, output_dir)
+            else:
+                run_webhook(args, checker, store)
+        finally:
+            store.close()
+            if cache:
+                cache.close()
+            print("\n=== プロファイル ===")
+            print(profiler.format_summary())
+            if args.profile:
+                profiler.write(args.profile, args.profile_format)
+                logger.info(f"プロファイル出力: {args.profile} ({args.profile_format})")
+        return
+    
+    # 実行ジャーナル（リポジトリごとの結果を記録し、中断時に再開できるようにする）
+    try:
+        journal = RunJournal.open('guideline-compliance-checker', args.org, args.resume)
+    except ValueError as e:
+        parser.error(str(e))
+    logger.info(f"実行 ID: {journal.run_id}")
+    
+    # 評価履歴（状態変化の検出・差分レポート用）
+    store.prune_history(args.history_retention_days)
+    history_run_id = store.begin_run('scan', journal.run_id)
     
     try:
         # 組織レベルチェック
-        org_results = checker.check_organization_compliance()
+        org_results_by_check = checker.evaluate_organization_checks()
+        store.save(ORGANIZATION_SCOPE, org_results_by_check, run_id=history_run_id)
+        org_results = flatten_results(org_results_by_check)
         
         # リポジトリチェック
         if args.repos:
             repo_names = args.repos
         else:
-            # 全リポジトリ取得
-            repos_data = checker._make_request(f"orgs/{args.org}/repos")
-            repo_names = [repo['name'] for repo in repos_data]
+            # 全リポジトリ取得（ページが届き次第チェックを開始する）
+            repo_names = checker.iter_repository_names()
+        repo_names = journal.skip_done(repo_names)
         
-        logger.info(f"準拠チェック開始: {len(repo_names)} リポジトリ")
+        # 組織に存在するリポジトリ（チェックに失敗したものを含む。準拠状態の整理に使う）
+        listed_repos = set()
         
-        repo_results = []
-        for repo_name in repo_names:
-            try:
-                result = checker.check_repository_compliance(repo_name)
-                repo_results.append({
-                    'repository': result.repository,
-                    'overall_score': result.overall_score,
-                    'checks': [asdict(check) for check in result.checks],
-                    'recommendations': result.recommendations,
-                    'timestamp': result.timestamp.isoformat()
-                })
-                logger.info(f"完了: {repo_name} (スコア: {result.overall_score:.1f}%)")
-                
-            except Exception as e:
-                logger.error(f"チェックエラー ({repo_name}): {e}")
-                continue
+        def track(names: Iterable[str]) -> Iterator[str]:
+            for name in names:
+                listed_repos.add(name)
+                yield name
+        repo_names = track(repo_names)
         
-        # レポート生成
-        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        logger.info("準拠チェック開始")
         
-        report_data = {
+        # レポートはリポジトリのチェック完了ごとに逐次書き出す
+        header = {
             'organization': args.org,
             'timestamp': datetime.now().isoformat(),
-            'organization_checks': [asdict(check) for check in org_results],
-            'repositories': repo_results
+            'organization_checks': [asdict(check) for check in org_results]
         }
+        summary = ScoreSummary()
         
-        # JSON出力
-        if args.format in ['json', 'both']:
-            json_file = output_dir / f'compliance-report-{timestamp}.json'
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(report_data, f, indent=2, ensure_ascii=False)
-            logger.info(f"JSONレポート生成: {json_file}")
+        with ExitStack() as stack:
+            writers = open_report_writers(stack, args, output_dir, header)
+            
+            def emit(repo_result: Dict):
+                for write in writers:
+                    write(repo_result)
+                listed_repos.add(repo_result['repository'])
+                summary.add(repo_result['overall_score'])
+            
+            def record(result: RepositoryCompliance):
+                repo_result = {
+                    'repository': result.repository,
+                    'overall_score': result.overall_score,
+                    'checks': [asdict(check) for check in result.checks],
+                    'recommendations': result.recommendations,
+                    'timestamp': result.timestamp.isoformat()
+                }
+                emit(repo_result)
+                store.save_repository(result, history_run_id)
+                journal.mark_done(result.repository, repo_result)
+                logger.info(f"完了: {result.repository} (スコア: {result.overall_score:.1f}%)")
+            
+            # 再開時は前回までの結果をそのままレポートに含める
+            for repo_result in journal.iter_results():
+                emit(repo_result)
+            
+            check_repositories(args, checker, repo_names, record,
+                               on_error=lambda repo_name, e: journal.mark_failed(repo_name, str(e)))
+        
+        logger.info("レポート生成完了")
         
-        # HTML出力
-        if args.format in ['html', 'both']:
-            html_file = output_dir / f'compliance-report-{timestamp}.html'
-            generate_html_report(report_data, html_file)
-            logger.info(f"HTMLレポート生成: {html_file}")
+        if not args.repos:
+            # 組織から削除・移管されたリポジトリの状態を除く
+            pruned = store.prune_repositories(listed_repos)
+            if pruned:
+                logger.info(f"準拠状態から {pruned} リポジトリを削除しました")
         
         # サマリー表示
-        scores = [r['overall_score'] for r in repo_results]
-        avg_score = sum(scores) / len(scores) if scores else 0
+        summary.print(args.org)
         
-        print(f"\n=== 準拠チェック結果サマリー ===")
-        print(f"組織: {args.org}")
-        print(f"チェック対象リポジトリ: {len(repo_results)}")
-        print(f"平均準拠スコア: {avg_score:.1f}%")
-        print(f"高スコア(80%+): {len([s for s in scores if s >= 80])}リポジトリ")
-        print(f"要改善(60%未満): {len([s for s in scores if s < 60])}リポジトリ")
+        print("\n=== 前回からの変化 ===")
+        print_transitions(store.transitions(history_run_id, history_run_id))
         
+        if cache:
+            logger.info(f"レスポンスキャッシュ: {cache.summary()}")
+        logger.info(f"API rate limit: {checker.rate_limiter.summary()}")
+        journal.finish('completed')
         logger.info("GitHub ガイドライン準拠チェック完了")
         
     except KeyboardInterrupt:
         logger.info("処理が中断されました")
+        journal.finish('interrupted')
     except Exception as e:
         logger.error(f"予期しないエラー: {e}")
+        journal.finish('failed')
         sys.exit(1)
+    finally:
+        store.close()
+        if cache:
+            cache.close()
+        # 中断・失敗時もそこまでの計測結果を出力する
+        print("\n=== プロファイル ===")
+        print(profiler.format_summary())
+        if args.profile:
+            profiler.write(args.profile, args.profile_format)
+            logger.info(f"プロファイル出力: {args.profile} ({args.profile_format})")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
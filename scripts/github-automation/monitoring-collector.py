@@ -11,26 +11,52 @@ import logging
 import os
 import sys
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Any
 import requests
 import argparse
 from dataclasses import dataclass, asdict
 import sqlite3
-import pandas as pd
 from pathlib import Path
 
-# ログ設定
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('./logs/github-monitoring.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+from github_client import (
+    DEFAULT_POOL_SIZE, GraphQLError, RateLimiter, ResponseCache, count_items,
+    create_session, get_json, iter_items, iter_items_parallel, post_graphql
 )
+from profiling import PROFILE_FORMATS, Profiler, profiled
+from report_writers import JsonLinesWriter, JsonReportWriter
+from run_journal import RunJournal
+from scheduler import ControlServer, Scheduler, order_by_recent_push
+from webhook_server import DEFAULT_WEBHOOK_PATH, WebhookServer, replay
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# ログ出力先
+LOG_FILE = './logs/github-monitoring.log'
+
 logger = logging.getLogger(__name__)
 
+def setup_logging(log_file: str = LOG_FILE):
+    """ログ設定（ログディレクトリがなければ作成し、作成できなければ標準出力のみ）"""
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    file_error = None
+    try:
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        handlers.insert(0, logging.FileHandler(log_file))
+    except OSError as e:
+        file_error = e
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+    if file_error is not None:
+        logger.warning(f"ログファイルを開けません。標準出力のみに出力します: {file_error}")
+
 @dataclass
 class GitHubMetrics:
     """GitHub メトリクスデータクラス"""
@@ -53,102 +79,119 @@ class GitHubMetrics:
 class GitHubCollector:
     """GitHub API データコレクター"""
     
-    def __init__(self, token: str, org: str):
+    def __init__(self, token: str, org: str, pool_size: int = DEFAULT_POOL_SIZE,
+                 cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 profiler: Optional[Profiler] = None):
         self.token = token
         self.org = org
-        self.headers = {
-            'Authorization': f'token {token}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
+        self.session = create_session(token, pool_size)
+        self.cache = cache
+        # 並列ワーカー間で rate limit の残量を共有する
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # エンドポイント別・処理別の所要時間計測
+        self.profiler = profiler or Profiler()
         self.base_url = 'https://api.github.com'
-        self.rate_limit_remaining = 5000
         
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
         """GitHub API リクエスト実行"""
         url = f"{self.base_url}/{endpoint}"
         
-        # Rate limit チェック
-        if self.rate_limit_remaining < 100:
-            logger.warning("API rate limit が少ないです。1時間待機します...")
-            time.sleep(3600)
-            
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            # Rate limit 情報を更新
-            self.rate_limit_remaining = int(response.headers.get('X-RateLimit-Remaining', 0))
-            
-            return response.json()
+            data, _ = get_json(self.session, url, params, self.cache, self.rate_limiter,
+                               profiler=self.profiler)
+            return data
             
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {e}")
             raise
             
+    def _paginate(self, endpoint: str, params: Optional[Dict] = None) -> Iterator[Dict]:
+        """一覧 API の全ページを遅延取得（打ち切った時点で以降のページは取得しない）"""
+        return iter_items(
+            self.session, f"{self.base_url}/{endpoint}", params, self.cache, self.rate_limiter,
+            profiler=self.profiler
+        )
+    
+    def _count(self, endpoint: str, params: Optional[Dict] = None) -> int:
+        """一覧 API の総件数取得（Link ヘッダーを用いて 1 リクエストで算出）"""
+        return count_items(
+            self.session, f"{self.base_url}/{endpoint}", params, self.cache, self.rate_limiter,
+            profiler=self.profiler
+        )
+    
+    @staticmethod
+    def _since(days: int = 30) -> str:
+        """API の since パラメータ・タイムスタンプ比較用の UTC 日時文字列"""
+        return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    
     def get_repositories(self) -> List[Dict]:
         """組織のリポジトリ一覧取得"""
+        return list(self.iter_repositories())
+    
+    def iter_repositories(self) -> Iterator[Dict]:
+        """組織のリポジトリ一覧を並列取得し、届いたページから順に返す"""
         logger.info(f"組織 {self.org} のリポジトリを取得中...")
         
-        repos = []
-        page = 1
-        per_page = 100
-        
-        while True:
-            data = self._make_request(
-                f"orgs/{self.org}/repos",
-                params={'page': page, 'per_page': per_page, 'sort': 'updated'}
-            )
+        count = 0
+        for repo in iter_items_parallel(
+            self.session, f"{self.base_url}/orgs/{self.org}/repos",
+            {'per_page': 100, 'sort': 'updated'}, self.cache, self.rate_limiter,
+            profiler=self.profiler
+        ):
+            count += 1
+            yield repo
             
-            if not data:
-                break
-                
-            repos.extend(data)
-            
-            if len(data) < per_page:
-                break
-                
-            page += 1
-            
-        logger.info(f"取得したリポジトリ数: {len(repos)}")
-        return repos
+        logger.info(f"取得したリポジトリ数: {count}")
     
     def get_repository_metrics(self, repo_name: str) -> GitHubMetrics:
         """リポジトリのメトリクス取得"""
         logger.debug(f"リポジトリ {repo_name} のメトリクスを取得中...")
         
+        return self._collect_repository_metrics(repo_name)
+    
+    @profiled
+    def _collect_repository_metrics(self, repo_name: str) -> GitHubMetrics:
+        """リポジトリのメトリクス収集本体"""
         # 基本情報
         repo_data = self._make_request(f"repos/{self.org}/{repo_name}")
         
         # コミット数（過去30日）
-        since = (datetime.now() - timedelta(days=30)).isoformat()
-        commits_data = self._make_request(
+        since = self._since()
+        commits_count = self._count(
             f"repos/{self.org}/{repo_name}/commits",
-            params={'since': since, 'per_page': 100}
+            params={'since': since}
         )
-        commits_count = len(commits_data) if isinstance(commits_data, list) else 0
         
         # プルリクエスト
-        pr_open = self._make_request(
+        pr_open = self._count(
             f"repos/{self.org}/{repo_name}/pulls",
             params={'state': 'open'}
         )
-        pr_closed = self._make_request(
+        # pulls API は since 非対応のため、更新日時の降順で期間外に達するまで読む。
+        # 読んだ PR はリードタイム・変更失敗率の計算にもそのまま使う
+        closed_prs = []
+        for pr in self._paginate(
             f"repos/{self.org}/{repo_name}/pulls",
-            params={'state': 'closed', 'since': since}
-        )
+            params={'state': 'closed', 'sort': 'updated', 'direction': 'desc', 'per_page': 100}
+        ):
+            if pr['updated_at'] < since:
+                break
+            closed_prs.append(pr)
+        pr_closed = sum(1 for pr in closed_prs if pr.get('closed_at') and pr['closed_at'] >= since)
         
         # Issues
-        issues_open = self._make_request(
+        issues_open = self._count(
             f"repos/{self.org}/{repo_name}/issues",
             params={'state': 'open'}
         )
-        issues_closed = self._make_request(
+        issues_closed = self._count(
             f"repos/{self.org}/{repo_name}/issues",
             params={'state': 'closed', 'since': since}
         )
         
         # 貢献者
-        contributors = self._make_request(f"repos/{self.org}/{repo_name}/contributors")
+        contributors = self._count(f"repos/{self.org}/{repo_name}/contributors")
         
         # セキュリティアラート
         try:
@@ -160,19 +203,19 @@ class GitHubCollector:
             
         # DORA メトリクス（簡易版）
         deployment_frequency = self._calculate_deployment_frequency(repo_name)
-        lead_time_hours = self._calculate_lead_time(repo_name)
-        change_failure_rate = self._calculate_change_failure_rate(repo_name)
-        recovery_time_minutes = self._calculate_recovery_time(repo_name)
+        lead_time_hours = self._calculate_lead_time(repo_name, closed_prs)
+        change_failure_rate = self._calculate_change_failure_rate(repo_name, closed_prs)
+        recovery_time_minutes = self._calculate_recovery_time(repo_name, since)
         
         return GitHubMetrics(
             repository=repo_name,
             timestamp=datetime.now(),
             commits_count=commits_count,
-            pull_requests_open=len(pr_open) if isinstance(pr_open, list) else 0,
-            pull_requests_closed=len(pr_closed) if isinstance(pr_closed, list) else 0,
-            issues_open=len(issues_open) if isinstance(issues_open, list) else 0,
-            issues_closed=len(issues_closed) if isinstance(issues_closed, list) else 0,
-            contributors=len(contributors) if isinstance(contributors, list) else 0,
+            pull_requests_open=pr_open,
+            pull_requests_closed=pr_closed,
+            issues_open=issues_open,
+            issues_closed=issues_closed,
+            contributors=contributors,
             stars=repo_data.get('stargazers_count', 0),
             forks=repo_data.get('forks_count', 0),
             security_alerts=len(security_alerts) if isinstance(security_alerts, list) else 0,
@@ -182,259 +225,1049 @@ class GitHubCollector:
             recovery_time_minutes=recovery_time_minutes
         )
     
+    @profiled
     def _calculate_deployment_frequency(self, repo_name: str) -> float:
         """デプロイメント頻度計算（週次）"""
         try:
             # GitHub Environments または Releases をベースに計算
             releases = self._make_request(f"repos/{self.org}/{repo_name}/releases")
-            
-            if not isinstance(releases, list) or len(releases) == 0:
-                return 0.0
-                
-            # 過去30日のリリース数を週次頻度に変換
-            recent_releases = [
-                r for r in releases[:10] 
-                if datetime.fromisoformat(r['published_at'].replace('Z', '+00:00')) 
-                > datetime.now() - timedelta(days=30)
-            ]
-            
-            return len(recent_releases) / 4.0  # 週次頻度
+            return self._weekly_release_frequency(releases)
             
         except Exception as e:
             logger.warning(f"デプロイメント頻度計算エラー ({repo_name}): {e}")
             return 0.0
     
-    def _calculate_lead_time(self, repo_name: str) -> float:
-        """リードタイム計算（PR作成からマージまでの時間）"""
+    @profiled
+    def _calculate_lead_time(self, repo_name: str, closed_prs: List[Dict]) -> float:
+        """リードタイム計算（PR作成からマージまでの時間。取得済みのクローズ済み PR を使う）"""
         try:
-            since = (datetime.now() - timedelta(days=30)).isoformat()
-            closed_prs = self._make_request(
-                f"repos/{self.org}/{repo_name}/pulls",
-                params={'state': 'closed', 'since': since}
-            )
-            
-            if not isinstance(closed_prs, list) or len(closed_prs) == 0:
-                return 0.0
-                
-            lead_times = []
-            for pr in closed_prs[:20]:  # 最新20件
-                if pr.get('merged_at'):
-                    created = datetime.fromisoformat(pr['created_at'].replace('Z', '+00:00'))
-                    merged = datetime.fromisoformat(pr['merged_at'].replace('Z', '+00:00'))
-                    lead_times.append((merged - created).total_seconds() / 3600)
-            
-            return sum(lead_times) / len(lead_times) if lead_times else 0.0
+            return self._average_lead_time_hours(closed_prs)
             
         except Exception as e:
             logger.warning(f"リードタイム計算エラー ({repo_name}): {e}")
             return 0.0
     
-    def _calculate_change_failure_rate(self, repo_name: str) -> float:
-        """変更失敗率計算"""
+    @profiled
+    def _calculate_change_failure_rate(self, repo_name: str, closed_prs: List[Dict]) -> float:
+        """変更失敗率計算（取得済みのクローズ済み PR を使う）"""
         try:
-            # Hotfix/Bugfix PRの比率で簡易計算
-            since = (datetime.now() - timedelta(days=30)).isoformat()
-            all_prs = self._make_request(
-                f"repos/{self.org}/{repo_name}/pulls",
-                params={'state': 'closed', 'since': since}
-            )
-            
-            if not isinstance(all_prs, list) or len(all_prs) == 0:
-                return 0.0
-                
-            bug_fix_prs = [
-                pr for pr in all_prs 
-                if any(keyword in pr.get('title', '').lower() 
-                      for keyword in ['hotfix', 'bugfix', 'fix:', 'bug:'])
-            ]
-            
-            return len(bug_fix_prs) / len(all_prs)
+            return self._bug_fix_ratio(closed_prs)
             
         except Exception as e:
             logger.warning(f"変更失敗率計算エラー ({repo_name}): {e}")
             return 0.0
     
-    def _calculate_recovery_time(self, repo_name: str) -> float:
+    @profiled
+    def _calculate_recovery_time(self, repo_name: str, since: Optional[str] = None) -> float:
         """復旧時間計算（分）"""
         try:
             # Issue の解決時間を基に簡易計算
-            since = (datetime.now() - timedelta(days=30)).isoformat()
+            since = since or self._since()
             closed_issues = self._make_request(
                 f"repos/{self.org}/{repo_name}/issues",
                 params={'state': 'closed', 'since': since, 'labels': 'bug,critical'}
             )
-            
-            if not isinstance(closed_issues, list) or len(closed_issues) == 0:
-                return 0.0
-                
-            recovery_times = []
-            for issue in closed_issues[:10]:
-                if issue.get('closed_at'):
-                    created = datetime.fromisoformat(issue['created_at'].replace('Z', '+00:00'))
-                    closed = datetime.fromisoformat(issue['closed_at'].replace('Z', '+00:00'))
-                    recovery_times.append((closed - created).total_seconds() / 60)
-            
-            return sum(recovery_times) / len(recovery_times) if recovery_times else 0.0
+            return self._average_recovery_minutes(closed_issues)
             
         except Exception as e:
             logger.warning(f"復旧時間計算エラー ({repo_name}): {e}")
             return 0.0
+    
+    # 以下は REST / GraphQL 共通の DORA 計算（REST 形式のキーを持つ dict を受け取る）
+    
+    @staticmethod
+    def _weekly_release_frequency(releases: Any) -> float:
+        """過去30日のリリース数を週次頻度に変換"""
+        if not isinstance(releases, list) or len(releases) == 0:
+            return 0.0
+        
+        threshold = datetime.now(timezone.utc) - timedelta(days=30)
+        recent_releases = [
+            r for r in releases[:10]
+            if r.get('published_at')
+            and datetime.fromisoformat(r['published_at'].replace('Z', '+00:00')) > threshold
+        ]
+        
+        return len(recent_releases) / 4.0  # 週次頻度
+    
+    @staticmethod
+    def _average_lead_time_hours(closed_prs: Any) -> float:
+        """マージ済み PR の作成からマージまでの平均時間（最新20件）"""
+        if not isinstance(closed_prs, list) or len(closed_prs) == 0:
+            return 0.0
+            
+        lead_times = []
+        for pr in closed_prs[:20]:  # 最新20件
+            if pr.get('merged_at'):
+                created = datetime.fromisoformat(pr['created_at'].replace('Z', '+00:00'))
+                merged = datetime.fromisoformat(pr['merged_at'].replace('Z', '+00:00'))
+                lead_times.append((merged - created).total_seconds() / 3600)
+        
+        return sum(lead_times) / len(lead_times) if lead_times else 0.0
+    
+    @staticmethod
+    def _bug_fix_ratio(closed_prs: Any) -> float:
+        """Hotfix/Bugfix PRの比率（変更失敗率の簡易計算）"""
+        if not isinstance(closed_prs, list) or len(closed_prs) == 0:
+            return 0.0
+            
+        bug_fix_prs = [
+            pr for pr in closed_prs 
+            if any(keyword in pr.get('title', '').lower() 
+                  for keyword in ['hotfix', 'bugfix', 'fix:', 'bug:'])
+        ]
+        
+        return len(bug_fix_prs) / len(closed_prs)
+    
+    @staticmethod
+    def _average_recovery_minutes(closed_issues: Any) -> float:
+        """Issue の作成からクローズまでの平均時間（最新10件、分）"""
+        if not isinstance(closed_issues, list) or len(closed_issues) == 0:
+            return 0.0
+            
+        recovery_times = []
+        for issue in closed_issues[:10]:
+            if issue.get('closed_at'):
+                created = datetime.fromisoformat(issue['created_at'].replace('Z', '+00:00'))
+                closed = datetime.fromisoformat(issue['closed_at'].replace('Z', '+00:00'))
+                recovery_times.append((closed - created).total_seconds() / 60)
+        
+        return sum(recovery_times) / len(recovery_times) if recovery_times else 0.0
+
+class GraphQLCollector(GitHubCollector):
+    """GitHub GraphQL API バッチコレクター
+
+    複数リポジトリをエイリアス付きの 1 クエリにまとめ、件数は totalCount /
+    search の issueCount で取得する。クローズ済み PR は REST 版と同じく更新日時が
+    期間内のものをページングで読み切り、リリース・障害 Issue は直近分のみ取得する。
+    結果は REST 版と同じ GitHubMetrics で返す。
+    """
+    
+    # クローズ済み PR の 1 ページあたり件数（GraphQL の上限）
+    PR_PAGE_SIZE = 100
+    
+    def __init__(self, token: str, org: str, batch_size: int = 25, **kwargs):
+        super().__init__(token, org, **kwargs)
+        self.batch_size = batch_size
+        self.graphql_url = f"{self.base_url}/graphql"
+        # GraphQL はポイント制で REST とは別枠の rate limit
+        self.graphql_rate_limiter = RateLimiter()
+    
+    def get_repositories_metrics(self, repo_names: Iterable[str],
+                                 on_error: Optional[Callable[[str, Exception], None]] = None
+                                 ) -> Iterator[GitHubMetrics]:
+        """リポジトリ群のメトリクスをバッチ単位で取得（一覧取得中でもバッチが揃い次第実行）
+        
+        バッチのクエリが失敗した場合はそのバッチの全リポジトリ、結果に含まれない
+        リポジトリはそのリポジトリについて on_error を呼び、以降のバッチを続ける。
+        """
+        names = iter(repo_names)
+        while True:
+            batch = list(islice(names, self.batch_size))
+            if not batch:
+                break
+            logger.debug(f"GraphQL バッチ取得: {len(batch)} リポジトリ")
+            try:
+                results = self._collect_batch(batch, on_error)
+            except Exception as e:
+                logger.error(f"GraphQL バッチ取得エラー ({len(batch)} リポジトリ): {e}")
+                if on_error:
+                    for repo_name in batch:
+                        on_error(repo_name, e)
+                continue
+            yield from results
+    
+    @profiled
+    def _collect_batch(self, repo_names: List[str],
+                       on_error: Optional[Callable[[str, Exception], None]] = None
+                       ) -> List[GitHubMetrics]:
+        """1 バッチ分のクエリ実行と GitHubMetrics への変換"""
+        since = self._since()
+        
+        data, errors = post_graphql(
+            self.session, self.graphql_url, self._build_query(repo_names, since),
+            variables={'owner': self.org, 'since': since, 'issuesSince': since},
+            rate_limiter=self.graphql_rate_limiter, profiler=self.profiler
+        )
+        self._log_errors(errors)
+        
+        nodes = {}
+        for i, repo_name in enumerate(repo_names):
+            node = data.get(f"r{i}")
+            if not node:
+                error = GraphQLError("GraphQL でリポジトリを取得できませんでした")
+                logger.error(f"収集エラー ({repo_name}): {error}")
+                if on_error:
+                    on_error(repo_name, error)
+                continue
+            node['closedPRCount'] = (data.get(f"c{i}") or {}).get('issueCount', 0)
+            node['criticalIssues'] = data.get(f"b{i}") or {}
+            nodes[repo_name] = node
+        
+        self._fetch_remaining_closed_prs(nodes, since)
+        return [self._to_metrics(repo_name, node, since) for repo_name, node in nodes.items()]
+    
+    @staticmethod
+    def _log_errors(errors: List[Dict]):
+        """エイリアス単位の部分的なエラーを記録"""
+        for error in errors:
+            logger.warning(f"GraphQL エラー: {error.get('message')} (path: {error.get('path')})")
+    
+    @staticmethod
+    def _has_more_closed_prs(connection: Dict, since: str) -> bool:
+        """更新日時の降順で読んだクローズ済み PR に期間内の続きがあるか"""
+        nodes = connection.get('nodes') or []
+        return bool(
+            (connection.get('pageInfo') or {}).get('hasNextPage')
+            and nodes and nodes[-1]['updatedAt'] >= since
+        )
+    
+    def _fetch_remaining_closed_prs(self, nodes: Dict[str, Dict], since: str):
+        """期間内のクローズ済み PR が 1 ページに収まらなかったリポジトリの続きを取得
+        
+        続きのあるリポジトリをまとめて 1 クエリで次ページを読み、
+        期間外の PR に達するか最終ページになるまで繰り返す。
+        """
+        pending = {
+            repo_name: node['closedPRs'] for repo_name, node in nodes.items()
+            if self._has_more_closed_prs(node.get('closedPRs') or {}, since)
+        }
+        while pending:
+            repo_names = list(pending)
+            data, errors = post_graphql(
+                self.session, self.graphql_url,
+                self._build_closed_prs_query(
+                    repo_names, [pending[name]['pageInfo']['endCursor'] for name in repo_names]
+                ),
+                variables={'owner': self.org},
+                rate_limiter=self.graphql_rate_limiter, profiler=self.profiler
+            )
+            self._log_errors(errors)
+            
+            remaining = {}
+            for i, repo_name in enumerate(repo_names):
+                page = (data.get(f"r{i}") or {}).get('closedPRs')
+                if not page:
+                    logger.warning(f"クローズ済み PR の続きを取得できませんでした ({repo_name})")
+                    continue
+                connection = pending[repo_name]
+                connection['nodes'].extend(page['nodes'])
+                connection['pageInfo'] = page['pageInfo']
+                if self._has_more_closed_prs(connection, since):
+                    remaining[repo_name] = connection
+            pending = remaining
+    
+    def _build_closed_prs_query(self, repo_names: List[str], cursors: List[str]) -> str:
+        """クローズ済み PR の続きのページを取得するクエリ生成"""
+        aliases = "\n".join(
+            f"r{i}: repository(owner: $owner, name: {json.dumps(name)}) {{ "
+            f"{self._closed_prs_field(cursor)} }}"
+            for i, (name, cursor) in enumerate(zip(repo_names, cursors))
+        )
+        return f"query($owner: String!) {{\n{aliases}\n}}"
+    
+    def _closed_prs_field(self, cursor: Optional[str] = None) -> str:
+        """更新日時の降順でクローズ済み PR を 1 ページ読むフィールド"""
+        after = f", after: {json.dumps(cursor)}" if cursor else ""
+        return f"""
+            closedPRs: pullRequests(states: [CLOSED, MERGED], first: {self.PR_PAGE_SIZE}{after},
+                                    orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+                pageInfo {{ hasNextPage endCursor }}
+                nodes {{ title createdAt updatedAt mergedAt closedAt }}
+            }}
+        """
+    
+    def _build_query(self, repo_names: List[str], since: str) -> str:
+        """リポジトリごとにエイリアス r0, r1, ... を付けたクエリ生成
+        
+        期間内にクローズされた PR 数 (c*) と、bug かつ critical ラベルの
+        クローズ済み Issue (b*) は、ラベルの AND 条件と日時の範囲指定が
+        できる search で取得する。
+        """
+        fields = """
+            stargazerCount
+            forkCount
+            openPRs: pullRequests(states: [OPEN]) { totalCount }
+            """ + self._closed_prs_field() + """
+            openIssues: issues(states: [OPEN]) { totalCount }
+            closedIssues: issues(states: [CLOSED], filterBy: {since: $issuesSince}) { totalCount }
+            releases(first: 10, orderBy: {field: CREATED_AT, direction: DESC}) {
+                nodes { publishedAt }
+            }
+            vulnerabilityAlerts(states: [OPEN]) { totalCount }
+            mentionableUsers { totalCount }
+            defaultBranchRef {
+                target { ... on Commit { history(since: $since) { totalCount } } }
+            }
+        """
+        aliases = []
+        for i, name in enumerate(repo_names):
+            repo = f"repo:{self.org}/{name}"
+            closed_prs = f"{repo} is:pr is:closed closed:>={since}"
+            critical_issues = (f"{repo} is:issue is:closed label:bug label:critical "
+                               f"updated:>={since} sort:created-desc")
+            aliases.append(
+                f"r{i}: repository(owner: $owner, name: {json.dumps(name)}) {{ {fields} }}\n"
+                f"c{i}: search(type: ISSUE, query: {json.dumps(closed_prs)}, first: 1) "
+                f"{{ issueCount }}\n"
+                f"b{i}: search(type: ISSUE, query: {json.dumps(critical_issues)}, first: 10) "
+                f"{{ nodes {{ ... on Issue {{ createdAt closedAt }} }} }}"
+            )
+        aliases = "\n".join(aliases)
+        return (
+            "query($owner: String!, $since: GitTimestamp!, $issuesSince: DateTime!) "
+            f"{{\n{aliases}\n}}"
+        )
+    
+    def _to_metrics(self, repo_name: str, node: Dict, since: str) -> GitHubMetrics:
+        """GraphQL の結果を GitHubMetrics に変換"""
+        def total(key: str) -> int:
+            return (node.get(key) or {}).get('totalCount', 0)
+        
+        # DORA 計算は REST と共通のロジックを使うため REST 形式のキーに揃える
+        # （REST と同じく更新日時が期間内の PR のみを対象にする）
+        closed_prs = [
+            {'title': pr['title'], 'created_at': pr['createdAt'],
+             'merged_at': pr['mergedAt'], 'closed_at': pr['closedAt']}
+            for pr in (node.get('closedPRs') or {}).get('nodes', [])
+            if pr['updatedAt'] >= since
+        ]
+        critical_issues = [
+            {'created_at': issue['createdAt'], 'closed_at': issue['closedAt']}
+            for issue in (node.get('criticalIssues') or {}).get('nodes', [])
+        ]
+        releases = [
+            {'published_at': r['publishedAt']}
+            for r in (node.get('releases') or {}).get('nodes', [])
+        ]
+        history = ((node.get('defaultBranchRef') or {}).get('target') or {}).get('history') or {}
+        
+        return GitHubMetrics(
+            repository=repo_name,
+            timestamp=datetime.now(),
+            commits_count=history.get('totalCount', 0),
+            pull_requests_open=total('openPRs'),
+            pull_requests_closed=node.get('closedPRCount', 0),
+            issues_open=total('openIssues'),
+            issues_closed=total('closedIssues'),
+            contributors=total('mentionableUsers'),
+            stars=node.get('stargazerCount', 0),
+            forks=node.get('forkCount', 0),
+            security_alerts=total('vulnerabilityAlerts'),
+            deployment_frequency=self._weekly_release_frequency(releases),
+            lead_time_hours=self._average_lead_time_hours(closed_prs),
+            change_failure_rate=self._bug_fix_ratio(closed_prs),
+            recovery_time_minutes=self._average_recovery_minutes(critical_issues)
+        )
+
+class MetricsWriter:
+    """メトリクスの一括書き込み（N 件または T 秒ごとにまとめてコミット）"""
+    
+    def __init__(self, database: 'MetricsDatabase', batch_size: int = 500,
+                 flush_interval: float = 5.0):
+        self.database = database
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.commits = 0
+        self._rows: List[List] = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+    
+    def __enter__(self) -> 'MetricsWriter':
+        self.database._writer = self
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.flush()
+        finally:
+            self.database._writer = None
+    
+    def add(self, metrics: GitHubMetrics):
+        """メトリクスをバッファに追加"""
+        self._rows.append(self.database._metrics_row(metrics))
+        self.mark_dirty()
+    
+    def mark_dirty(self):
+        """未コミットの変更を記録し、閾値に達していればフラッシュ"""
+        self._pending += 1
+        if self._pending >= self.batch_size or \
+                time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        """バッファ内容を書き込んでコミット"""
+        if self._rows:
+            self.database._insert_metrics(self._rows)
+            self.written += len(self._rows)
+            self._rows = []
+        if self._pending:
+            self.database.connection.commit()
+            self.commits += 1
+            self._pending = 0
+        self._last_flush = time.monotonic()
 
 class MetricsDatabase:
     """メトリクスデータベース管理"""
     
+    # 差分収集の変更検知に使うリポジトリ一覧 API のフィールド
+    WATERMARK_FIELDS = ['pushed_at', 'updated_at', 'open_issues_count',
+                        'stargazers_count', 'forks_count']
+    METRIC_COLUMNS = list(GitHubMetrics.__dataclass_fields__)
+    
+    # PRAGMA user_version で管理するスキーマバージョン（_migrate 参照）
+    SCHEMA_VERSION = 4
+    # timestamp は UNIX エポック秒
+    METRICS_DDL = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            repository TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            commits_count INTEGER,
+            pull_requests_open INTEGER,
+            pull_requests_closed INTEGER,
+            issues_open INTEGER,
+            issues_closed INTEGER,
+            contributors INTEGER,
+            stars INTEGER,
+            forks INTEGER,
+            security_alerts INTEGER,
+            deployment_frequency REAL,
+            lead_time_hours REAL,
+            change_failure_rate REAL,
+            recovery_time_minutes REAL,
+            UNIQUE(repository, timestamp)
+        )
+    """
+    # 期間指定の全リポジトリ集計（レポート）用インデックス
+    # idx_metrics_report はリポジトリごとのスキップスキャンで DORA・セキュリティ集計を
+    # テーブル本体に触れずに処理する（ANALYZE の統計情報が必要）
+    INDEX_DDL = [
+        """CREATE INDEX IF NOT EXISTS idx_metrics_timestamp_repository
+           ON metrics (timestamp, repository)""",
+        """CREATE INDEX IF NOT EXISTS idx_metrics_report
+           ON metrics (repository, timestamp, deployment_frequency, lead_time_hours,
+                       change_failure_rate, recovery_time_minutes, security_alerts)""",
+    ]
+    
+    # 集計済みテーブル: テーブル名 -> (バケット幅秒, 起点オフセット秒)
+    # 週次は月曜 00:00 UTC 起点（エポックは木曜のため 4 日ずらす）
+    ROLLUPS = {
+        'metrics_daily': (86400, 0),
+        'metrics_weekly': (7 * 86400, 4 * 86400),
+    }
+    # 集計対象（平均は合計 / 件数で算出し、任意の期間で再集計できるようにする）
+    ROLLUP_SUM_COLUMNS = ['deployment_frequency', 'lead_time_hours', 'change_failure_rate',
+                          'recovery_time_minutes', 'security_alerts']
+    
+    # Webhook 配信の重複排除（GitHub の再配信・レシーバー側の再送で二重に反映しない）
+    WEBHOOK_DDL = """
+        CREATE TABLE IF NOT EXISTS webhook_deliveries (
+            delivery_id TEXT PRIMARY KEY,
+            event TEXT NOT NULL,
+            repository TEXT,
+            received_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """
+    # Webhook による更新をまとめるスナップショットの間隔（秒）
+    EVENT_SNAPSHOT_INTERVAL = 3600
+    # 配信 ID の保持日数
+    WEBHOOK_DELIVERY_RETENTION_DAYS = 7
+    
     def __init__(self, db_path: str = './data/github-metrics.db'):
         self.db_path = db_path
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writer: Optional[MetricsWriter] = None
         self._init_database()
     
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """永続接続（WAL モード）"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+    
+    def close(self):
+        """統計情報を更新して接続を閉じる"""
+        if self._conn is not None:
+            analyzed = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone() and self._conn.execute(
+                "SELECT 1 FROM sqlite_stat1 WHERE tbl = 'metrics'"
+            ).fetchone()
+            self._conn.execute("PRAGMA optimize" if analyzed else "ANALYZE metrics")
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+    
+    def _commit(self):
+        """一括書き込み中はライターにコミットを任せる"""
+        if self._writer is not None:
+            self._writer.mark_dirty()
+        else:
+            self.connection.commit()
+    
     def _init_database(self):
         """データベース初期化"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conn = self.connection
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metrics'"
+        ).fetchone()
+        if not exists:
+            conn.execute(self.METRICS_DDL.format(table='metrics'))
+            for ddl in self.INDEX_DDL + self._rollup_ddl() + [self.WEBHOOK_DDL]:
+                conn.execute(ddl)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        # 差分収集用: 前回収集時点のリポジトリ一覧上の状態
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS repository_watermarks (
+                repository TEXT PRIMARY KEY,
+                pushed_at TEXT,
+                updated_at TEXT,
+                open_issues_count INTEGER,
+                stargazers_count INTEGER,
+                forks_count INTEGER,
+                collected_at TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        self._migrate()
+    
+    def _migrate(self):
+        """既存データベースをスキーマバージョンに従って順に移行"""
+        conn = self.connection
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        migrations = [
+            (1, self._migrate_epoch_timestamp),
+            (2, self._migrate_report_indexes),
+            (3, self._migrate_rollups),
+            (4, self._migrate_webhook_deliveries),
+        ]
+        for target, migration in migrations:
+            if version >= target:
+                continue
+            logger.info(f"データベース移行中: v{version} -> v{target}")
+            conn.execute("BEGIN")
+            try:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            version = target
+    
+    def _migrate_epoch_timestamp(self, conn: sqlite3.Connection):
+        """v1: ISO 文字列の timestamp を UNIX エポック秒（INTEGER）に変換"""
+        conn.create_function(
+            'iso_to_epoch', 1,
+            lambda value: int(datetime.fromisoformat(value).timestamp())
+        )
+        conn.execute(self.METRICS_DDL.format(table='metrics_v1'))
+        columns = ', '.join(self.METRIC_COLUMNS)
+        selected = ', '.join(
+            'iso_to_epoch(timestamp)' if column == 'timestamp' else column
+            for column in self.METRIC_COLUMNS
+        )
+        conn.execute(
+            f"INSERT OR REPLACE INTO metrics_v1 ({columns}) SELECT {selected} FROM metrics"
+        )
+        conn.execute("DROP TABLE metrics")
+        conn.execute("ALTER TABLE metrics_v1 RENAME TO metrics")
+    
+    def _migrate_report_indexes(self, conn: sqlite3.Connection):
+        """v2: レポート集計用インデックス追加"""
+        for ddl in self.INDEX_DDL:
+            conn.execute(ddl)
+        conn.execute("ANALYZE metrics")
+    
+    def _migrate_rollups(self, conn: sqlite3.Connection):
+        """v3: 日次・週次集計テーブルを作成し、既存データから構築"""
+        for ddl in self._rollup_ddl():
+            conn.execute(ddl)
+        sums = ', '.join(f"SUM(COALESCE({c}, 0))" for c in self.ROLLUP_SUM_COLUMNS)
+        for table, (width, offset) in self.ROLLUPS.items():
+            conn.execute(
+                f"INSERT INTO {table} SELECT repository, {self._bucket('timestamp', width, offset)}, "
+                f"COUNT(*), {sums}, MAX(security_alerts) FROM metrics GROUP BY 1, 2"
+            )
+    
+    def _migrate_webhook_deliveries(self, conn: sqlite3.Connection):
+        """v4: Webhook 配信の重複排除テーブル作成"""
+        conn.execute(self.WEBHOOK_DDL)
+    
+    @staticmethod
+    def _bucket(column: str, width: int, offset: int) -> str:
+        """エポック秒をバケット先頭に丸める SQL 式"""
+        return f"({column} - ({column} - {offset}) % {width})"
+    
+    def _rollup_ddl(self) -> List[str]:
+        """集計テーブルと、metrics への書き込みに追従するトリガーの DDL
+        
+        集計は INSERT/UPDATE トリガーで増分更新する。保持期間による raw データの
+        削除では集計を変更しない（DELETE トリガーなし）。
+        """
+        sum_columns = ', '.join(f"sum_{c}" for c in self.ROLLUP_SUM_COLUMNS)
+        statements = []
+        for table in self.ROLLUPS:
+            statements.append(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
                     repository TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    commits_count INTEGER,
-                    pull_requests_open INTEGER,
-                    pull_requests_closed INTEGER,
-                    issues_open INTEGER,
-                    issues_closed INTEGER,
-                    contributors INTEGER,
-                    stars INTEGER,
-                    forks INTEGER,
-                    security_alerts INTEGER,
-                    deployment_frequency REAL,
-                    lead_time_hours REAL,
-                    change_failure_rate REAL,
-                    recovery_time_minutes REAL,
-                    UNIQUE(repository, timestamp)
-                )
+                    bucket INTEGER NOT NULL,
+                    samples INTEGER NOT NULL,
+                    {', '.join(f'sum_{c} REAL NOT NULL' for c in self.ROLLUP_SUM_COLUMNS)},
+                    max_security_alerts INTEGER,
+                    PRIMARY KEY (repository, bucket)
+                ) WITHOUT ROWID
             """)
-            conn.commit()
+        
+        def upsert(row: str, sign: str) -> str:
+            values = ', '.join(f"{sign}COALESCE({row}.{c}, 0)" for c in self.ROLLUP_SUM_COLUMNS)
+            updates = ', '.join(f"sum_{c} = sum_{c} + excluded.sum_{c}" for c in self.ROLLUP_SUM_COLUMNS)
+            return ''.join(f"""
+                    INSERT INTO {table} (repository, bucket, samples, {sum_columns}, max_security_alerts)
+                    VALUES ({row}.repository, {self._bucket(f'{row}.timestamp', width, offset)},
+                            {sign}1, {values}, {row}.security_alerts)
+                    ON CONFLICT (repository, bucket) DO UPDATE SET
+                        samples = samples + excluded.samples, {updates},
+                        max_security_alerts = MAX(COALESCE(max_security_alerts, 0),
+                                                  COALESCE(excluded.max_security_alerts, 0));"""
+                for table, (width, offset) in self.ROLLUPS.items())
+        
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS metrics_rollup_insert AFTER INSERT ON metrics
+            BEGIN {upsert('NEW', '')}
+            END
+        """)
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS metrics_rollup_update AFTER UPDATE ON metrics
+            BEGIN {upsert('OLD', '-')}{upsert('NEW', '')}
+            END
+        """)
+        return statements
+    
+    @staticmethod
+    def _to_epoch(value: datetime) -> int:
+        """datetime を UNIX エポック秒に変換"""
+        return int(value.timestamp())
+    
+    def _metrics_row(self, metrics: GitHubMetrics) -> List:
+        """メトリクスを INSERT 用の行に変換"""
+        data = asdict(metrics)
+        data['timestamp'] = self._to_epoch(data['timestamp'])
+        return [data[column] for column in self.METRIC_COLUMNS]
+    
+    def _upsert_clause(self) -> str:
+        """同一 (repository, timestamp) は上書き（集計トリガーが差分を反映できるよう UPDATE で行う）"""
+        updates = ', '.join(
+            f"{column} = excluded.{column}" for column in self.METRIC_COLUMNS
+            if column not in ('repository', 'timestamp')
+        )
+        return f"ON CONFLICT (repository, timestamp) DO UPDATE SET {updates}"
+    
+    def _insert_metrics(self, rows: List[List]):
+        """メトリクス行の一括 INSERT（コミットは呼び出し側）"""
+        self.connection.executemany(
+            f"INSERT INTO metrics ({', '.join(self.METRIC_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in self.METRIC_COLUMNS)}) {self._upsert_clause()}",
+            rows
+        )
+    
+    def journal(self, org: str, run_id: Optional[str] = None) -> RunJournal:
+        """実行ジャーナル（完了状態をメトリクスと同じトランザクションでコミットする）"""
+        return RunJournal(self.connection, 'monitoring-collector', org, run_id, commit=self._commit)
+    
+    def writer(self, batch_size: int = 500, flush_interval: float = 5.0) -> MetricsWriter:
+        """一括書き込み用ライター（with 文で使用）"""
+        return MetricsWriter(self, batch_size, flush_interval)
     
     def save_metrics(self, metrics: GitHubMetrics):
         """メトリクス保存"""
-        with sqlite3.connect(self.db_path) as conn:
-            data = asdict(metrics)
-            data['timestamp'] = data['timestamp'].isoformat()
-            
-            placeholders = ', '.join(['?' for _ in data])
-            columns = ', '.join(data.keys())
-            
-            conn.execute(
-                f"INSERT OR REPLACE INTO metrics ({columns}) VALUES ({placeholders})",
-                list(data.values())
+        if self._writer is not None:
+            self._writer.add(metrics)
+        else:
+            self.save_metrics_batch([metrics])
+    
+    def save_metrics_batch(self, metrics: Iterable[GitHubMetrics],
+                           batch_size: int = 500) -> int:
+        """メトリクスの一括保存（batch_size 件ごとにコミット）"""
+        with self.writer(batch_size=batch_size, flush_interval=float('inf')) as writer:
+            for item in metrics:
+                writer.add(item)
+        return writer.written
+    
+    def is_unchanged(self, repo: Dict, max_staleness_days: int) -> bool:
+        """前回収集時からリポジトリ一覧上の状態に変化がないか判定"""
+        if not repo.get('pushed_at'):
+            return False
+        
+        row = self.connection.execute(
+            f"SELECT {', '.join(self.WATERMARK_FIELDS)}, collected_at "
+            "FROM repository_watermarks WHERE repository = ?",
+            (repo['name'],)
+        ).fetchone()
+        
+        if row is None:
+            return False
+        # 期間集計（過去30日など）がずれていくため、一定期間ごとに再収集する
+        if datetime.fromisoformat(row[-1]) < datetime.now() - timedelta(days=max_staleness_days):
+            return False
+        return list(row[:-1]) == [repo.get(field) for field in self.WATERMARK_FIELDS]
+    
+    def save_watermark(self, repo: Dict, collected_at: datetime):
+        """収集済みリポジトリのウォーターマーク保存"""
+        if not repo.get('pushed_at'):
+            return
+        
+        columns = ['repository'] + self.WATERMARK_FIELDS + ['collected_at']
+        values = [repo['name']] + [repo.get(field) for field in self.WATERMARK_FIELDS]
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO repository_watermarks ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            values + [collected_at.isoformat()]
+        )
+        self._commit()
+    
+    def carry_forward(self, repository: str, timestamp: datetime) -> bool:
+        """直近のメトリクスを新しいタイムスタンプで複製（API 呼び出しなし）"""
+        columns = [
+            name for name in self.METRIC_COLUMNS
+            if name not in ('repository', 'timestamp')
+        ]
+        cursor = self.connection.execute(
+            f"INSERT INTO metrics (repository, timestamp, {', '.join(columns)}) "
+            f"SELECT repository, ?, {', '.join(columns)} FROM metrics "
+            f"WHERE repository = ? ORDER BY timestamp DESC LIMIT 1 {self._upsert_clause()}",
+            (self._to_epoch(timestamp), repository)
+        )
+        if cursor.rowcount > 0:
+            self._commit()
+        return cursor.rowcount > 0
+    
+    def select_changed(self, repositories: Iterable[Dict], max_staleness_days: int = 7,
+                       on_carried: Optional[Callable[[Dict], None]] = None) -> Iterator[Dict]:
+        """変化のあったリポジトリのみを返し、変化のないものは前回値を引き継ぐ"""
+        carried = 0
+        for repo in repositories:
+            if self.is_unchanged(repo, max_staleness_days) and \
+                    self.carry_forward(repo['name'], datetime.now()):
+                carried += 1
+                logger.debug(f"変更なしのため前回値を引き継ぎ: {repo['name']}")
+                if on_carried:
+                    on_carried(repo)
+                continue
+            yield repo
+        logger.info(f"差分収集: {carried} リポジトリは変更なしのため前回値を引き継ぎました")
+    
+    def apply_retention(self, retention_days: int = 90, downsample_after_days: int = 7) -> int:
+        """raw スナップショットの保持期間適用とダウンサンプリング
+        
+        downsample_after_days より古いデータはリポジトリ・日ごとに最後の 1 件のみ残し、
+        retention_days より古いデータは削除する（0 で無効）。集計テーブルは変更しない。
+        """
+        now = self._to_epoch(datetime.now())
+        deleted = 0
+        if downsample_after_days:
+            cursor = self.connection.execute(f"""
+                DELETE FROM metrics
+                WHERE timestamp < :cutoff AND EXISTS (
+                    SELECT 1 FROM metrics AS later
+                    WHERE later.repository = metrics.repository
+                      AND later.timestamp > metrics.timestamp
+                      AND later.timestamp < {self._bucket('metrics.timestamp', 86400, 0)} + 86400
+                )
+            """, {'cutoff': now - downsample_after_days * 86400})
+            deleted += cursor.rowcount
+        if retention_days:
+            cursor = self.connection.execute(
+                "DELETE FROM metrics WHERE timestamp < ?",
+                (now - retention_days * 86400,)
             )
-            conn.commit()
+            deleted += cursor.rowcount
+        self.connection.execute(
+            "DELETE FROM webhook_deliveries WHERE received_at < ?",
+            (now - self.WEBHOOK_DELIVERY_RETENTION_DAYS * 86400,)
+        )
+        self._commit()
+        logger.info(f"保持期間適用: raw スナップショット {deleted} 件を削除")
+        return deleted
+    
+    def apply_event(self, delivery_id: str, event: str, repository: str,
+                    update: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Webhook イベントを直近のスナップショットに反映
+        
+        update は直近スナップショットの列値を受け取り、変更する列と新しい値を返す。
+        変更は EVENT_SNAPSHOT_INTERVAL 秒ごとのスナップショット（直近スナップショットが
+        それより新しければその行）に上書きするため、イベントごとに行は増えない。
+        配信 ID の記録と同じトランザクションでコミットし、同じ配信は一度だけ反映する。
+        """
+        conn = self.connection
+        try:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO webhook_deliveries (delivery_id, event, repository, received_at) "
+                "VALUES (?, ?, ?, ?)",
+                (delivery_id, event, repository, self._to_epoch(datetime.now()))
+            )
+            if cursor.rowcount == 0:
+                return {'applied': False, 'duplicate': True}
+            
+            row = conn.execute(
+                f"SELECT {', '.join(self.METRIC_COLUMNS)} FROM metrics "
+                "WHERE repository = ? ORDER BY timestamp DESC LIMIT 1",
+                (repository,)
+            ).fetchone()
+            if row is None:
+                # 基準となる値がないため、次回のポーリング収集で反映する
+                result = {'applied': False, 'reason': 'not_collected'}
+            else:
+                current = dict(zip(self.METRIC_COLUMNS, row))
+                changes = update(dict(current))
+                result = {'applied': bool(changes), 'changes': changes}
+                if changes:
+                    now = self._to_epoch(datetime.now())
+                    current.update(changes)
+                    current['timestamp'] = max(current['timestamp'],
+                                               now - now % self.EVENT_SNAPSHOT_INTERVAL)
+                    self._insert_metrics([[current[column] for column in self.METRIC_COLUMNS]])
+            self._commit()
+            return result
+        except Exception:
+            # 配信 ID だけが記録されると再配信でも反映されなくなるため取り消す
+            conn.rollback()
+            raise
+    
+    def window_source(self, since: datetime) -> Tuple[str, Dict]:
+        """since 以降の集計元（raw + 日次 + 週次）を返すサブクエリ
+        
+        完全に期間内に収まるバケットは週次・日次の集計行を使い、端数の先頭部分のみ
+        raw スナップショットを読む。列は repository, samples, sum_*, max_security_alerts。
+        """
+        day_width, day_offset = self.ROLLUPS['metrics_daily']
+        week_width, week_offset = self.ROLLUPS['metrics_weekly']
+        start = self._to_epoch(since)
+        day = start + (day_offset - start) % day_width
+        week = day + (week_offset - day) % week_width
+        
+        sum_columns = ', '.join(f"sum_{c}" for c in self.ROLLUP_SUM_COLUMNS)
+        raw_columns = ', '.join(f"CAST({c} AS REAL) AS sum_{c}" for c in self.ROLLUP_SUM_COLUMNS)
+        sql = f"""
+            SELECT repository, 1 AS samples, {raw_columns}, security_alerts AS max_security_alerts
+            FROM metrics WHERE timestamp >= :start AND timestamp < :day
+            UNION ALL
+            SELECT repository, samples, {sum_columns}, max_security_alerts
+            FROM metrics_daily WHERE bucket >= :day AND bucket < :week
+            UNION ALL
+            SELECT repository, samples, {sum_columns}, max_security_alerts
+            FROM metrics_weekly WHERE bucket >= :week
+        """
+        return sql, {'start': start, 'day': day, 'week': week}
     
-    def get_metrics_history(self, repository: str, days: int = 30) -> pd.DataFrame:
-        """メトリクス履歴取得"""
+    def get_metrics_history(self, repository: str, days: int = 30) -> 'pd.DataFrame':
+        """メトリクス履歴取得（pandas が必要）"""
+        import pandas as pd
+        
         since = datetime.now() - timedelta(days=days)
         
-        with sqlite3.connect(self.db_path) as conn:
-            query = """
-                SELECT * FROM metrics 
-                WHERE repository = ? AND timestamp >= ?
-                ORDER BY timestamp DESC
-            """
-            return pd.read_sql_query(query, conn, params=[repository, since.isoformat()])
+        query = """
+            SELECT * FROM metrics 
+            WHERE repository = ? AND timestamp >= ?
+            ORDER BY timestamp DESC
+        """
+        df = pd.read_sql_query(query, self.connection,
+                               params=[repository, self._to_epoch(since)])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+        return df
+
+# DORA レベル判定閾値（上位レベルから順に判定し、いずれも満たさなければ Low）
+# deployment_frequency は下限、その他は上限
+DEFAULT_DORA_THRESHOLDS = {
+    'Elite': {'deployment_frequency': 3, 'lead_time_hours': 1,
+              'change_failure_rate': 0.05, 'recovery_time_minutes': 60},
+    'High': {'deployment_frequency': 1, 'lead_time_hours': 24,
+             'change_failure_rate': 0.10, 'recovery_time_minutes': 240},
+    'Medium': {'deployment_frequency': 0.2, 'lead_time_hours': 168,
+               'change_failure_rate': 0.15, 'recovery_time_minutes': 1440},
+}
+
+def load_dora_thresholds(path: Optional[str]) -> Dict[str, Dict[str, float]]:
+    """DORA 閾値設定読み込み（JSON。指定されたレベル・項目のみデフォルトを上書き）"""
+    thresholds = {level: dict(values) for level, values in DEFAULT_DORA_THRESHOLDS.items()}
+    if not path:
+        return thresholds
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    for level, values in overrides.items():
+        if level not in thresholds:
+            raise ValueError(f"不明な DORA レベル: {level}")
+        thresholds[level].update(values)
+    return thresholds
 
 class ReportGenerator:
     """レポート生成器"""
     
-    def __init__(self, db: MetricsDatabase):
+    # DORA レポートの項目（クエリでは avg_ を付けた列名）
+    DORA_COLUMNS = ['deployment_frequency', 'lead_time_hours', 'change_failure_rate',
+                    'recovery_time_minutes']
+    
+    def __init__(self, db: MetricsDatabase,
+                 dora_thresholds: Optional[Dict[str, Dict[str, float]]] = None):
         self.db = db
+        self.dora_thresholds = dora_thresholds or DEFAULT_DORA_THRESHOLDS
+    
+    def classify_dora_levels(self, deployment_frequency: 'np.ndarray', lead_time_hours: 'np.ndarray',
+                             change_failure_rate: 'np.ndarray',
+                             recovery_time_minutes: 'np.ndarray') -> 'np.ndarray':
+        """DORA レベルを一括判定（項目ごとの float 配列。NaN の項目は閾値を満たさない）"""
+        import numpy as np
+        
+        conditions = [
+            (deployment_frequency >= t['deployment_frequency'])
+            & (lead_time_hours <= t['lead_time_hours'])
+            & (change_failure_rate <= t['change_failure_rate'])
+            & (recovery_time_minutes <= t['recovery_time_minutes'])
+            for t in self.dora_thresholds.values()
+        ]
+        return np.select(conditions, list(self.dora_thresholds), default='Low')
+    
+    def _dora_query(self, days: int) -> Tuple[str, Dict]:
+        """リポジトリ別 DORA 平均値のクエリ（集計テーブル経由）"""
+        source, params = self.db.window_source(datetime.now() - timedelta(days=days))
+        query = f"""
+            SELECT 
+                repository,
+                SUM(sum_deployment_frequency) / SUM(samples) as avg_deployment_frequency,
+                SUM(sum_lead_time_hours) / SUM(samples) as avg_lead_time_hours,
+                SUM(sum_change_failure_rate) / SUM(samples) as avg_change_failure_rate,
+                SUM(sum_recovery_time_minutes) / SUM(samples) as avg_recovery_time_minutes
+            FROM ({source})
+            GROUP BY repository
+            HAVING SUM(samples) > 0
+        """
+        return query, params
+    
+    def _security_query(self, days: int, min_alerts: Optional[int] = None) -> Tuple[str, Dict]:
+        """リポジトリ別セキュリティアラート統計のクエリ（集計テーブル経由）"""
+        source, params = self.db.window_source(datetime.now() - timedelta(days=days))
+        having = "SUM(samples) > 0"
+        if min_alerts is not None:
+            having += " AND MAX(max_security_alerts) > :min_alerts"
+            params = {**params, 'min_alerts': min_alerts}
+        query = f"""
+            SELECT 
+                repository,
+                MAX(max_security_alerts) as current_alerts,
+                SUM(sum_security_alerts) / SUM(samples) as avg_alerts
+            FROM ({source})
+            GROUP BY repository
+            HAVING {having}
+            ORDER BY current_alerts DESC
+        """
+        return query, params
+    
+    def _iter_query_chunks(self, query: str, params: Dict,
+                           chunksize: int) -> Iterator[List[Dict[str, Any]]]:
+        """クエリ結果を列名をキーとした辞書のリストで chunksize 件ずつ返す"""
+        cursor = self.db.connection.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                return
+            yield [dict(zip(columns, row)) for row in rows]
+    
+    def iter_dora_chunks(self, days: int = 30,
+                         chunksize: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+        """DORA レベル判定済みのリポジトリ別メトリクスを chunksize 件ずつ返す"""
+        import numpy as np
+        
+        query, params = self._dora_query(days)
+        for rows in self._iter_query_chunks(query, params, chunksize):
+            # 列ごとの配列にしてチャンク単位で一括判定する（NULL は NaN）
+            columns = {
+                name: np.array([row[f'avg_{name}'] for row in rows], dtype=float)
+                for name in self.DORA_COLUMNS
+            }
+            levels = self.classify_dora_levels(*columns.values()).tolist()
+            yield [
+                {
+                    'repository': row['repository'],
+                    **{name: row[f'avg_{name}'] for name in self.DORA_COLUMNS},
+                    'dora_level': level
+                }
+                for row, level in zip(rows, levels)
+            ]
+    
+    def iter_security_chunks(self, days: int = 30, min_alerts: Optional[int] = None,
+                             chunksize: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+        """リポジトリ別セキュリティアラート統計を chunksize 件ずつ返す"""
+        query, params = self._security_query(days, min_alerts)
+        yield from self._iter_query_chunks(query, params, chunksize)
+    
+    def _level_distribution(self, counts: Dict[str, int]) -> Dict[str, int]:
+        return {
+            level: counts.get(level, 0)
+            for level in [*self.dora_thresholds, 'Low']
+        }
+    
+    @staticmethod
+    def _count_levels(counts: Dict[str, int], rows: List[Dict[str, Any]]):
+        for row in rows:
+            counts[row['dora_level']] = counts.get(row['dora_level'], 0) + 1
     
     def generate_dora_report(self, org: str, days: int = 30) -> Dict:
         """DORA メトリクスレポート生成"""
         logger.info("DORA メトリクスレポートを生成中...")
         
-        # 全リポジトリのメトリクス取得
-        with sqlite3.connect(self.db.db_path) as conn:
-            since = datetime.now() - timedelta(days=days)
-            
-            query = """
-                SELECT 
-                    repository,
-                    AVG(deployment_frequency) as avg_deployment_frequency,
-                    AVG(lead_time_hours) as avg_lead_time_hours,
-                    AVG(change_failure_rate) as avg_change_failure_rate,
-                    AVG(recovery_time_minutes) as avg_recovery_time_minutes
-                FROM metrics 
-                WHERE timestamp >= ?
-                GROUP BY repository
-            """
-            
-            df = pd.read_sql_query(query, conn, params=[since.isoformat()])
-        
-        # DORA レベル判定
-        def get_dora_level(freq, lead_time, failure_rate, recovery_time):
-            # 簡化された判定ロジック
-            if freq >= 3 and lead_time <= 1 and failure_rate <= 0.05 and recovery_time <= 60:
-                return "Elite"
-            elif freq >= 1 and lead_time <= 24 and failure_rate <= 0.10 and recovery_time <= 240:
-                return "High"
-            elif freq >= 0.2 and lead_time <= 168 and failure_rate <= 0.15 and recovery_time <= 1440:
-                return "Medium"
-            else:
-                return "Low"
-        
+        # 全リポジトリのメトリクス取得・DORA レベル判定
         results = []
-        for _, row in df.iterrows():
-            level = get_dora_level(
-                row['avg_deployment_frequency'],
-                row['avg_lead_time_hours'],
-                row['avg_change_failure_rate'],
-                row['avg_recovery_time_minutes']
-            )
-            results.append({
-                'repository': row['repository'],
-                'deployment_frequency': row['avg_deployment_frequency'],
-                'lead_time_hours': row['avg_lead_time_hours'],
-                'change_failure_rate': row['avg_change_failure_rate'],
-                'recovery_time_minutes': row['avg_recovery_time_minutes'],
-                'dora_level': level
-            })
-        
-        # 集約統計
-        total_repos = len(results)
-        level_distribution = {}
-        for level in ['Elite', 'High', 'Medium', 'Low']:
-            level_distribution[level] = len([r for r in results if r['dora_level'] == level])
+        counts: Dict[str, int] = {}
+        for rows in self.iter_dora_chunks(days):
+            results.extend(rows)
+            self._count_levels(counts, rows)
         
         return {
             'organization': org,
             'period_days': days,
-            'total_repositories': total_repos,
-            'level_distribution': level_distribution,
+            'total_repositories': len(results),
+            'level_distribution': self._level_distribution(counts),
             'repository_details': results,
             'generated_at': datetime.now().isoformat()
         }
     
+    def write_dora_report(self, org: str, output_path: Path, days: int = 30) -> int:
+        """DORA メトリクスレポートを逐次書き込み（集計値はリポジトリ一覧の後に出力）"""
+        logger.info("DORA メトリクスレポートを生成中...")
+        
+        total_repos = 0
+        counts: Dict[str, int] = {}
+        with JsonReportWriter(output_path) as writer:
+            writer.write_fields({'organization': org, 'period_days': days})
+            writer.begin_array('repository_details')
+            for rows in self.iter_dora_chunks(days):
+                writer.write_items(rows)
+                total_repos += len(rows)
+                self._count_levels(counts, rows)
+            writer.end_array()
+            writer.write_fields({
+                'total_repositories': total_repos,
+                'level_distribution': self._level_distribution(counts),
+                'generated_at': datetime.now().isoformat()
+            })
+        return total_repos
+    
     def generate_security_report(self, org: str, days: int = 30) -> Dict:
         """セキュリティレポート生成"""
         logger.info("セキュリティレポートを生成中...")
         
-        with sqlite3.connect(self.db.db_path) as conn:
-            since = datetime.now() - timedelta(days=days)
-            
-            # セキュリティアラート統計
-            query = """
-                SELECT 
-                    repository,
-                    MAX(security_alerts) as current_alerts,
-                    AVG(security_alerts) as avg_alerts
-                FROM metrics 
-                WHERE timestamp >= ?
-                GROUP BY repository
-                ORDER BY current_alerts DESC
-            """
-            
-            df = pd.read_sql_query(query, conn, params=[since.isoformat()])
-        
-        results = df.to_dict('records')
+        # セキュリティアラート統計
+        results = []
+        for rows in self.iter_security_chunks(days):
+            results.extend(rows)
         
         return {
             'organization': org,
@@ -445,20 +1278,571 @@ class ReportGenerator:
             'repository_details': results,
             'generated_at': datetime.now().isoformat()
         }
+    
+    def write_security_report(self, org: str, output_path: Path, days: int = 30) -> int:
+        """セキュリティレポートを逐次書き込み（集計値はリポジトリ一覧の後に出力）"""
+        logger.info("セキュリティレポートを生成中...")
+        
+        total_repos = 0
+        total_alerts = 0
+        with JsonReportWriter(output_path) as writer:
+            writer.write_fields({'organization': org, 'period_days': days})
+            # 高リスクリポジトリは集計クエリ側で絞り込み、全件を保持せずに出力する
+            writer.begin_array('high_risk_repositories')
+            for rows in self.iter_security_chunks(days, min_alerts=5):
+                writer.write_items(rows)
+            writer.end_array()
+            writer.begin_array('repository_details')
+            for rows in self.iter_security_chunks(days):
+                writer.write_items(rows)
+                total_repos += len(rows)
+                total_alerts += sum(row['current_alerts'] for row in rows)
+            writer.end_array()
+            writer.write_fields({
+                'total_repositories': total_repos,
+                'total_active_alerts': total_alerts,
+                'generated_at': datetime.now().isoformat()
+            })
+        return total_repos
+
+class MetricsExporter:
+    """メトリクス履歴エクスポート（BI 連携用）
+    
+    metrics テーブルを chunksize 行ずつ読み出して書き出すため、テーブル全体を
+    メモリに載せない。Arrow IPC ファイルはそのままメモリマップして読み込める。
+    """
+    
+    FORMATS = {'jsonl': '.jsonl', 'parquet': '.parquet', 'arrow': '.arrow'}
+    
+    def __init__(self, db: MetricsDatabase, chunksize: int = 10000):
+        self.db = db
+        self.chunksize = chunksize
+    
+    def iter_chunks(self, since: Optional[datetime] = None) -> Iterator[List[Tuple]]:
+        """metrics テーブルの行をリポジトリ・時刻順に chunksize 行ずつ返す"""
+        cursor = self.db.connection.execute(
+            f"SELECT {', '.join(MetricsDatabase.METRIC_COLUMNS)} FROM metrics "
+            "WHERE timestamp >= ? ORDER BY repository, timestamp",
+            (self.db._to_epoch(since) if since else 0,)
+        )
+        while True:
+            rows = cursor.fetchmany(self.chunksize)
+            if not rows:
+                break
+            yield rows
+    
+    def export(self, fmt: str, output_path: Path, since: Optional[datetime] = None) -> int:
+        """指定形式でエクスポートし、書き出した行数を返す"""
+        if fmt == 'jsonl':
+            return self._export_jsonl(output_path, since)
+        return self._export_columnar(fmt, output_path, since)
+    
+    def _export_jsonl(self, output_path: Path, since: Optional[datetime]) -> int:
+        columns = MetricsDatabase.METRIC_COLUMNS
+        with JsonLinesWriter(output_path) as writer:
+            for rows in self.iter_chunks(since):
+                writer.write_many(
+                    {
+                        **dict(zip(columns, row)),
+                        'timestamp': datetime.fromtimestamp(row[1], timezone.utc).isoformat()
+                    }
+                    for row in rows
+                )
+        return writer.records_written
+    
+    def _export_columnar(self, fmt: str, output_path: Path, since: Optional[datetime]) -> int:
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet / Arrow 出力には pyarrow が必要です (pip install pyarrow)")
+        
+        # repository は辞書エンコード（全チャンクで共通の辞書を前方に拡張していく）
+        field_types = {int: pa.int64(), float: pa.float64()}
+        schema = pa.schema(
+            [('repository', pa.dictionary(pa.int32(), pa.string())),
+             ('timestamp', pa.timestamp('s', tz='UTC'))]
+            + [(name, field_types[field.type])
+               for name, field in GitHubMetrics.__dataclass_fields__.items()
+               if name not in ('repository', 'timestamp')]
+        )
+        if fmt == 'parquet':
+            writer = pa.parquet.ParquetWriter(str(output_path), schema)
+        else:
+            # 辞書の追加分のみを差分として書き出す（IPC ファイル形式は辞書の置き換え不可）
+            writer = pa.ipc.new_file(str(output_path), schema,
+                                     options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+        
+        repository_index: Dict[str, int] = {}
+        repository_names: List[str] = []
+        written = 0
+        try:
+            for rows in self.iter_chunks(since):
+                columns = list(zip(*rows))
+                indices = []
+                for name in columns[0]:
+                    index = repository_index.get(name)
+                    if index is None:
+                        index = repository_index[name] = len(repository_names)
+                        repository_names.append(name)
+                    indices.append(index)
+                arrays = [
+                    pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()),
+                                                   pa.array(repository_names, pa.string()))
+                ] + [
+                    pa.array(values, type=field.type)
+                    for values, field in zip(columns[1:], list(schema)[1:])
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                written += len(rows)
+        finally:
+            writer.close()
+        return written
+
+class WebhookIngestor:
+    """Webhook イベントをメトリクスデータベースに増分反映する
+    
+    件数（PR / Issue のオープン・クローズ、デフォルトブランチのコミット数）は
+    イベントごとに加減算する。平均値（リードタイム・復旧時間）と変更失敗率は
+    ポーリング収集時と同じ標本数（リードタイム 20 件・復旧時間 10 件・期間内の
+    クローズ済み PR 数）を重みとして新しい標本を加えた移動平均で更新する。
+    期間（30 日）から外れた分の減算は行わないため、定期的なポーリング収集
+    （--incremental）で補正する。
+    """
+    
+    EVENTS = ('pull_request', 'issues', 'release', 'push')
+    # ポーリング収集の DORA 計算で平均に使う件数（_average_lead_time_hours 等と同じ）
+    LEAD_TIME_SAMPLES = 20
+    RECOVERY_SAMPLES = 10
+    FIX_KEYWORDS = ['hotfix', 'bugfix', 'fix:', 'bug:']
+    
+    def __init__(self, db: MetricsDatabase, org: str):
+        self.db = db
+        self.org = org
+    
+    def handlers(self) -> Dict[str, Callable[[str, str, Dict], Dict]]:
+        """イベント種別ごとの処理（WebhookServer に渡す）"""
+        return {event: self.handle for event in self.EVENTS}
+    
+    def handle(self, event: str, delivery_id: str, payload: Dict) -> Dict[str, Any]:
+        """1 件の配信を反映し、レスポンスの metadata を返す"""
+        repository = payload.get('repository') or {}
+        owner = (repository.get('owner') or {}).get('login', '')
+        action = payload.get('action', event)
+        metadata = {
+            'repository': repository.get('full_name'),
+            'sender': (payload.get('sender') or {}).get('login'),
+            'action': action
+        }
+        if not repository.get('name') or owner.lower() != self.org.lower():
+            return {**metadata, 'applied': False, 'reason': 'other_organization'}
+        
+        update = getattr(self, f"_on_{event}")(payload)
+        result = self.db.apply_event(delivery_id, event, repository['name'], update)
+        if result.get('applied'):
+            logger.info(f"Webhook 反映: {repository['name']} {event}.{action} {result['changes']}")
+        return {**metadata, **result}
+    
+    @staticmethod
+    def _epoch(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    
+    @staticmethod
+    def _moving_average(average: Optional[float], samples: int, value: float) -> float:
+        """samples 件の平均に 1 件加えた平均"""
+        samples = max(0, samples or 0)
+        return ((average or 0.0) * samples + value) / (samples + 1)
+    
+    def _on_pull_request(self, payload: Dict) -> Callable[[Dict], Dict]:
+        action = payload.get('action')
+        pr = payload.get('pull_request') or {}
+        
+        def update(row: Dict) -> Dict:
+            opened = row['pull_requests_open'] or 0
+            closed = row['pull_requests_closed'] or 0
+            if action == 'opened':
+                return {'pull_requests_open': opened + 1}
+            if action == 'reopened':
+                return {'pull_requests_open': opened + 1,
+                        'pull_requests_closed': max(0, closed - 1)}
+            if action != 'closed':
+                return {}
+            
+            title = (pr.get('title') or '').lower()
+            is_fix = any(keyword in title for keyword in self.FIX_KEYWORDS)
+            changes = {
+                'pull_requests_open': max(0, opened - 1),
+                'pull_requests_closed': closed + 1,
+                'change_failure_rate': self._moving_average(
+                    row['change_failure_rate'], closed, float(is_fix)
+                )
+            }
+            created, merged = self._epoch(pr.get('created_at')), self._epoch(pr.get('merged_at'))
+            if created is not None and merged is not None:
+                changes['lead_time_hours'] = self._moving_average(
+                    row['lead_time_hours'], min(closed, self.LEAD_TIME_SAMPLES),
+                    (merged - created) / 3600
+                )
+            return changes
+        return update
+    
+    def _on_issues(self, payload: Dict) -> Callable[[Dict], Dict]:
+        action = payload.get('action')
+        issue = payload.get('issue') or {}
+        
+        def update(row: Dict) -> Dict:
+            opened = row['issues_open'] or 0
+            closed = row['issues_closed'] or 0
+            if action == 'opened':
+                return {'issues_open': opened + 1}
+            if action == 'reopened':
+                return {'issues_open': opened + 1, 'issues_closed': max(0, closed - 1)}
+            if action != 'closed':
+                return {}
+            
+            changes = {'issues_open': max(0, opened - 1), 'issues_closed': closed + 1}
+            # ポーリング収集と同じく bug かつ critical ラベルの Issue を復旧時間の標本とする
+            labels = {label.get('name') for label in issue.get('labels') or []}
+            created, closed_at = self._epoch(issue.get('created_at')), self._epoch(issue.get('closed_at'))
+            if {'bug', 'critical'} <= labels and created is not None and closed_at is not None:
+                changes['recovery_time_minutes'] = self._moving_average(
+                    row['recovery_time_minutes'], min(closed, self.RECOVERY_SAMPLES),
+                    (closed_at - created) / 60
+                )
+            return changes
+        return update
+    
+    def _on_release(self, payload: Dict) -> Callable[[Dict], Dict]:
+        action = payload.get('action')
+        
+        def update(row: Dict) -> Dict:
+            if action != 'published':
+                return {}
+            # 週次頻度は過去 30 日のリリース数 / 4
+            return {'deployment_frequency': (row['deployment_frequency'] or 0.0) + 0.25}
+        return update
+    
+    def _on_push(self, payload: Dict) -> Callable[[Dict], Dict]:
+        default_branch = (payload.get('repository') or {}).get('default_branch')
+        commits = payload.get('commits') or []
+        
+        def update(row: Dict) -> Dict:
+            if payload.get('ref') != f"refs/heads/{default_branch}" or not commits:
+                return {}
+            return {'commits_count': (row['commits_count'] or 0) + len(commits)}
+        return update
+
+def collect_metrics(args, collector: GitHubCollector, database: MetricsDatabase,
+                    journal: RunJournal, repositories: Iterable[Dict]) -> int:
+    """リポジトリのメトリクスを収集・保存し、保持期間を適用する（収集したリポジトリ数を返す）"""
+    profiler = collector.profiler
+    cache = collector.cache
+    
+    # 再開時は完了済みリポジトリを除外する
+    repositories = journal.skip_done(repositories, key=lambda repo: repo['name'])
+    
+    # 差分収集: 一覧上の pushed_at 等が前回から変わったリポジトリのみ収集する
+    repo_info: Dict[str, Dict] = {}
+    if args.incremental:
+        repositories = database.select_changed(
+            repositories, args.max_staleness_days,
+            on_carried=lambda repo: journal.mark_done(repo['name'])
+        )
+    
+    def track(repos: Iterable[Dict]) -> Iterator[Dict]:
+        for repo in repos:
+            repo_info[repo['name']] = repo
+            yield repo
+    
+    def store(metrics: GitHubMetrics):
+        database.save_metrics(metrics)
+        repo = repo_info.pop(metrics.repository, None)
+        if args.incremental and repo:
+            database.save_watermark(repo, metrics.timestamp)
+        journal.mark_done(metrics.repository)
+        logger.info(f"収集完了: {metrics.repository}")
+    
+    repositories = track(repositories)
+    logger.info(f"メトリクス収集開始 (ワーカー数: {args.workers})")
+    collected = 0
+    
+    # DB 書き込みはまとめてコミットする（WAL・永続接続）
+    with database.writer() as writer:
+        if args.graphql:
+            for metrics in collector.get_repositories_metrics(
+                (r['name'] for r in repositories),
+                on_error=lambda repo_name, e: journal.mark_failed(repo_name, str(e))
+            ):
+                store(metrics)
+                collected += 1
+        elif args.workers == 1:
+            for repo in repositories:
+                repo_name = repo['name']
+                try:
+                    store(collector.get_repository_metrics(repo_name))
+                    collected += 1
+                except Exception as e:
+                    logger.error(f"収集エラー ({repo_name}): {e}")
+                    journal.mark_failed(repo_name, str(e))
+                    continue
+        else:
+            # API 呼び出しのみをワーカーに分散し、DB 書き込みはメインスレッドで直列に行う。
+            # 投入はワーカー数の 2 倍までに抑え、一覧は完了に合わせて読み進める
+            # （一覧の後続ページは iter_repositories が先読みしている）
+            max_in_flight = args.workers * 2
+            in_flight: Dict[Future, str] = {}
+            exhausted = False
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                try:
+                    while True:
+                        while not exhausted and len(in_flight) < max_in_flight:
+                            repo = next(repositories, None)
+                            if repo is None:
+                                exhausted = True
+                                break
+                            future = executor.submit(collector.get_repository_metrics, repo['name'])
+                            in_flight[future] = repo['name']
+                        if not in_flight:
+                            break
+                        
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            repo_name = in_flight.pop(future)
+                            try:
+                                store(future.result())
+                                collected += 1
+                            except Exception as e:
+                                logger.error(f"収集エラー ({repo_name}): {e}")
+                                journal.mark_failed(repo_name, str(e))
+                except KeyboardInterrupt:
+                    # 未着手の収集は破棄し、完了分のみ書き込んで終了する
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+    
+    logger.info(f"メトリクス収集完了: {collected} リポジトリ "
+                f"(DB 書き込み {writer.written} 件 / コミット {writer.commits} 回)")
+    with profiler.span('apply_retention', 'database'):
+        database.apply_retention(args.retention_days, args.downsample_after_days)
+    if cache:
+        logger.info(f"レスポンスキャッシュ: {cache.summary()}")
+    logger.info(f"API rate limit: {collector.rate_limiter.summary()}")
+    return collected
+
+def write_reports(args, report_generator: ReportGenerator, output_dir: Path, profiler: Profiler):
+    """--report で指定したレポートを出力"""
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    
+    if args.report in ['dora', 'all']:
+        dora_file = output_dir / f'dora-report-{timestamp}.json'
+        with profiler.span('write_dora_report', 'report'):
+            report_generator.write_dora_report(args.org, dora_file, args.days)
+        logger.info(f"DORA レポート生成: {dora_file}")
+    
+    if args.report in ['security', 'all']:
+        security_file = output_dir / f'security-report-{timestamp}.json'
+        with profiler.span('write_security_report', 'report'):
+            report_generator.write_security_report(args.org, security_file, args.days)
+        logger.info(f"セキュリティレポート生成: {security_file}")
+
+def run_daemon(args, collector: GitHubCollector, database: MetricsDatabase,
+               report_generator: ReportGenerator, output_dir: Path):
+    """--daemon モード（収集とレポート生成を別々の間隔で繰り返す）
+    
+    HTTP 接続プール・レスポンスキャッシュ・rate limit の状態・データベース接続は
+    実行間で使い回す。リポジトリは直近に push されたものから順に収集する。
+    """
+    def collect():
+        journal = database.journal(args.org)
+        logger.info(f"実行 ID: {journal.run_id}")
+        try:
+            if args.repos:
+                repositories = [{'name': repo} for repo in args.repos]
+            else:
+                repositories = order_by_recent_push(collector.iter_repositories())
+            collect_metrics(args, collector, database, journal, repositories)
+        except BaseException as e:
+            journal.finish('interrupted' if isinstance(e, KeyboardInterrupt) else 'failed')
+            raise
+        journal.finish('completed')
+    
+    scheduler = Scheduler()
+    scheduler.add('collect', args.collect_interval * 60, collect)
+    scheduler.add('report', args.report_interval * 60,
+                  lambda: write_reports(args, report_generator, output_dir, collector.profiler))
+    scheduler.install_signal_handlers()
+    control = None
+    if args.control_port:
+        control = ControlServer((args.control_host, args.control_port), scheduler)
+        control.start()
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        logger.info("処理が中断されました")
+    finally:
+        if control is not None:
+            control.shutdown()
+            control.server_close()
+
+def run_export(args) -> int:
+    """export サブコマンド"""
+    database = MetricsDatabase()
+    output_path = Path(args.output_file) if args.output_file else (
+        Path('./exports') /
+        f"metrics-history-{datetime.now().strftime('%Y%m%d-%H%M%S')}{MetricsExporter.FORMATS[args.format]}"
+    )
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    since = datetime.now() - timedelta(days=args.since_days) if args.since_days else None
+    
+    try:
+        exporter = MetricsExporter(database, args.chunk_size)
+        written = exporter.export(args.format, output_path, since)
+        logger.info(f"メトリクス履歴エクスポート完了: {output_path} ({written} 行)")
+        return written
+    finally:
+        database.close()
+
+def run_webhook(args):
+    """webhook サブコマンド（受信サーバー）"""
+    database = MetricsDatabase()
+    ingestor = WebhookIngestor(database, args.org)
+    server = WebhookServer((args.host, args.port), args.webhook_secret, ingestor.handlers(),
+                           path=args.path, record_path=args.record)
+    logger.info(f"Webhook 受信開始: http://{args.host}:{args.port}{args.path} "
+                f"(イベント: {', '.join(WebhookIngestor.EVENTS)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Webhook 受信を停止します")
+    finally:
+        server.server_close()
+        database.close()
+        logger.info(f"Webhook 処理件数: {server.stats()}")
+
+def run_webhook_replay(args) -> bool:
+    """webhook-replay サブコマンド（記録済み配信の再送）"""
+    statuses = replay(args.url, args.file, args.webhook_secret)
+    logger.info(f"再送完了: {statuses}")
+    return set(statuses) <= {200}
 
 def main():
     """メイン処理"""
+    setup_logging()
     parser = argparse.ArgumentParser(description='GitHub Analytics データ収集')
-    parser.add_argument('--org', required=True, help='GitHub組織名')
+    parser.add_argument('--org', help='GitHub組織名（収集時は必須）')
     parser.add_argument('--token', help='GitHub API トークン (環境変数 GITHUB_TOKEN を使用可能)')
     parser.add_argument('--repos', nargs='*', help='特定のリポジトリのみ収集')
     parser.add_argument('--report', choices=['dora', 'security', 'all'], 
                        default='all', help='生成するレポート種別')
     parser.add_argument('--days', type=int, default=30, help='分析期間（日数）')
     parser.add_argument('--output', default='./reports', help='出力ディレクトリ')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='並列収集ワーカー数（1 の場合は逐次収集）')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                       help='HTTP 接続プールサイズ（ワーカー数未満の場合はワーカー数に合わせる）')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='レスポンスキャッシュ（条件付きリクエスト）を使用しない')
+    parser.add_argument('--graphql', action='store_true',
+                       help='GraphQL API で複数リポジトリをまとめて収集する')
+    parser.add_argument('--batch-size', type=int, default=25,
+                       help='GraphQL モードで 1 クエリにまとめるリポジトリ数')
+    parser.add_argument('--incremental', action='store_true',
+                       help='前回収集以降に変化のないリポジトリは API を呼ばずに前回値を引き継ぐ')
+    parser.add_argument('--max-staleness-days', type=int, default=7,
+                       help='差分収集時でもこの日数を超えたリポジトリは再収集する')
+    parser.add_argument('--dora-thresholds',
+                       help='DORA レベル判定閾値の JSON ファイル（例: {"Elite": {"lead_time_hours": 2}}）')
+    parser.add_argument('--resume', metavar='RUN_ID',
+                       help='中断した実行を再開する（完了済みリポジトリはスキップ）')
+    parser.add_argument('--retention-days', type=int, default=90,
+                       help='raw スナップショットの保持日数（0 で無期限。集計テーブルは保持）')
+    parser.add_argument('--downsample-after-days', type=int, default=7,
+                       help='この日数より古い raw スナップショットは 1 日 1 件に間引く（0 で無効）')
+    parser.add_argument('--profile', metavar='PATH',
+                       help='エンドポイント別・処理別の計測結果を書き出すファイル')
+    parser.add_argument('--profile-format', choices=PROFILE_FORMATS, default='json',
+                       help='--profile の形式（chrome: chrome://tracing / Perfetto 用トレース）')
+    parser.add_argument('--daemon', action='store_true',
+                       help='常駐して収集とレポート生成を定期実行する（SIGUSR1 で即時実行）')
+    parser.add_argument('--collect-interval', type=float, default=60,
+                       help='--daemon 時の収集間隔（分）')
+    parser.add_argument('--report-interval', type=float, default=360,
+                       help='--daemon 時のレポート生成間隔（分）')
+    parser.add_argument('--control-host', default='127.0.0.1',
+                       help='--daemon 時の制御エンドポイントの待ち受けアドレス')
+    parser.add_argument('--control-port', type=int, default=0,
+                       help='--daemon 時の制御エンドポイントのポート（GET /status, POST /refresh。0 で無効）')
+    
+    subparsers = parser.add_subparsers(dest='command')
+    export_parser = subparsers.add_parser('export', help='メトリクス履歴を JSON Lines / Parquet / Arrow IPC で出力')
+    export_parser.add_argument('--format', choices=list(MetricsExporter.FORMATS), required=True,
+                               help='出力形式')
+    export_parser.add_argument('--output-file', help='出力ファイル（省略時は ./exports/ 配下）')
+    export_parser.add_argument('--since-days', type=int,
+                               help='指定日数以内のスナップショットのみ出力（省略時は全件）')
+    export_parser.add_argument('--chunk-size', type=int, default=10000,
+                               help='1 回に読み出す行数')
+    
+    webhook_parser = subparsers.add_parser(
+        'webhook', help='GitHub Webhook を受信してメトリクスを増分更新（ポーリングは補正用に低頻度で実行）'
+    )
+    webhook_parser.add_argument('--host', default='127.0.0.1', help='待ち受けアドレス')
+    webhook_parser.add_argument('--port', type=int, default=8080, help='待ち受けポート')
+    webhook_parser.add_argument('--path', default=DEFAULT_WEBHOOK_PATH, help='受信パス')
+    webhook_parser.add_argument('--webhook-secret',
+                                help='Webhook シークレット (環境変数 GITHUB_WEBHOOK_SECRET を使用可能)')
+    webhook_parser.add_argument('--record', metavar='FILE',
+                                help='検証済みの配信を JSON Lines で追記する（webhook-replay で再送可能）')
+    
+    replay_parser = subparsers.add_parser('webhook-replay', help='記録済みの配信を署名付きで再送')
+    replay_parser.add_argument('file', help='webhook --record で記録した JSON Lines ファイル')
+    replay_parser.add_argument('--url', default=f'http://127.0.0.1:8080{DEFAULT_WEBHOOK_PATH}',
+                               help='送信先 URL')
+    replay_parser.add_argument('--webhook-secret',
+                               help='Webhook シークレット (環境変数 GITHUB_WEBHOOK_SECRET を使用可能)')
     
     args = parser.parse_args()
     
+    if args.command == 'export':
+        try:
+            run_export(args)
+        except RuntimeError as e:
+            logger.error(str(e))
+            sys.exit(1)
+        return
+    
+    if args.command in ('webhook', 'webhook-replay'):
+        args.webhook_secret = args.webhook_secret or os.getenv('GITHUB_WEBHOOK_SECRET')
+        if not args.webhook_secret:
+            logger.error("Webhook シークレットが必要です。--webhook-secret または "
+                         "GITHUB_WEBHOOK_SECRET 環境変数を設定してください。")
+            sys.exit(1)
+        if args.command == 'webhook-replay':
+            if not run_webhook_replay(args):
+                sys.exit(1)
+            return
+        if not args.org:
+            parser.error('--org を指定してください')
+        run_webhook(args)
+        return
+    
+    if not args.org:
+        parser.error('--org を指定してください')
+    if args.workers < 1:
+        parser.error('--workers は 1 以上を指定してください')
+    if not 1 <= args.batch_size <= 100:
+        parser.error('--batch-size は 1〜100 の範囲で指定してください')
+    if args.daemon and args.resume:
+        parser.error('--daemon と --resume は同時に指定できません')
+    if args.collect_interval <= 0 or args.report_interval <= 0:
+        parser.error('--collect-interval / --report-interval は正の値を指定してください')
+    try:
+        dora_thresholds = load_dora_thresholds(args.dora_thresholds)
+    except (OSError, ValueError) as e:
+        parser.error(f'--dora-thresholds を読み込めません: {e}')
+    
     # GitHub token 取得
     token = args.token or os.getenv('GITHUB_TOKEN')
     if not token:
@@ -470,57 +1854,69 @@ def main():
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # コンポーネント初期化
-    collector = GitHubCollector(token, args.org)
+    cache = None if args.no_cache else ResponseCache()
+    profiler = Profiler(trace=bool(args.profile) and args.profile_format == 'chrome')
+    pool_size = max(args.pool_size, args.workers)
+    if args.graphql:
+        collector = GraphQLCollector(token, args.org, batch_size=args.batch_size,
+                                     pool_size=pool_size, cache=cache, profiler=profiler)
+    else:
+        collector = GitHubCollector(token, args.org, pool_size, cache, profiler=profiler)
     database = MetricsDatabase()
-    report_generator = ReportGenerator(database)
+    report_generator = ReportGenerator(database, dora_thresholds)
+    
+    if args.daemon:
+        try:
+            run_daemon(args, collector, database, report_generator, output_dir)
+        finally:
+            database.close()
+            if cache:
+                cache.close()
+            print("\n=== プロファイル ===")
+            print(profiler.format_summary())
+            if args.profile:
+                profiler.write(args.profile, args.profile_format)
+                logger.info(f"プロファイル出力: {args.profile} ({args.profile_format})")
+        return
+    
+    try:
+        journal = database.journal(args.org, args.resume)
+    except ValueError as e:
+        parser.error(str(e))
+    logger.info(f"実行 ID: {journal.run_id}")
     
     try:
         # データ収集
+        # 一覧はページ単位で届き次第、リポジトリごとの収集を開始する
         if args.repos:
             repositories = [{'name': repo} for repo in args.repos]
         else:
-            repositories = collector.get_repositories()
-        
-        logger.info(f"メトリクス収集開始: {len(repositories)} リポジトリ")
-        
-        for repo in repositories:
-            repo_name = repo['name']
-            try:
-                metrics = collector.get_repository_metrics(repo_name)
-                database.save_metrics(metrics)
-                logger.info(f"収集完了: {repo_name}")
-                
-                # API rate limit 対策
-                time.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"収集エラー ({repo_name}): {e}")
-                continue
+            repositories = collector.iter_repositories()
+        collect_metrics(args, collector, database, journal, repositories)
         
         # レポート生成
-        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-        
-        if args.report in ['dora', 'all']:
-            dora_report = report_generator.generate_dora_report(args.org, args.days)
-            dora_file = output_dir / f'dora-report-{timestamp}.json'
-            with open(dora_file, 'w', encoding='utf-8') as f:
-                json.dump(dora_report, f, indent=2, ensure_ascii=False)
-            logger.info(f"DORA レポート生成: {dora_file}")
-        
-        if args.report in ['security', 'all']:
-            security_report = report_generator.generate_security_report(args.org, args.days)
-            security_file = output_dir / f'security-report-{timestamp}.json'
-            with open(security_file, 'w', encoding='utf-8') as f:
-                json.dump(security_report, f, indent=2, ensure_ascii=False)
-            logger.info(f"セキュリティレポート生成: {security_file}")
+        write_reports(args, report_generator, output_dir, profiler)
         
+        journal.finish('completed')
+        database.close()
         logger.info("GitHub Analytics データ収集完了")
         
     except KeyboardInterrupt:
         logger.info("処理が中断されました")
+        journal.finish('interrupted')
     except Exception as e:
         logger.error(f"予期しないエラー: {e}")
+        journal.finish('failed')
         sys.exit(1)
+    finally:
+        if cache:
+            cache.close()
+        # 中断・失敗時もそこまでの計測結果を出力する
+        print("\n=== プロファイル ===")
+        print(profiler.format_summary())
+        if args.profile:
+            profiler.write(args.profile, args.profile_format)
+            logger.info(f"プロファイル出力: {args.profile} ({args.profile_format})")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+実行プロファイル計測
+エス・エー・エス株式会社
+
+用途: monitoring-collector.py / guideline-compliance-checker.py で共有する
+      エンドポイント別・チェック別の所要時間計測と、サマリー表・
+      プロファイル（JSON / Chrome trace 形式）の出力
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from urllib.parse import urlparse
+
+# プロファイル出力形式
+PROFILE_FORMATS = ('json', 'chrome')
+
+# URL パスをエンドポイントテンプレートに置き換える規則（先頭から順に適用）
+ENDPOINT_PATTERNS = [
+    (re.compile(r'^repos/[^/]+/[^/]+'), 'repos/{org}/{repo}'),
+    (re.compile(r'^orgs/[^/]+'), 'orgs/{org}'),
+    (re.compile(r'/contents/.+$'), '/contents/{path}'),
+    (re.compile(r'/branches/[^/]+'), '/branches/{branch}'),
+    (re.compile(r'/\d+(?=/|$)'), '/{id}'),
+]
+
+def endpoint_template(url: str) -> str:
+    """URL からクエリ・組織名・リポジトリ名等を除いたエンドポイントテンプレート"""
+    path = urlparse(url).path.strip('/')
+    for pattern, replacement in ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+@dataclass
+class EndpointStats:
+    """エンドポイントテンプレート単位の集計"""
+    requests: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    bytes: int = 0
+    cache_hits: int = 0
+    rate_limit_wait: float = 0.0
+    errors: int = 0
+
+@dataclass
+class SpanStats:
+    """チェック・処理単位の集計"""
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+class Profiler:
+    """エンドポイント別・チェック別の計測
+
+    所要時間は待機（rate limit）・再試行を含む壁時計時間。並列実行時は
+    各呼び出しの時間を合算するため、合計が実行時間を超えることがある。
+    trace=True の場合は個々の呼び出しを Chrome trace のイベントとして保持する。
+    複数スレッドから共有可能。
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.spans: Dict[str, SpanStats] = {}
+        self._events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+
+    def record_request(self, method: str, url: str, seconds: float, status: Optional[int] = None,
+                       size: int = 0, cache_hit: bool = False, rate_limit_wait: float = 0.0):
+        """HTTP リクエスト 1 件を記録（status が None は通信エラー）"""
+        name = f"{method} {endpoint_template(url)}"
+        with self._lock:
+            stats = self.endpoints.setdefault(name, EndpointStats())
+            stats.requests += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.bytes += size
+            stats.cache_hits += int(cache_hit)
+            stats.rate_limit_wait += rate_limit_wait
+            stats.errors += int(status is None or status >= 400)
+            if self.trace:
+                self._add_event(name, 'http', seconds, {
+                    'url': url, 'status': status, 'bytes': size,
+                    'cache_hit': cache_hit, 'rate_limit_wait': rate_limit_wait
+                })
+
+    @contextmanager
+    def span(self, name: str, category: str = 'check', **trace_args) -> Iterator[None]:
+        """with ブロックの所要時間を name で記録"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                stats = self.spans.setdefault(name, SpanStats())
+                stats.calls += 1
+                stats.seconds += seconds
+                stats.max_seconds = max(stats.max_seconds, seconds)
+                if self.trace:
+                    self._add_event(name, category, seconds, trace_args)
+
+    def _add_event(self, name: str, category: str, seconds: float, args: Dict[str, Any]):
+        """終了時点で記録する Chrome trace の完了イベント（ロック取得済みで呼ぶ）"""
+        end = time.perf_counter() - self._origin
+        self._events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((end - seconds) * 1e6, 1),
+            'dur': round(seconds * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_native_id(),
+            'args': args
+        })
+
+    def format_summary(self, limit: int = 20) -> str:
+        """エンドポイント別・チェック別のサマリー表（合計時間の降順）"""
+        with self._lock:
+            endpoints = sorted(self.endpoints.items(), key=lambda item: -item[1].seconds)[:limit]
+            spans = sorted(self.spans.items(), key=lambda item: -item[1].seconds)[:limit]
+            omitted = (len(self.endpoints) - len(endpoints), len(self.spans) - len(spans))
+
+        lines = _format_table(
+            ['エンドポイント', '回数', '合計(s)', '平均(ms)', '最大(ms)',
+             '転送(KiB)', 'キャッシュ', '待機(s)', 'エラー'],
+            [[name, stats.requests, f"{stats.seconds:.2f}",
+              f"{stats.seconds / stats.requests * 1000:.1f}", f"{stats.max_seconds * 1000:.1f}",
+              f"{stats.bytes / 1024:.1f}", stats.cache_hits, f"{stats.rate_limit_wait:.2f}",
+              stats.errors]
+             for name, stats in endpoints]
+        )
+        if omitted[0]:
+            lines.append(f"... ほか {omitted[0]} エンドポイント")
+
+        if spans:
+            lines.append('')
+            lines.extend(_format_table(
+                ['チェック・処理', '回数', '合計(s)', '平均(ms)', '最大(ms)'],
+                [[name, stats.calls, f"{stats.seconds:.2f}",
+                  f"{stats.seconds / stats.calls * 1000:.1f}", f"{stats.max_seconds * 1000:.1f}"]
+                 for name, stats in spans]
+            ))
+            if omitted[1]:
+                lines.append(f"... ほか {omitted[1]} 件")
+        return '\n'.join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """集計結果（JSON プロファイル）"""
+        with self._lock:
+            return {
+                'started_at': self._started_at,
+                'elapsed_seconds': time.perf_counter() - self._origin,
+                'endpoints': {name: asdict(stats) for name, stats in self.endpoints.items()},
+                'spans': {name: asdict(stats) for name, stats in self.spans.items()}
+            }
+
+    def write(self, path: Union[str, Path], fmt: str = 'json'):
+        """プロファイルをファイルに書き出す（chrome は chrome://tracing / Perfetto で表示可能）"""
+        if fmt not in PROFILE_FORMATS:
+            raise ValueError(f"未対応のプロファイル形式です: {fmt}")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if fmt == 'chrome':
+            with self._lock:
+                events = list(self._events)
+            payload = {
+                'traceEvents': events,
+                'displayTimeUnit': 'ms',
+                'otherData': self.to_dict()
+            }
+        else:
+            payload = self.to_dict()
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2 if fmt == 'json' else None)
+
+def _display_width(text: str) -> int:
+    """端末上の表示幅（全角文字は 2 桁）"""
+    return sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+
+def _format_table(header: List[str], rows: List[List[Any]]) -> List[str]:
+    """1 列目を左寄せ、それ以外を右寄せにした表"""
+    cells = [header] + [[str(value) for value in row] for row in rows]
+    widths = [max(_display_width(row[i]) for row in cells) for i in range(len(header))]
+    lines = []
+    for row in cells:
+        padded = [
+            value + ' ' * (widths[i] - _display_width(value)) if i == 0
+            else ' ' * (widths[i] - _display_width(value)) + value
+            for i, value in enumerate(row)
+        ]
+        lines.append('  '.join(padded))
+    return lines
+
+def profiled(func: Callable) -> Callable:
+    """メソッドの所要時間を self.profiler にメソッド名で記録するデコレータ"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.profiler.span(func.__name__):
+            return func(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+レポート逐次書き込み
+エス・エー・エス株式会社
+
+用途: monitoring-collector.py / guideline-compliance-checker.py で共有する
+      JSON / JSON Lines レポートのストリーミング出力
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+def _to_json_value(value: Any) -> Any:
+    """json モジュールが扱えない numpy スカラー等を Python 値に変換"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _dumps(value: Any, indent: Optional[int], level: int = 0) -> str:
+    text = json.dumps(value, indent=indent, ensure_ascii=False, default=_to_json_value)
+    if indent and level:
+        text = text.replace('\n', '\n' + ' ' * (indent * level))
+    return text
+
+class JsonReportWriter:
+    """JSON オブジェクトを先頭から逐次書き込むライター
+
+    フィールドと配列要素を届いた順にファイルへ書き出すため、配列全体を
+    メモリに保持しない。出力は json.dump(..., indent=2) と同じ形式になる。
+    """
+
+    def __init__(self, path: Union[str, Path], indent: Optional[int] = 2):
+        self.path = Path(path)
+        self.indent = indent
+        self.items_written = 0
+        self._file = None
+        self._first_field = True
+        self._in_array = False
+
+    def __enter__(self) -> 'JsonReportWriter':
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write('{')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._in_array:
+            self.end_array()
+        self._file.write(self._newline(0) + '}\n')
+        self._file.close()
+
+    def _newline(self, level: int) -> str:
+        return '\n' + ' ' * (self.indent * level) if self.indent else ''
+
+    def _key(self, key: str):
+        if self._in_array:
+            raise RuntimeError("配列の書き込み中はフィールドを追加できません")
+        separator = '' if self._first_field else ','
+        self._file.write(f"{separator}{self._newline(1)}{json.dumps(key, ensure_ascii=False)}: ")
+        self._first_field = False
+
+    def write_field(self, key: str, value: Any):
+        """フィールドを 1 つ書き込む"""
+        self._key(key)
+        self._file.write(_dumps(value, self.indent, 1))
+
+    def write_fields(self, fields: Dict[str, Any]):
+        """複数フィールドを順に書き込む"""
+        for key, value in fields.items():
+            self.write_field(key, value)
+
+    def begin_array(self, key: str):
+        """配列フィールドを開始（以降 write_item で要素を追加）"""
+        self._key(key)
+        self._file.write('[')
+        self._in_array = True
+        self._first_item = True
+
+    def write_item(self, item: Any):
+        """配列要素を 1 件書き込み、すぐにディスクへ反映する"""
+        separator = '' if self._first_item else ','
+        self._file.write(f"{separator}{self._newline(2)}{_dumps(item, self.indent, 2)}")
+        self._file.flush()
+        self._first_item = False
+        self.items_written += 1
+
+    def write_items(self, items: Iterable[Any]):
+        """配列要素をまとめて書き込む（チャンク単位で 1 回だけエンコード・フラッシュ）"""
+        items = list(items)
+        if not items:
+            return
+        text = _dumps(items, self.indent, 1)
+        separator = '' if self._first_item else ','
+        self._file.write(separator + text[1:text.rindex(']')].rstrip())
+        self._file.flush()
+        self._first_item = False
+        self.items_written += len(items)
+
+    def end_array(self):
+        """配列フィールドを閉じる"""
+        self._file.write((self._newline(1) if not self._first_item else '') + ']')
+        self._in_array = False
+
+class JsonLinesWriter:
+    """JSON Lines（1 行 1 レコード）ライター"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.records_written = 0
+        self._file = None
+
+    def __enter__(self) -> 'JsonLinesWriter':
+        self._file = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+
+    def write(self, record: Dict[str, Any]):
+        """レコードを 1 行書き込み、すぐにディスクへ反映する"""
+        self._file.write(_dumps(record, None) + '\n')
+        self._file.flush()
+        self.records_written += 1
+
+    def write_many(self, records: Iterable[Dict[str, Any]]):
+        """レコードをまとめて書き込む（フラッシュは 1 回）"""
+        lines = [_dumps(record, None) + '\n' for record in records]
+        self._file.writelines(lines)
+        self._file.flush()
+        self.records_written += len(lines)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+実行ジャーナル
+エス・エー・エス株式会社
+
+用途: monitoring-collector.py / guideline-compliance-checker.py の実行単位
+      （実行 ID・対象リポジトリ・リポジトリごとの完了状態）を記録し、
+      中断した実行を --resume <run-id> で再開できるようにする
+"""
+
+import json
+import logging
+import secrets
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# ジャーナル専用データベースのデフォルトパス
+DEFAULT_JOURNAL_PATH = './data/run-journal.db'
+
+# 完了済み実行の保持日数
+DEFAULT_JOURNAL_RETENTION_DAYS = 30
+
+T = TypeVar('T')
+
+class RunJournal:
+    """1 回の実行の進捗記録
+
+    完了したリポジトリは mark_done で記録し、再開時は skip_done で除外する。
+    commit を渡すと、記録のコミットを呼び出し側のトランザクションに合わせられる
+    （メトリクスと完了状態を同じコミットで永続化するため）。
+    """
+
+    def __init__(self, conn: sqlite3.Connection, tool: str, org: str,
+                 run_id: Optional[str] = None, commit: Optional[Callable[[], None]] = None):
+        self._conn = conn
+        self._commit = commit or conn.commit
+        self.tool = tool
+        self.org = org
+        self.resumed = run_id is not None
+        self._init_tables()
+
+        if run_id is None:
+            self._prune()
+            self.run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+            now = datetime.now().isoformat()
+            self._conn.execute(
+                "INSERT INTO runs (run_id, tool, org, status, started_at, updated_at) "
+                "VALUES (?, ?, ?, 'running', ?, ?)",
+                (self.run_id, tool, org, now, now)
+            )
+        else:
+            row = self._conn.execute(
+                "SELECT tool, org, status FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"実行 ID が見つかりません: {run_id}")
+            if (row[0], row[1]) != (tool, org):
+                raise ValueError(f"実行 ID {run_id} は {row[0]} ({row[1]}) の実行です")
+            if row[2] == 'completed':
+                raise ValueError(f"実行 ID {run_id} は完了済みです")
+            self.run_id = run_id
+            self._set_status('running')
+        self._commit()
+
+    @classmethod
+    def open(cls, tool: str, org: str, run_id: Optional[str] = None,
+             db_path: str = DEFAULT_JOURNAL_PATH) -> 'RunJournal':
+        """専用データベースのジャーナルを開く"""
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return cls(conn, tool, org, run_id)
+
+    def _init_tables(self):
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                tool TEXT NOT NULL,
+                org TEXT NOT NULL,
+                status TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_items (
+                run_id TEXT NOT NULL,
+                item TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (run_id, item)
+            ) WITHOUT ROWID
+        """)
+
+    def _prune(self, days: int = DEFAULT_JOURNAL_RETENTION_DAYS):
+        """保持期間を過ぎた実行を削除"""
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        self._conn.execute(
+            "DELETE FROM run_items WHERE run_id IN "
+            "(SELECT run_id FROM runs WHERE updated_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,))
+
+    def _set_status(self, status: str):
+        self._conn.execute(
+            "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?",
+            (status, datetime.now().isoformat(), self.run_id)
+        )
+
+    def _set_item(self, item: str, status: str, result: Optional[str] = None):
+        self._conn.execute(
+            "INSERT INTO run_items (run_id, item, status, result, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (run_id, item) DO UPDATE SET "
+            "status = excluded.status, result = excluded.result, updated_at = excluded.updated_at",
+            (self.run_id, item, status, result, datetime.now().isoformat())
+        )
+
+    def skip_done(self, items: Iterable[T], key: Callable[[T], str] = str) -> Iterator[T]:
+        """完了済みを除外しつつ、対象リポジトリを計画として記録する"""
+        done = {
+            row[0] for row in self._conn.execute(
+                "SELECT item FROM run_items WHERE run_id = ? AND status = 'done'", (self.run_id,)
+            )
+        }
+        skipped = 0
+        for item in items:
+            name = key(item)
+            if name in done:
+                skipped += 1
+                continue
+            self._conn.execute(
+                "INSERT OR IGNORE INTO run_items (run_id, item, status, updated_at) "
+                "VALUES (?, ?, 'pending', ?)",
+                (self.run_id, name, datetime.now().isoformat())
+            )
+            yield item
+        if self.resumed:
+            logger.info(f"再開: 完了済み {skipped} リポジトリをスキップしました")
+
+    def mark_done(self, item: str, result: Optional[Dict[str, Any]] = None):
+        """リポジトリの完了を記録（result は再開時に iter_results で復元される）"""
+        self._set_item(item, 'done',
+                       json.dumps(result, ensure_ascii=False) if result is not None else None)
+        self._commit()
+
+    def mark_failed(self, item: str, error: str):
+        """リポジトリの失敗を記録（再開時に再実行される）"""
+        self._set_item(item, 'failed', error)
+        self._commit()
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """完了済みリポジトリの記録済み結果"""
+        cursor = self._conn.execute(
+            "SELECT result FROM run_items WHERE run_id = ? AND status = 'done' "
+            "AND result IS NOT NULL ORDER BY updated_at", (self.run_id,)
+        )
+        for (result,) in cursor:
+            yield json.loads(result)
+
+    def progress(self) -> Dict[str, int]:
+        """状態ごとのリポジトリ数"""
+        return dict(self._conn.execute(
+            "SELECT status, COUNT(*) FROM run_items WHERE run_id = ? GROUP BY status",
+            (self.run_id,)
+        ).fetchall())
+
+    def finish(self, status: str = 'completed'):
+        """実行の終了状態を記録（completed / interrupted / failed）"""
+        self._set_status(status)
+        self._commit()
+        logger.info(f"実行 {self.run_id}: {status} {self.progress()}")
+        if status != 'completed':
+            logger.info(f"--resume {self.run_id} で再開できます")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+定期実行スケジューラー
+エス・エー・エス株式会社
+
+用途: monitoring-collector.py / guideline-compliance-checker.py の --daemon モードで、
+      収集・チェック・レポート生成をそれぞれの間隔で繰り返し実行する。
+      SIGUSR1 または制御エンドポイント（POST /refresh）で即時実行を要求できる
+"""
+
+import json
+import logging
+import signal
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ScheduledJob:
+    """定期実行ジョブ（時刻は time.monotonic() 基準）"""
+    name: str
+    interval: float
+    func: Callable[[], Any]
+    next_run: float = 0.0
+    runs: int = 0
+    failures: int = 0
+    running: bool = False
+    last_started_at: Optional[str] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+
+class Scheduler:
+    """登録したジョブを間隔ごとに呼び出し元のスレッドで 1 件ずつ実行する
+
+    期限を迎えたジョブが複数ある場合は登録順に実行する。実行中のジョブは
+    中断せず、即時実行の要求・停止は実行中のジョブの完了後に反映する。
+    ジョブの例外はログに記録して次回の実行を続ける。
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._requested: List[str] = []
+        self._refresh_all = False
+        self._stopping = False
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, interval: float, func: Callable[[], Any], run_at_start: bool = True):
+        """ジョブを登録（interval は秒）"""
+        if interval <= 0:
+            raise ValueError(f"実行間隔は正の値を指定してください: {name}")
+        now = time.monotonic()
+        self.jobs[name] = ScheduledJob(name, interval, func,
+                                       next_run=now if run_at_start else now + interval)
+
+    def request(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """ジョブ（省略時は全ジョブ）の即時実行を要求"""
+        names = list(self.jobs) if names is None else list(names)
+        unknown = [name for name in names if name not in self.jobs]
+        if unknown:
+            raise KeyError(f"未登録のジョブです: {', '.join(unknown)}")
+        with self._lock:
+            self._requested.extend(name for name in names if name not in self._requested)
+        self._wakeup.set()
+        return names
+
+    def stop(self):
+        """実行中のジョブの完了後に run_forever を終了する"""
+        self._stopping = True
+        self._wakeup.set()
+
+    def install_signal_handlers(self):
+        """SIGUSR1 で全ジョブの即時実行、SIGTERM で停止
+
+        シグナルハンドラーはメインスレッドで割り込むため、ロックを取らずに
+        フラグのみを設定する。
+        """
+        def refresh(signum, frame):
+            self._refresh_all = True
+            self._wakeup.set()
+
+        def terminate(signum, frame):
+            logger.info("停止要求を受け付けました（実行中のジョブの完了後に終了します）")
+            self.stop()
+
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, refresh)
+        signal.signal(signal.SIGTERM, terminate)
+
+    def _next_job(self) -> Optional[ScheduledJob]:
+        """即時実行の要求、期限を迎えたジョブの順に 1 件選ぶ"""
+        if self._refresh_all:
+            self._refresh_all = False
+            self.request()
+        with self._lock:
+            if self._requested:
+                return self.jobs[self._requested.pop(0)]
+        now = time.monotonic()
+        due = [job for job in self.jobs.values() if job.next_run <= now]
+        return min(due, key=lambda job: job.next_run) if due else None
+
+    def run_forever(self):
+        """stop() されるまでジョブを実行する"""
+        logger.info("スケジューラー開始: " + ", ".join(
+            f"{job.name}={job.interval:g}s" for job in self.jobs.values()
+        ))
+        while not self._stopping:
+            self._wakeup.clear()
+            job = self._next_job()
+            if job is None:
+                timeout = min(job.next_run for job in self.jobs.values()) - time.monotonic()
+                self._wakeup.wait(max(0.0, timeout))
+                continue
+            self._run(job)
+        logger.info("スケジューラー停止")
+
+    def _run(self, job: ScheduledJob):
+        started = time.monotonic()
+        job.running = True
+        job.last_started_at = datetime.now().isoformat()
+        logger.info(f"ジョブ開始: {job.name}")
+        try:
+            job.func()
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.exception(f"ジョブ失敗: {job.name}: {e}")
+        finally:
+            job.running = False
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+            # 次回は開始時刻から interval 後（実行時間が間隔を超えた場合は直ちに）
+            job.next_run = started + job.interval
+            with self._lock:
+                # 実行中に届いた同じジョブの要求は今回の実行で満たされたものとする
+                self._requested = [name for name in self._requested if name != job.name]
+        logger.info(f"ジョブ完了: {job.name} ({job.last_duration:.1f}s, "
+                    f"次回 {job.interval:g}s 後)")
+
+    def status(self) -> Dict[str, Any]:
+        """ジョブごとの実行状況"""
+        now = time.monotonic()
+        return {
+            name: {
+                **{key: value for key, value in asdict(job).items() if key not in ('func', 'next_run')},
+                'next_run_in': max(0.0, round(job.next_run - now, 1))
+            }
+            for name, job in self.jobs.items()
+        }
+
+def order_by_recent_push(repositories: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """直近に push されたリポジトリから順に並べる（pushed_at のないものは最後）"""
+    return sorted(repositories, key=lambda repo: repo.get('pushed_at') or '', reverse=True)
+
+class _ControlRequestHandler(BaseHTTPRequestHandler):
+    server: 'ControlServer'
+
+    def log_message(self, format: str, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/status':
+            self._send_json(200, {'status': 'ok', 'jobs': self.server.scheduler.status()})
+        else:
+            self._send_json(404, {'error': 'NOT_FOUND'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/refresh':
+            self._send_json(404, {'error': 'NOT_FOUND'})
+            return
+        names = parse_qs(url.query).get('job')
+        try:
+            requested = self.server.scheduler.request(names)
+        except KeyError as e:
+            self._send_json(400, {'error': 'UNKNOWN_JOB', 'message': e.args[0]})
+            return
+        logger.info(f"即時実行の要求: {', '.join(requested)}")
+        self._send_json(202, {'status': 'accepted', 'jobs': requested})
+
+class ControlServer(ThreadingHTTPServer):
+    """スケジューラーの制御エンドポイント
+
+    GET /status でジョブの状態を返し、POST /refresh（?job=名前 で対象を指定、
+    省略時は全ジョブ）で即時実行を要求する。認証はないため、ループバック
+    アドレス等の信頼できるネットワークでのみ待ち受ける。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, scheduler: Scheduler):
+        super().__init__(address, _ControlRequestHandler)
+        self.scheduler = scheduler
+
+    def start(self) -> threading.Thread:
+        """バックグラウンドスレッドで待ち受けを開始"""
+        thread = threading.Thread(target=self.serve_forever, name='scheduler-control', daemon=True)
+        thread.start()
+        host, port = self.server_address[:2]
+        logger.info(f"制御エンドポイント: http://{host}:{port} (GET /status, POST /refresh)")
+        return thread
@@ -0,0 +1,40 @@
+"""
+github-automation スクリプト群のテスト共通設定
+
+共有モジュール（github_client.py 等）をインポートできるようスクリプトの
+ディレクトリを sys.path に追加し、ハイフンを含むスクリプト
+（monitoring-collector.py 等）はファイルパスから読み込む。
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+_scripts = {}
+
+def load_script(filename: str):
+    """スクリプトをモジュールとして読み込む（同一ファイルは 1 度だけ）"""
+    if filename not in _scripts:
+        name = filename[:-len('.py')].replace('-', '_')
+        spec = importlib.util.spec_from_file_location(name, SCRIPTS_DIR / filename)
+        module = importlib.util.module_from_spec(spec)
+        # dataclass 等がモジュールを名前で参照するため登録してから実行する
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        _scripts[filename] = module
+    return _scripts[filename]
+
+@pytest.fixture
+def collector_module():
+    """monitoring-collector.py"""
+    return load_script('monitoring-collector.py')
+
+@pytest.fixture
+def checker_module():
+    """guideline-compliance-checker.py"""
+    return load_script('guideline-compliance-checker.py')
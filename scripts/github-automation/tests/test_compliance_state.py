@@ -0,0 +1,121 @@
+"""guideline-compliance-checker.py の ComplianceStateStore のテスト（現在状態・履歴・状態変化）"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+@pytest.fixture
+def store(tmp_path, checker_module):
+    store = checker_module.ComplianceStateStore(str(tmp_path / 'state.db'))
+    yield store
+    store.close()
+
+@pytest.fixture
+def result(checker_module):
+    def make(check_name, status, severity='HIGH', message=None):
+        return checker_module.ComplianceResult(check_name, status, message or f"{check_name}: {status}",
+                                               severity)
+    return make
+
+def scan(store, scope, results_by_check, score, evaluated=None):
+    run_id = store.begin_run('scan')
+    store.save(scope, results_by_check, score, [], run_id=run_id, evaluated=evaluated)
+    return run_id
+
+def changes(transitions):
+    return [(t['repository'], t['check_name'], t['previous_status'], t['status'], t['change'])
+            for t in transitions]
+
+def test_save_replaces_current_state_in_order(store, result):
+    store.save('repo', {'branch_protection': [result('a', 'FAIL'), result('b', 'PASS')],
+                        'security': [result('c', 'WARN')]}, 50.0, ['fix a'])
+    store.save('repo', {'branch_protection': [result('a', 'PASS')],
+                        'security': [result('c', 'PASS')]}, 100.0, [])
+
+    loaded = store.load('repo')
+    assert {group: [(r.check_name, r.status) for r in results]
+            for group, results in loaded.items()} == {
+        'branch_protection': [('a', 'PASS')], 'security': [('c', 'PASS')]
+    }
+    assert store.score('repo') == 100.0
+    [repository] = store.iter_repository_results()
+    assert [check['check_name'] for check in repository['checks']] == ['a', 'c']
+
+def test_transitions_classify_regressions_and_improvements(store, result):
+    first = scan(store, 'repo', {'branch_protection': [result('a', 'PASS'), result('b', 'FAIL')]}, 50.0)
+    second = scan(store, 'repo', {'branch_protection': [result('a', 'FAIL'), result('b', 'PASS')]}, 50.0)
+
+    assert changes(store.transitions(second)) == [
+        ('repo', 'a', 'PASS', 'FAIL', 'regression'),
+        ('repo', 'b', 'FAIL', 'PASS', 'improvement'),
+    ]
+    # 初回の評価は include_new を指定した場合のみ
+    assert store.transitions(first, first) == []
+    assert [t['change'] for t in store.transitions(first, first, include_new=True)] == ['new', 'new']
+
+def test_transitions_compare_against_last_evaluation_of_each_check(store, result):
+    scan(store, 'repo', {'branch_protection': [result('a', 'PASS')],
+                         'security': [result('s', 'PASS')]}, 100.0)
+    # Webhook による再評価は対象チェックだけを履歴に記録する
+    event = store.begin_run('event', 'delivery-1')
+    store.save('repo', {'branch_protection': [result('a', 'FAIL')],
+                        'security': [result('s', 'PASS')]}, 50.0, [],
+               run_id=event, evaluated=['branch_protection'])
+    later = scan(store, 'repo', {'branch_protection': [result('a', 'FAIL')],
+                                 'security': [result('s', 'FAIL')]}, 0.0)
+
+    assert changes(store.transitions(event, event)) == [('repo', 'a', 'PASS', 'FAIL', 'regression')]
+    transitions = store.transitions(later)
+    # a は直前の再評価と同じ FAIL のため変化なし
+    assert changes(transitions) == [('repo', 's', 'PASS', 'FAIL', 'regression')]
+    assert transitions[0]['kind'] == 'scan'
+
+def test_disappeared_failure_counts_as_improvement(store, result):
+    scan(store, 'repo', {'branch_protection': [result('branch_protection', 'FAIL')]}, 0.0)
+    run_id = scan(store, 'repo', {'branch_protection': [result('required_reviews', 'PASS')]}, 100.0)
+
+    assert sorted(changes(store.transitions(run_id))) == [
+        ('repo', 'branch_protection', 'FAIL', None, 'improvement'),
+        ('repo', 'required_reviews', None, 'PASS', 'improvement'),
+    ]
+
+def test_score_changes_since_run(store, result):
+    scan(store, 'a', {'checks': [result('x', 'PASS')]}, 80.0)
+    scan(store, 'b', {'checks': [result('x', 'PASS')]}, 60.0)
+    since = scan(store, 'a', {'checks': [result('x', 'FAIL')]}, 40.0)
+    scan(store, 'b', {'checks': [result('x', 'PASS')]}, 60.0)
+    scan(store, 'c', {'checks': [result('x', 'PASS')]}, 90.0)
+
+    assert store.score_changes(since) == [
+        {'repository': 'a', 'previous_score': 80.0, 'overall_score': 40.0, 'delta': -40.0},
+        {'repository': 'c', 'previous_score': None, 'overall_score': 90.0, 'delta': None},
+    ]
+
+def test_rename_carries_history(store, result):
+    scan(store, 'old-name', {'checks': [result('x', 'PASS')]}, 100.0)
+    store.rename('old-name', 'new-name')
+    run_id = scan(store, 'new-name', {'checks': [result('x', 'FAIL')]}, 0.0)
+
+    assert store.load('old-name') == {}
+    assert changes(store.transitions(run_id)) == [('new-name', 'x', 'PASS', 'FAIL', 'regression')]
+
+def test_prune_repositories_keeps_organization_scope(store, result, checker_module):
+    for scope in ('keep', 'gone', checker_module.ORGANIZATION_SCOPE):
+        store.save(scope, {'checks': [result('x', 'PASS')]}, 100.0)
+
+    assert store.prune_repositories(['keep']) == 1
+    assert store.summary() == {'repositories': 1, 'average_score': 100.0}
+    assert store.load(checker_module.ORGANIZATION_SCOPE)
+
+def test_prune_history_cascades_to_results(store, result):
+    old = scan(store, 'repo', {'checks': [result('x', 'PASS')]}, 100.0)
+    store._conn.execute("UPDATE compliance_runs SET started_at = ? WHERE run_id = ?",
+                        ((datetime.now() - timedelta(days=400)).isoformat(), old))
+    store._conn.commit()
+    recent = scan(store, 'repo', {'checks': [result('x', 'FAIL')]}, 0.0)
+
+    assert store.prune_history(retention_days=30) == 1
+    assert store._conn.execute("SELECT COUNT(*) FROM compliance_results").fetchone() == (1,)
+    assert store.first_run_since(datetime.now() - timedelta(days=1)) == recent
+    # 比較対象の履歴がなくなったチェックは新規扱い
+    assert store.transitions(recent) == []
@@ -0,0 +1,149 @@
+"""github_client.py のテスト（条件付きリクエストとレスポンスキャッシュ）"""
+
+import json
+
+import pytest
+import requests
+
+from github_client import ResponseCache, count_items, get_json
+
+API_URL = 'https://api.example.test/repos/org/repo/pulls'
+
+def make_response(status: int, body=None, headers=None) -> requests.Response:
+    """テスト用の requests.Response"""
+    response = requests.Response()
+    response.status_code = status
+    response._content = b'' if body is None else json.dumps(body).encode()
+    response.headers.update(headers or {})
+    return response
+
+class FakeSession:
+    """送信したリクエストを記録し、用意した応答を順に返すセッション"""
+
+    def __init__(self, *responses: requests.Response):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs.get('headers') or {}))
+        response = self.responses.pop(0)
+        response.url = url
+        return response
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    yield cache
+    cache.close()
+
+def stored_sizes(cache: ResponseCache):
+    return dict(cache._conn.execute("SELECT url, size FROM responses"))
+
+def test_revalidates_with_etag_and_serves_cached_body_on_304(cache):
+    link = f'<{API_URL}?page=2>; rel="next"'
+    session = FakeSession(
+        make_response(200, [{'number': 1}], {'ETag': '"v1"', 'Link': link}),
+        make_response(304),
+    )
+
+    first, _ = get_json(session, API_URL, cache=cache)
+    second, response = get_json(session, API_URL, cache=cache)
+
+    assert first == second == [{'number': 1}]
+    assert session.requests[0][2] == {}
+    assert session.requests[1][2] == {'If-None-Match': '"v1"'}
+    # 304 に Link がなくても保存済みの値で補う
+    assert response.links['next']['url'] == f'{API_URL}?page=2'
+    assert cache.revalidated == 1
+
+def test_refetches_when_entry_disappears_after_304(cache):
+    session = FakeSession(
+        make_response(200, {'v': 1}, {'ETag': '"v1"'}),
+        make_response(304),
+        make_response(200, {'v': 2}, {'ETag': '"v2"'}),
+    )
+    get_json(session, API_URL, cache=cache)
+    cache._conn.execute("DELETE FROM responses")
+
+    data, _ = get_json(session, API_URL, cache=cache)
+
+    assert data == {'v': 2}
+    assert session.requests[2][2] == {}
+
+def test_responses_without_validators_are_not_stored(cache):
+    session = FakeSession(make_response(200, {'v': 1}), make_response(200, {'v': 1}))
+
+    get_json(session, API_URL, cache=cache)
+    get_json(session, API_URL, cache=cache)
+
+    assert cache.stored == 0
+    assert session.requests[1][2] == {}
+
+def test_total_bytes_tracks_insert_and_replace(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResponseCache(path)
+    cache.store('a', make_response(200, headers={'ETag': '"1"'}), 'x' * 10)
+    cache.store('b', make_response(200, headers={'ETag': '"1"'}), 'y' * 20)
+    cache.store('a', make_response(200, headers={'ETag': '"2"'}), 'z' * 5)
+
+    assert cache.total_bytes == sum(stored_sizes(cache).values())
+    cache.close()
+
+    # 開き直した場合はテーブルの合計から再開する
+    reopened = ResponseCache(path)
+    assert reopened.total_bytes == sum(stored_sizes(reopened).values())
+    reopened.close()
+
+def test_evicts_least_recently_used_when_over_cap(tmp_path):
+    # 各エントリは JSON で 12 バイト（'"' + 10 文字 + '"'）
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_bytes=30)
+    etag = {'ETag': '"1"'}
+    cache.store('a', make_response(200, headers=etag), 'a' * 10)
+    cache.store('b', make_response(200, headers=etag), 'b' * 10)
+    cache._conn.execute("UPDATE responses SET accessed_at = CASE url WHEN 'a' THEN 1 ELSE 2 END")
+    # 304 で参照された a は b より新しい扱いになる
+    cache.load('a')
+
+    cache.store('c', make_response(200, headers=etag), 'c' * 10)
+
+    assert set(stored_sizes(cache)) == {'a', 'c'}
+    assert cache.total_bytes == 24
+    cache.close()
+
+def test_no_eviction_below_cap(cache):
+    for url in 'abc':
+        cache.store(url, make_response(200, headers={'ETag': '"1"'}), url)
+
+    assert set(stored_sizes(cache)) == {'a', 'b', 'c'}
+
+def test_access_times_from_304_are_written_on_close(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResponseCache(path)
+    cache.store('a', make_response(200, headers={'ETag': '"1"'}), 'a')
+    cache._conn.execute("UPDATE responses SET accessed_at = 0")
+    cache._conn.commit()
+
+    cache.load('a')
+    # 304 ごとには書き込まない
+    assert cache._conn.execute("SELECT accessed_at FROM responses").fetchone()[0] == 0
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened._conn.execute("SELECT accessed_at FROM responses").fetchone()[0] > 0
+    reopened.close()
+
+def test_load_of_unknown_url_raises_key_error(cache):
+    with pytest.raises(KeyError):
+        cache.load('missing')
+
+def test_count_items_uses_last_page_of_link_header():
+    last = f'<{API_URL}?per_page=1&page=42>; rel="last"'
+    session = FakeSession(make_response(200, [{'number': 1}], {'Link': last}))
+
+    assert count_items(session, API_URL) == 42
+    assert 'per_page=1' in session.requests[0][1]
+
+def test_count_items_without_link_counts_single_page():
+    session = FakeSession(make_response(200, [{'number': 1}, {'number': 2}]))
+
+    assert count_items(session, API_URL) == 2
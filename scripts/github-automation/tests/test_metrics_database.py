@@ -0,0 +1,173 @@
+"""monitoring-collector.py の MetricsDatabase のテスト（スキーマ移行と集計テーブル）"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# ISO 文字列の timestamp を持つ初版のスキーマ（PRAGMA user_version = 0）
+V0_DDL = """
+    CREATE TABLE metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        repository TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        commits_count INTEGER,
+        pull_requests_open INTEGER,
+        pull_requests_closed INTEGER,
+        issues_open INTEGER,
+        issues_closed INTEGER,
+        contributors INTEGER,
+        stars INTEGER,
+        forks INTEGER,
+        security_alerts INTEGER,
+        deployment_frequency REAL,
+        lead_time_hours REAL,
+        change_failure_rate REAL,
+        recovery_time_minutes REAL,
+        UNIQUE(repository, timestamp)
+    )
+"""
+
+# スナップショットの timestamp はローカル時刻の naive datetime（集計バケットは UTC 基準）
+BASE = datetime.fromtimestamp(datetime(2026, 9, 1, 1, 0, tzinfo=timezone.utc).timestamp())
+
+def make_metrics(module, repository='repo', timestamp=BASE, **values):
+    fields = dict(
+        commits_count=1, pull_requests_open=1, pull_requests_closed=1, issues_open=1,
+        issues_closed=1, contributors=1, stars=1, forks=1, security_alerts=2,
+        deployment_frequency=1.0, lead_time_hours=10.0, change_failure_rate=0.1,
+        recovery_time_minutes=30.0
+    )
+    fields.update(values)
+    return module.GitHubMetrics(repository=repository, timestamp=timestamp, **fields)
+
+def schema_objects(conn):
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master")}
+
+def rollup(conn, table, repository='repo'):
+    return conn.execute(
+        f"SELECT bucket, samples, sum_lead_time_hours, sum_security_alerts, max_security_alerts "
+        f"FROM {table} WHERE repository = ? ORDER BY bucket", (repository,)
+    ).fetchall()
+
+@pytest.fixture
+def v0_database(tmp_path):
+    """初版スキーマに ISO 文字列のスナップショット 3 件を持つデータベース"""
+    path = str(tmp_path / 'metrics.db')
+    conn = sqlite3.connect(path)
+    conn.execute(V0_DDL)
+    rows = [
+        ('repo', BASE, 10.0, 2),
+        ('repo', BASE + timedelta(hours=6), 20.0, 4),
+        ('repo', BASE + timedelta(days=8), 30.0, 1),
+    ]
+    conn.executemany(
+        "INSERT INTO metrics (repository, timestamp, commits_count, pull_requests_open, "
+        "pull_requests_closed, issues_open, issues_closed, contributors, stars, forks, "
+        "security_alerts, deployment_frequency, lead_time_hours, change_failure_rate, "
+        "recovery_time_minutes) VALUES (?, ?, 1, 1, 1, 1, 1, 1, 1, 1, ?, 1.0, ?, 0.1, 30.0)",
+        [(repo, ts.isoformat(), alerts, lead) for repo, ts, lead, alerts in rows]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+def test_migrates_v0_database_to_current_schema(v0_database, collector_module):
+    database = collector_module.MetricsDatabase(v0_database)
+    conn = database.connection
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION == 4
+    # v1: timestamp はエポック秒
+    assert conn.execute(
+        "SELECT typeof(timestamp), timestamp FROM metrics ORDER BY timestamp LIMIT 1"
+    ).fetchone() == ('integer', int(BASE.timestamp()))
+    assert conn.execute("SELECT COUNT(*) FROM metrics").fetchone() == (3,)
+    objects = schema_objects(conn)
+    # v2: レポート用インデックス / v3: 集計テーブルとトリガー / v4: 配信 ID
+    assert {'idx_metrics_timestamp_repository', 'idx_metrics_report',
+            'metrics_daily', 'metrics_weekly',
+            'metrics_rollup_insert', 'metrics_rollup_update',
+            'webhook_deliveries'} <= objects
+    database.close()
+
+def test_v3_migration_builds_rollups_from_existing_rows(v0_database, collector_module):
+    database = collector_module.MetricsDatabase(v0_database)
+    conn = database.connection
+
+    daily = rollup(conn, 'metrics_daily')
+    weekly = rollup(conn, 'metrics_weekly')
+
+    assert [(samples, lead, alerts_sum, alerts_max)
+            for _, samples, lead, alerts_sum, alerts_max in daily] == [
+        (2, 30.0, 6.0, 4), (1, 30.0, 1.0, 1)
+    ]
+    assert sum(samples for _, samples, *_ in weekly) == 3
+    # 週次バケットは月曜 00:00 UTC 起点
+    for bucket, *_ in weekly:
+        start = datetime.fromtimestamp(bucket, timezone.utc)
+        assert (start.weekday(), start.hour, start.minute) == (0, 0, 0)
+    database.close()
+
+def test_reopening_current_database_does_not_migrate_again(v0_database, collector_module):
+    collector_module.MetricsDatabase(v0_database).close()
+    database = collector_module.MetricsDatabase(v0_database)
+
+    # 集計が二重に構築されていない
+    assert sum(samples for _, samples, *_ in rollup(database.connection, 'metrics_daily')) == 3
+    database.close()
+
+def test_migrates_from_intermediate_version(tmp_path, collector_module):
+    path = str(tmp_path / 'metrics.db')
+    collector_module.MetricsDatabase(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE webhook_deliveries")
+    conn.execute("PRAGMA user_version = 3")
+    conn.commit()
+    conn.close()
+
+    database = collector_module.MetricsDatabase(path)
+
+    assert database.connection.execute("PRAGMA user_version").fetchone() == (4,)
+    assert 'webhook_deliveries' in schema_objects(database.connection)
+    database.close()
+
+def test_failed_migration_rolls_back(v0_database, collector_module, monkeypatch):
+    def fail(self, conn):
+        raise RuntimeError('migration failed')
+
+    monkeypatch.setattr(collector_module.MetricsDatabase, '_migrate_rollups', fail)
+    with pytest.raises(RuntimeError):
+        collector_module.MetricsDatabase(v0_database)
+
+    conn = sqlite3.connect(v0_database)
+    # v1・v2 は完了し、v3 の途中までの変更は残らない
+    assert conn.execute("PRAGMA user_version").fetchone() == (2,)
+    assert 'metrics_daily' not in schema_objects(conn)
+
+def test_rollup_triggers_follow_insert_and_upsert(tmp_path, collector_module):
+    database = collector_module.MetricsDatabase(str(tmp_path / 'metrics.db'))
+    database.save_metrics_batch([
+        make_metrics(collector_module, lead_time_hours=10.0, security_alerts=2),
+        make_metrics(collector_module, timestamp=BASE + timedelta(hours=1),
+                     lead_time_hours=20.0, security_alerts=5),
+    ])
+    # 同じ (repository, timestamp) は上書きし、集計は差分だけ変わる
+    database.save_metrics(make_metrics(collector_module, lead_time_hours=40.0, security_alerts=3))
+
+    (bucket, samples, lead, alerts_sum, alerts_max), = rollup(database.connection, 'metrics_daily')
+    assert (samples, lead, alerts_sum, alerts_max) == (2, 60.0, 8.0, 5)
+    assert rollup(database.connection, 'metrics_weekly')[0][1:4] == (2, 60.0, 8.0)
+    database.close()
+
+def test_retention_keeps_rollups(tmp_path, collector_module):
+    database = collector_module.MetricsDatabase(str(tmp_path / 'metrics.db'))
+    old = datetime.now() - timedelta(days=200)
+    database.save_metrics_batch([
+        make_metrics(collector_module, timestamp=old),
+        make_metrics(collector_module, timestamp=datetime.now()),
+    ])
+
+    assert database.apply_retention(retention_days=90, downsample_after_days=0) == 1
+    assert database.connection.execute("SELECT COUNT(*) FROM metrics").fetchone() == (1,)
+    assert sum(samples for _, samples, *_ in rollup(database.connection, 'metrics_daily')) == 2
+    database.close()
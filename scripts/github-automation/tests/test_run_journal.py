@@ -0,0 +1,97 @@
+"""run_journal.py のテスト（実行の記録と --resume による再開）"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from run_journal import RunJournal
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'journal.db')
+
+def test_resume_skips_done_and_retries_failed_and_pending(db_path):
+    journal = RunJournal.open('checker', 'org', db_path=db_path)
+    planned = list(journal.skip_done(['a', 'b', 'c', 'd']))
+    journal.mark_done('a', {'repository': 'a', 'score': 90})
+    journal.mark_failed('b', 'timeout')
+    journal.finish('interrupted')
+
+    resumed = RunJournal.open('checker', 'org', journal.run_id, db_path=db_path)
+
+    assert planned == ['a', 'b', 'c', 'd']
+    assert resumed.resumed
+    assert list(resumed.skip_done(['a', 'b', 'c', 'd'])) == ['b', 'c', 'd']
+    assert list(resumed.iter_results()) == [{'repository': 'a', 'score': 90}]
+    assert resumed.progress() == {'done': 1, 'failed': 1, 'pending': 2}
+
+def test_failed_item_can_be_completed_on_resume(db_path):
+    journal = RunJournal.open('checker', 'org', db_path=db_path)
+    list(journal.skip_done(['a']))
+    journal.mark_failed('a', 'boom')
+    journal.finish('failed')
+
+    resumed = RunJournal.open('checker', 'org', journal.run_id, db_path=db_path)
+    list(resumed.skip_done(['a']))
+    resumed.mark_done('a')
+    resumed.finish()
+
+    assert resumed.progress() == {'done': 1}
+
+def test_skip_done_uses_key_and_is_lazy(db_path):
+    journal = RunJournal.open('collector', 'org', db_path=db_path)
+    journal.mark_done('a')
+    repos = iter([{'name': 'a'}, {'name': 'b'}, {'name': 'c'}])
+
+    remaining = journal.skip_done(repos, key=lambda repo: repo['name'])
+
+    assert next(remaining) == {'name': 'b'}
+    # 取り出していない要素は計画として記録されない
+    assert journal.progress() == {'done': 1, 'pending': 1}
+
+@pytest.mark.parametrize('tool, org, message', [
+    ('checker', 'other-org', 'の実行です'),
+    ('collector', 'org', 'の実行です'),
+])
+def test_resume_rejects_run_of_other_tool_or_org(db_path, tool, org, message):
+    journal = RunJournal.open('checker', 'org', db_path=db_path)
+    journal.finish('interrupted')
+
+    with pytest.raises(ValueError, match=message):
+        RunJournal.open(tool, org, journal.run_id, db_path=db_path)
+
+def test_resume_rejects_unknown_and_completed_runs(db_path):
+    journal = RunJournal.open('checker', 'org', db_path=db_path)
+    journal.finish('completed')
+
+    with pytest.raises(ValueError, match='見つかりません'):
+        RunJournal.open('checker', 'org', 'no-such-run', db_path=db_path)
+    with pytest.raises(ValueError, match='完了済み'):
+        RunJournal.open('checker', 'org', journal.run_id, db_path=db_path)
+
+def test_new_run_prunes_runs_past_retention(db_path):
+    old = RunJournal.open('checker', 'org', db_path=db_path)
+    old.mark_done('a')
+    stale = (datetime.now() - timedelta(days=31)).isoformat()
+    old._conn.execute("UPDATE runs SET updated_at = ?", (stale,))
+    old._conn.commit()
+
+    RunJournal.open('checker', 'org', db_path=db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM runs WHERE run_id = ?", (old.run_id,)).fetchone() == (0,)
+    assert conn.execute("SELECT COUNT(*) FROM run_items").fetchone() == (0,)
+
+def test_commit_callback_defers_to_caller_transaction(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'shared.db'))
+    commits = []
+    journal = RunJournal(conn, 'collector', 'org', commit=lambda: commits.append(True))
+    journal.mark_done('a')
+
+    assert len(commits) == 2
+    # 呼び出し側がコミットするまで他の接続からは見えない
+    other = sqlite3.connect(str(tmp_path / 'shared.db'))
+    assert other.execute("SELECT COUNT(*) FROM run_items").fetchone() == (0,)
+    conn.commit()
+    assert other.execute("SELECT status FROM run_items").fetchall() == [('done',)]
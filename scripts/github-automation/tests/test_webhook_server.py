@@ -0,0 +1,182 @@
+"""webhook_server.py のテスト（署名検証・受信・記録と再送・配信の重複排除）"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+import requests
+
+from webhook_server import (DEFAULT_WEBHOOK_PATH, WebhookServer, compute_signature, deliver,
+                            iter_recorded_deliveries, replay, verify_signature)
+
+SECRET = 'test-secret'
+
+def test_signature_roundtrip():
+    body = b'{"zen": "Keep it logically awesome."}'
+    signature = compute_signature(body, SECRET)
+
+    assert signature.startswith('sha256=')
+    assert verify_signature(body, signature, SECRET)
+    assert verify_signature(body, signature, SECRET.encode('utf-8'))
+
+@pytest.mark.parametrize('signature', [
+    None,
+    '',
+    compute_signature(b'{}', 'other-secret'),
+    compute_signature(b'{"tampered": true}', SECRET),
+])
+def test_rejects_invalid_signatures(signature):
+    assert not verify_signature(b'{}', signature, SECRET)
+
+@pytest.fixture
+def serve(tmp_path):
+    """WebhookServer を別スレッドで起動し、受信 URL を返す"""
+    servers = []
+
+    def start(handlers, **kwargs):
+        server = WebhookServer(('127.0.0.1', 0), SECRET, handlers, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_port}{DEFAULT_WEBHOOK_PATH}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_dispatches_signed_delivery_to_handler(serve):
+    received = []
+
+    def handler(event, delivery_id, payload):
+        received.append((event, delivery_id, payload))
+        return {'handled': True}
+
+    server, url = serve({'push': handler})
+    response = deliver(url, 'push', {'ref': 'refs/heads/main'}, SECRET, 'delivery-1')
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['status'] == 'success'
+    assert body['delivery_id'] == 'delivery-1'
+    assert body['metadata'] == {'handled': True}
+    assert response.headers['Connection'] == 'close'
+    assert received == [('push', 'delivery-1', {'ref': 'refs/heads/main'})]
+    assert server.stats() == {'push': 1}
+
+def test_ping_is_answered_without_handler(serve):
+    _, url = serve({})
+    response = deliver(url, 'ping', {'zen': 'Design for failure.', 'hook_id': 1}, SECRET)
+
+    assert response.status_code == 200
+    assert response.json()['metadata'] == {'zen': 'Design for failure.', 'hook_id': 1}
+
+@pytest.mark.parametrize('headers, body, status, error', [
+    ({'X-GitHub-Event': 'push', 'X-GitHub-Delivery': 'd'}, b'{}', 400, 'MISSING_HEADERS'),
+    ({'X-GitHub-Event': 'push', 'X-GitHub-Delivery': 'd',
+      'X-Hub-Signature-256': compute_signature(b'{}', 'wrong')}, b'{}', 401, 'INVALID_SIGNATURE'),
+    ({'X-GitHub-Event': 'push', 'X-GitHub-Delivery': 'd',
+      'X-Hub-Signature-256': compute_signature(b'[1]', SECRET)}, b'[1]', 400, 'INVALID_PAYLOAD'),
+    ({'X-GitHub-Event': 'member', 'X-GitHub-Delivery': 'd',
+      'X-Hub-Signature-256': compute_signature(b'{}', SECRET)}, b'{}', 400, 'UNSUPPORTED_EVENT'),
+])
+def test_rejects_invalid_deliveries(serve, headers, body, status, error):
+    calls = []
+    server, url = serve({'push': lambda *args: calls.append(args) or {}})
+
+    response = requests.post(url, data=body, headers=headers, timeout=10)
+
+    assert response.status_code == status
+    assert response.json()['error'] == error
+    assert calls == []
+    assert server.stats() == {'rejected': 1}
+
+def test_rejects_payload_over_limit(serve):
+    _, url = serve({'push': lambda *args: {}}, max_payload_bytes=16)
+
+    response = deliver(url, 'push', {'padding': 'x' * 32}, SECRET)
+
+    assert response.status_code == 413
+
+def test_unknown_path_and_health(serve):
+    _, url = serve({})
+    base = url[:-len(DEFAULT_WEBHOOK_PATH)]
+
+    assert requests.post(f"{base}/other", data=b'{}', timeout=10).status_code == 404
+    health = requests.get(f"{base}/health", timeout=10)
+    assert health.status_code == 200
+    assert health.json()['status'] == 'ok'
+
+def test_handler_error_returns_500(serve):
+    def handler(event, delivery_id, payload):
+        raise RuntimeError('boom')
+
+    server, url = serve({'push': handler})
+    response = deliver(url, 'push', {}, SECRET)
+
+    assert response.status_code == 500
+    assert server.stats() == {'failed': 1}
+
+def test_recorded_deliveries_can_be_replayed(serve, tmp_path):
+    record_path = tmp_path / 'deliveries.jsonl'
+    _, recording_url = serve({'push': lambda *args: {}}, record_path=str(record_path))
+    deliver(recording_url, 'push', {'n': 1}, SECRET, 'd-1')
+    deliver(recording_url, 'push', {'n': 2}, SECRET, 'd-2')
+    # 署名が不正な配信は記録しない
+    requests.post(recording_url, data=b'{}', timeout=10, headers={
+        'X-GitHub-Event': 'push', 'X-GitHub-Delivery': 'd-3', 'X-Hub-Signature-256': 'sha256=0'
+    })
+
+    assert [d['delivery_id'] for d in iter_recorded_deliveries(record_path)] == ['d-1', 'd-2']
+
+    received = []
+    _, replay_url = serve({'push': lambda event, delivery_id, payload:
+                           received.append((delivery_id, payload)) or {}})
+    assert replay(replay_url, record_path, SECRET) == {200: 2}
+    assert received == [('d-1', {'n': 1}), ('d-2', {'n': 2})]
+
+def test_recorded_deliveries_stop_at_size_when_opened(tmp_path):
+    record_path = tmp_path / 'deliveries.jsonl'
+    record_path.write_text(json.dumps({'event': 'push', 'delivery_id': 'd-1', 'payload': {}}) + '\n')
+
+    deliveries = iter_recorded_deliveries(record_path)
+    first = next(deliveries)
+    # 再送中に追記された配信は読まない
+    with open(record_path, 'a') as f:
+        f.write(json.dumps({'event': 'push', 'delivery_id': 'd-2', 'payload': {}}) + '\n')
+
+    assert first['delivery_id'] == 'd-1'
+    assert list(deliveries) == []
+
+def test_redelivery_is_applied_once(serve, tmp_path, collector_module):
+    db_path = str(tmp_path / 'metrics.db')
+    database = collector_module.MetricsDatabase(db_path)
+    database.save_metrics(collector_module.GitHubMetrics(
+        repository='repo', timestamp=datetime.now(), commits_count=0,
+        pull_requests_open=3, pull_requests_closed=0, issues_open=0, issues_closed=0,
+        contributors=0, stars=0, forks=0, security_alerts=0, deployment_frequency=0.0,
+        lead_time_hours=0.0, change_failure_rate=0.0, recovery_time_minutes=0.0
+    ))
+    # 接続は受信スレッドで開き直す（run_webhook と同じくサーバーのスレッドで使う）
+    database.close()
+    ingestor = collector_module.WebhookIngestor(database, 'org')
+    _, url = serve(ingestor.handlers())
+    payload = {
+        'action': 'opened',
+        'repository': {'name': 'repo', 'full_name': 'org/repo', 'owner': {'login': 'org'}},
+        'pull_request': {'title': 'feat: add'}
+    }
+
+    first = deliver(url, 'pull_request', payload, SECRET, 'same-delivery').json()
+    second = deliver(url, 'pull_request', payload, SECRET, 'same-delivery').json()
+    other = deliver(url, 'pull_request', payload, SECRET, 'next-delivery').json()
+
+    assert first['metadata']['changes'] == {'pull_requests_open': 4}
+    assert second['metadata']['duplicate'] is True
+    assert other['metadata']['changes'] == {'pull_requests_open': 5}
+    conn = sqlite3.connect(db_path)
+    assert conn.execute(
+        "SELECT pull_requests_open FROM metrics ORDER BY timestamp DESC LIMIT 1"
+    ).fetchone() == (5,)
+    assert conn.execute("SELECT COUNT(*) FROM webhook_deliveries").fetchone() == (2,)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+GitHub Webhook 受信
+エス・エー・エス株式会社
+
+用途: X-Hub-Signature-256（HMAC-SHA256）を検証して GitHub Webhook を受信し、
+      イベント種別ごとの処理に渡す軽量レシーバー。記録済みペイロードを
+      署名付きで送信し直すクライアント（deliver / replay）も提供する
+      （仕様: docs/cicd/WEBHOOK_API_SPECIFICATION.md）
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 受信エンドポイントのデフォルトパス
+DEFAULT_WEBHOOK_PATH = '/webhook/github'
+
+# GitHub が送信するペイロードの上限
+MAX_PAYLOAD_BYTES = 25 * 1024 * 1024
+
+# 接続ごとのソケットタイムアウト（秒）。要求を送らない接続がサーバーを占有し続けないようにする
+REQUEST_TIMEOUT_SECONDS = 5
+
+# イベント処理: (イベント種別, 配信 ID, ペイロード) -> レスポンスの metadata
+EventHandler = Callable[[str, str, Dict[str, Any]], Dict[str, Any]]
+
+class WebhookError(Exception):
+    """エラーレスポンスとして返す受信エラー（error はエラーコード）"""
+
+    def __init__(self, status: int, error: str, message: str, details: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+        self.message = message
+        self.details = details
+
+def compute_signature(body: bytes, secret: Union[str, bytes]) -> str:
+    """X-Hub-Signature-256 ヘッダー値（sha256=<hex>）"""
+    key = secret.encode('utf-8') if isinstance(secret, str) else secret
+    return 'sha256=' + hmac.new(key, body, hashlib.sha256).hexdigest()
+
+def verify_signature(body: bytes, signature: Optional[str], secret: Union[str, bytes]) -> bool:
+    """署名を定数時間比較で検証"""
+    if not signature:
+        return False
+    return hmac.compare_digest(signature.encode('utf-8'),
+                               compute_signature(body, secret).encode('utf-8'))
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    """POST <path> で Webhook を受信し、GET /health に応答する
+
+    サーバーは 1 接続ずつ処理するため、応答ごとに接続を閉じる（keep-alive で
+    待機中の接続が以降の配信を止めないようにする）。
+    """
+
+    server: 'WebhookServer'
+    protocol_version = 'HTTP/1.1'
+    timeout = REQUEST_TIMEOUT_SECONDS
+
+    def log_message(self, format: str, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, error: WebhookError):
+        self._send_json(error.status, {
+            'error': error.error,
+            'message': error.message,
+            'details': error.details,
+            'timestamp': _timestamp(),
+            'request_id': f"req_{uuid.uuid4().hex[:16]}"
+        })
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', **self.server.stats()})
+        else:
+            self._send_error(WebhookError(404, 'NOT_FOUND', 'Not Found'))
+
+    def do_POST(self):
+        start = time.perf_counter()
+        try:
+            if self.path.split('?', 1)[0] != self.server.path:
+                raise WebhookError(404, 'NOT_FOUND', 'Not Found')
+            event, delivery_id, payload = self._read_delivery()
+            metadata = self.server.dispatch(event, delivery_id, payload)
+        except WebhookError as e:
+            self.server.count('rejected')
+            logger.warning(f"Webhook 拒否: {e.error} {e.message}")
+            self._send_error(e)
+            return
+        except Exception as e:
+            self.server.count('failed')
+            logger.exception(f"Webhook 処理エラー: {e}")
+            self._send_error(WebhookError(500, 'INTERNAL_SERVER_ERROR', 'Internal server error'))
+            return
+
+        self._send_json(200, {
+            'status': 'success',
+            'delivery_id': delivery_id,
+            'event_type': event,
+            'processing_time_ms': round((time.perf_counter() - start) * 1000),
+            'timestamp': _timestamp(),
+            'metadata': metadata
+        })
+
+    def _read_delivery(self):
+        """ヘッダー・署名・ペイロードを検証して (イベント種別, 配信 ID, ペイロード) を返す"""
+        event = self.headers.get('X-GitHub-Event')
+        delivery_id = self.headers.get('X-GitHub-Delivery')
+        signature = self.headers.get('X-Hub-Signature-256')
+        length = self.headers.get('Content-Length')
+        if not event or not delivery_id or not signature or length is None:
+            raise WebhookError(400, 'MISSING_HEADERS', 'Required headers are missing',
+                               'X-GitHub-Event, X-GitHub-Delivery, X-Hub-Signature-256, '
+                               'Content-Length are required')
+        if not length.isdigit() or int(length) > self.server.max_payload_bytes:
+            raise WebhookError(413, 'PAYLOAD_TOO_LARGE', 'Payload too large')
+
+        body = self.rfile.read(int(length))
+        if not verify_signature(body, signature, self.server.secret):
+            raise WebhookError(401, 'INVALID_SIGNATURE', 'Invalid webhook signature',
+                               'HMAC-SHA256 signature verification failed.')
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise WebhookError(400, 'INVALID_PAYLOAD', 'Invalid JSON payload', str(e))
+        if not isinstance(payload, dict):
+            raise WebhookError(400, 'INVALID_PAYLOAD', 'Payload must be a JSON object')
+
+        if self.server.recorder is not None:
+            self.server.recorder(event, delivery_id, payload)
+        return event, delivery_id, payload
+
+class WebhookServer(HTTPServer):
+    """Webhook 受信サーバー
+
+    イベント処理は受信順に 1 件ずつ行う（単一スレッド）。SQLite への反映を
+    直列化するためで、GitHub の配信頻度であれば十分に追従できる。
+    ping イベントには handlers の登録なしで応答する。
+    """
+
+    def __init__(self, address, secret: Union[str, bytes], handlers: Dict[str, EventHandler],
+                 path: str = DEFAULT_WEBHOOK_PATH, max_payload_bytes: int = MAX_PAYLOAD_BYTES,
+                 record_path: Optional[str] = None):
+        # bind に失敗すると HTTPServer.__init__ が server_close を呼ぶため、先に初期化する
+        self.recorder: Optional[DeliveryRecorder] = None
+        super().__init__(address, WebhookRequestHandler)
+        self.secret = secret
+        self.handlers = handlers
+        self.path = path
+        self.max_payload_bytes = max_payload_bytes
+        self.recorder = DeliveryRecorder(record_path) if record_path else None
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, key: str):
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        """イベント種別ごとの処理件数・拒否件数"""
+        with self._lock:
+            return dict(self._counts)
+
+    def dispatch(self, event: str, delivery_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """イベント種別の処理を呼び出す"""
+        if event == 'ping':
+            self.count('ping')
+            return {'zen': payload.get('zen'), 'hook_id': payload.get('hook_id')}
+        handler = self.handlers.get(event)
+        if handler is None:
+            raise WebhookError(400, 'UNSUPPORTED_EVENT', f"Unsupported event: {event}",
+                               f"Supported events: {', '.join(sorted(self.handlers))}")
+        metadata = handler(event, delivery_id, payload)
+        self.count(event)
+        return metadata
+
+    def server_close(self):
+        super().server_close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+class DeliveryRecorder:
+    """検証済みの配信を JSON Lines に追記する（replay で再送できる形式）"""
+
+    def __init__(self, path: Union[str, Path]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, event: str, delivery_id: str, payload: Dict[str, Any]):
+        self._file.write(json.dumps(
+            {'event': event, 'delivery_id': delivery_id, 'payload': payload},
+            ensure_ascii=False
+        ) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+def iter_recorded_deliveries(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """記録済み配信（1 行 1 件の {event, delivery_id, payload}）を読み込む
+
+    開いた時点のファイル末尾までを読む（--record 中のレシーバーへ再送しても、
+    追記された再送分を読み続けない）。
+    """
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        while f.tell() < end:
+            line = f.readline()
+            if line.strip():
+                yield json.loads(line)
+
+def deliver(url: str, event: str, payload: Dict[str, Any], secret: Union[str, bytes],
+            delivery_id: Optional[str] = None,
+            session: Optional[requests.Session] = None) -> requests.Response:
+    """GitHub と同じヘッダー・署名でペイロードを送信する"""
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'GitHub-Hookshot/replay',
+        'X-GitHub-Event': event,
+        'X-GitHub-Delivery': delivery_id or str(uuid.uuid4()),
+        'X-Hub-Signature-256': compute_signature(body, secret)
+    }
+    return (session or requests).post(url, data=body, headers=headers, timeout=30)
+
+def replay(url: str, path: Union[str, Path], secret: Union[str, bytes]) -> Dict[int, int]:
+    """記録済み配信を順に再送し、HTTP ステータスごとの件数を返す"""
+    statuses: Dict[int, int] = {}
+    with requests.Session() as session:
+        for delivery in iter_recorded_deliveries(path):
+            response = deliver(url, delivery['event'], delivery['payload'], secret,
+                               delivery.get('delivery_id'), session)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code != 200:
+                logger.warning(f"再送失敗 ({delivery.get('delivery_id')}): "
+                               f"HTTP {response.status_code} {response.text}")
+    return statuses